@@ -0,0 +1,193 @@
+import random
+import sqlite3
+import types
+import uuid
+
+from telegram.helpers import escape_markdown
+import src.db as db
+from src import roles
+from src.game_state import GameStateVersions
+from src.utils import generate_voting_summary
+from src.handlers.game_management import roles_setup, inquiry, voting, voting_session, faction_index
+from src.handlers.game_management.voting_session import VotingSession
+from src.handlers.passcode_handler import is_valid_passcode
+
+# name -> setup(player_count) returning the function (plain or async) that is timed
+CASES = {}
+
+GAME_ID = "bench-game"
+MODERATOR_ID = 1
+
+
+def benchmark(name: str):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+class NullBot:
+    """Accepts every Bot API call used by the timed handlers and does nothing."""
+
+    async def send_message(self, *args, **kwargs):
+        return types.SimpleNamespace(message_id=1)
+
+    async def edit_message_text(self, *args, **kwargs):
+        return True
+
+    async def edit_message_reply_markup(self, *args, **kwargs):
+        return True
+
+
+class NullQuery:
+    def __init__(self, chat_id: int):
+        self.message = types.SimpleNamespace(chat_id=chat_id, message_id=1)
+
+    async def answer(self, *args, **kwargs):
+        return True
+
+
+def make_update(user_id: int = MODERATOR_ID):
+    return types.SimpleNamespace(
+        effective_user=types.SimpleNamespace(id=user_id),
+        effective_chat=types.SimpleNamespace(id=user_id),
+        callback_query=NullQuery(user_id),
+    )
+
+
+def make_context(**user_data):
+    return types.SimpleNamespace(bot=NullBot(), user_data=dict(user_data))
+
+
+def players_of(player_count: int) -> list:
+    return [(MODERATOR_ID + 1 + index, f"Player {index + 1}") for index in range(player_count)]
+
+
+def fresh_game(player_count: int, eliminated_share: float = 0.0) -> list:
+    """Points the handlers at a new in-memory database holding one game with random roles."""
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    db.conn, db.cursor = conn, conn.cursor()
+    db.initialize_database()
+    for module in (roles_setup, inquiry, voting):
+        module.conn, module.cursor = db.conn, db.cursor
+    # Every player count reuses GAME_ID, so cached renders and shown messages must not carry over
+    versions = GameStateVersions()
+    for module in (roles_setup, voting, voting_session):
+        module.versions = versions
+    inquiry.inquiry_counters.clear()
+    faction_index.faction_indexes.clear()
+
+    players = players_of(player_count)
+    rng = random.Random(player_count)
+    db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (GAME_ID, "p", MODERATOR_ID))
+    db.cursor.executemany(
+        "INSERT INTO GameRoles (game_id, role, count) VALUES (?, ?, ?)",
+        [(GAME_ID, role, rng.randint(0, 3)) for role in roles.available_roles]
+    )
+    db.cursor.executemany("INSERT INTO Users (user_id, username) VALUES (?, ?)", players)
+    db.cursor.executemany(
+        "INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, ?, ?)",
+        [(GAME_ID, user_id, rng.choice(roles.available_roles), int(rng.random() < eliminated_share)) for user_id, _ in players]
+    )
+    db.conn.commit()
+    return players
+
+
+# -------------------- Pure functions --------------------
+
+@benchmark("generate_voting_summary")
+def bench_generate_voting_summary(player_count: int):
+    names = [name for _, name in players_of(player_count)]
+    voted, not_voted = names[::2], names[1::2]
+    tally = [(name, index + 1) for index, name in enumerate(names[:5])]
+    return lambda: generate_voting_summary(voted, not_voted, tally)
+
+
+@benchmark("voting_tally")
+def bench_voting_tally(player_count: int):
+    """Every player votes for two others, then the results and ballots used by process_voting_results."""
+    players = players_of(player_count)
+    ids = [user_id for user_id, _ in players]
+    rng = random.Random(player_count)
+    ballots = [(voter, rng.sample(ids, min(2, len(ids)))) for voter in ids]
+
+    def run():
+        session = VotingSession(GAME_ID, players)
+        session.open_voting()
+        for voter, targets in ballots:
+            for target in targets:
+                session.toggle(voter, target)
+            session.confirm(voter)
+        session.results()
+        session.ballots()
+    return run
+
+
+@benchmark("escape_markdown_summary")
+def bench_escape_markdown(player_count: int):
+    names = [name for _, name in players_of(player_count)]
+    summary = generate_voting_summary(names, names, [(name, 1) for name in names])
+    return lambda: escape_markdown(summary, version=2)
+
+
+@benchmark("is_valid_passcode")
+def bench_is_valid_passcode(player_count: int):
+    """One passcode check per player joining, half of them with a mistyped code."""
+    rng = random.Random(player_count)
+    codes = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(player_count)]
+    codes = [code if index % 2 else code.upper() for index, code in enumerate(codes)]
+
+    def run():
+        for code in codes:
+            is_valid_passcode(code)
+    return run
+
+
+# -------------------- Handlers (in-memory DB, no-op bot) --------------------
+
+@benchmark("show_role_buttons")
+def bench_show_role_buttons(player_count: int):
+    """A role count changed, so the page is rendered again and the message edited."""
+    fresh_game(player_count)
+    update, context = make_update(), make_context(game_id=GAME_ID, current_page=0)
+
+    async def run():
+        roles_setup.versions.bump(GAME_ID, 'roles')
+        await roles_setup.show_role_buttons(update, context, message_id=1)
+    return run
+
+
+@benchmark("confirm_permissions")
+def bench_confirm_permissions(player_count: int):
+    players = fresh_game(player_count)
+    session = VotingSession(GAME_ID, players)
+    session.summary_message_id = 1
+    voting.game_voting_data[GAME_ID] = session
+    update, context = make_update(), make_context(game_id=GAME_ID)
+
+    async def run():
+        await voting.confirm_permissions(update, context)
+    return run
+
+
+@benchmark("detailed_inquiry_summary")
+def bench_detailed_inquiry(player_count: int):
+    fresh_game(player_count, eliminated_share=0.3)
+    update, context = make_update(), make_context(game_id=GAME_ID)
+
+    async def run():
+        await inquiry.send_detailed_inquiry_summary(update, context, GAME_ID)
+    return run
+
+
+@benchmark("inquiry_rerender")
+def bench_inquiry_render(player_count: int):
+    """An elimination or revival bumps the counters' version, so the detailed text is rendered again."""
+    players = fresh_game(player_count, eliminated_share=0.3)
+    counters = inquiry.get_inquiry_counters(GAME_ID)
+    user_id = players[0][0]
+
+    def run():
+        counters.set_eliminated(user_id, user_id not in counters.eliminated)
+        counters.render(detailed=True)
+    return run
@@ -0,0 +1,132 @@
+"""
+Micro-benchmarks of the CPU-bound hot paths, for comparing commits.
+
+Usage (from the repository root):
+    python -m benchmarks.run --output before.json
+    python -m benchmarks.run --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import inspect
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+DEFAULT_PLAYER_COUNTS = (5, 10, 25, 50, 100, 200)
+
+# Each repeat runs the case in a loop for at least this long, in seconds
+MIN_REPEAT_TIME = 0.05
+
+
+def time_case(func, repeats: int) -> dict:
+    """Times func per call. Coroutine functions are awaited inside one event loop."""
+    if inspect.iscoroutinefunction(func):
+        async def run_loops(loops: int) -> float:
+            start = time.perf_counter()
+            for _ in range(loops):
+                await func()
+            return time.perf_counter() - start
+
+        def measure(loops: int) -> float:
+            return asyncio.run(run_loops(loops))
+    else:
+        def measure(loops: int) -> float:
+            start = time.perf_counter()
+            for _ in range(loops):
+                func()
+            return time.perf_counter() - start
+
+    # Find a loop count that runs for at least MIN_REPEAT_TIME
+    loops = 1
+    while measure(loops) < MIN_REPEAT_TIME:
+        loops *= 2
+
+    per_call = [measure(loops) / loops * 1e6 for _ in range(repeats)]
+    return {
+        "median_us": statistics.median(per_call),
+        "min_us": min(per_call),
+        "stdev_us": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+        "loops": loops,
+    }
+
+
+def run_benchmarks(names: list, player_counts: list, repeats: int) -> dict:
+    from benchmarks.cases import CASES
+    results = {}
+    for name in names or CASES:
+        results[name] = {}
+        for player_count in player_counts:
+            result = time_case(CASES[name](player_count), repeats)
+            results[name][str(player_count)] = result
+            print(f"{name:<28}{player_count:>5} players {result['median_us']:>12.1f} us  (min {result['min_us']:.1f})")
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Returns a line per case that got slower than the baseline by more than `threshold`."""
+    regressions = []
+    for name, by_count in results.items():
+        for player_count, result in by_count.items():
+            before = baseline.get(name, {}).get(player_count)
+            if not before:
+                continue
+            ratio = result["median_us"] / before["median_us"]
+            marker = "REGRESSION" if ratio > 1 + threshold else ""
+            line = (f"{name:<28}{player_count:>5} players {before['median_us']:>10.1f} -> "
+                    f"{result['median_us']:>10.1f} us  x{ratio:.2f} {marker}")
+            print(line)
+            if marker:
+                regressions.append(line)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the hot-path micro-benchmarks")
+    parser.add_argument("names", nargs="*", help="Cases to run (default: all).")
+    parser.add_argument("--players", default=",".join(map(str, DEFAULT_PLAYER_COUNTS)),
+                        help="Comma-separated player counts.")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline JSON file written by an earlier --output.")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Slowdown ratio over the baseline reported as a regression (default 0.10).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    player_counts = [int(count) for count in args.players.split(",")]
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        },
+        "results": run_benchmarks(args.names, player_counts, args.repeats),
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        print(f"\nCompared with {args.compare} (commit {baseline['meta'].get('commit') or 'unknown'}):")
+        if compare(report["results"], baseline["results"], args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
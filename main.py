@@ -1,11 +1,38 @@
+import argparse
+import atexit
+import functools
 import logging
+import logging.handlers
+import multiprocessing
 import os
+import queue
 from telegram.ext import Application
-from src.config import TOKEN
-from src.db import initialize_database
+from src import config
+from src.bootstrap import bootstrap
+from src.persistence import SQLitePersistence
+from src.api_metrics import InstrumentedRequest, CONNECTION_POOL_SIZE
 from src.handlers.start_handler import start_handler
 from src.handlers.button_handler import button_handler, final_confirm_vote_handler, cancel_vote_handler
 from src.handlers.passcode_handler import passcode_handler
+from src.handlers.game_management.group_voting import (bind_group_handler, unbind_group_handler, group_vote_handler,
+                                                       group_confirm_vote_handler)
+from src.handlers.game_management.poll_voting import poll_answer_handler
+from src.handlers.game_management.night_phase import night_action_handler
+from src.handlers.game_management import voting_deadline
+from src.handlers.dedup_handler import dedup_handler, DEDUP_GROUP
+from src.handlers.maintainer_handler import (metrics_handler, sql_profile_handler, api_stats_handler, loop_lag_handler,
+                                             cpu_profile_handler, memory_profile_handler)
+from src.metrics import start_metrics_server
+from src.sql_profiler import profiler, PROFILE_SQL_ENV
+from src.loop_monitor import monitor, LOOP_LAG_THRESHOLD_ENV
+from src.recorder import recorder, record_handler, RECORD_GROUP, RECORD_UPDATES_ENV
+
+# Size-based rotation of the log files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Third-party loggers that are raised to WARNING
+NOISY_LOGGERS = ("telegram", "httpx", "httpcore", "apscheduler", "asyncio")
 
 class ApplicationFilter(logging.Filter):
     def __init__(self, application_name):
@@ -23,20 +50,36 @@ class ApplicationFilter(logging.Filter):
 
         return False  # Default to filtering out other logs
 
-def setup_logging():
-    # Configure the root logger
-    logging.basicConfig(
-        level=logging.DEBUG,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),
-            logging.FileHandler(os.path.join("logs", "mafia_bot.log"))
-        ]
+def setup_logging(level="DEBUG"):
+    process_name = multiprocessing.current_process().name
+    log_name = "mafia_bot.log" if process_name == "MainProcess" else f"{process_name}.log"
+    os.makedirs("logs", exist_ok=True)
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream_handler = logging.StreamHandler()
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join("logs", log_name), maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8"
     )
+    for handler in (stream_handler, file_handler):
+        handler.setFormatter(formatter)
 
-    # Add the filter to the handlers of the root logger
-    for handler in logging.getLogger().handlers:
-        handler.addFilter(ApplicationFilter("Mafia Bot"))
+    # Handlers write from a background thread; the event loop only formats the message and
+    # enqueues it. Formatting on enqueue snapshots arguments the loop may still be mutating.
+    log_queue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(ApplicationFilter("Mafia Bot"))
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, file_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    # Configure the root logger
+    root_logger = logging.getLogger()
+    root_logger.handlers = [queue_handler]
+    root_logger.setLevel(level)
+
+    # Records of noisy libraries are filtered out anyway; don't create them in the first place
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(logging.WARNING)
 
     logger = logging.getLogger("Mafia Bot")
     return logger
@@ -47,26 +90,126 @@ async def error_handler(update, context):
     if update and update.effective_chat:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="An unexpected error occurred. Please try again later.")
 
-def main():
-    logger = setup_logging()
-    logger.info("Initializing the Mafia Bot...")
+async def post_init(application, metrics_port=0):
+    await monitor.start()
+    if metrics_port:
+        await start_metrics_server(metrics_port)
+    # Timed voting rounds that were open when the bot stopped
+    voting_deadline.schedule_restored_deadlines(application.job_queue)
 
-    # Initialize the database
-    initialize_database()
+def register_handlers(application):
+    if recorder.enabled:
+        # Record every update as it arrives, before anything can drop it
+        application.add_handler(record_handler, group=RECORD_GROUP)
+        atexit.register(recorder.close)
 
-    # Create the Application and pass it your bot's token.
-    application = Application.builder().token(TOKEN).build()
+    # Drop duplicate button taps before any other handler runs
+    application.add_handler(dedup_handler, group=DEDUP_GROUP)
 
-    # Register handlers
     application.add_handler(start_handler)
+    application.add_handler(bind_group_handler)
+    application.add_handler(unbind_group_handler)
+    # Before button_handler, which takes every callback query it sees first
+    application.add_handler(group_vote_handler)
+    application.add_handler(group_confirm_vote_handler)
+    application.add_handler(night_action_handler)
     application.add_handler(button_handler)
+    application.add_handler(poll_answer_handler)
     application.add_handler(final_confirm_vote_handler)
     application.add_handler(cancel_vote_handler)
     application.add_handler(passcode_handler)
+    application.add_handler(metrics_handler)
+    application.add_handler(sql_profile_handler)
+    application.add_handler(api_stats_handler)
+    application.add_handler(loop_lag_handler)
+    application.add_handler(cpu_profile_handler)
+    application.add_handler(memory_profile_handler)
 
     # Register the error handler
     application.add_error_handler(error_handler)
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mafia Game Telegram Bot")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of worker processes. With more than one, a dispatcher routes updates to workers by game."
+    )
+    parser.add_argument(
+        "--metrics-port", type=int, default=0,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics (worker N uses PORT + N). Disabled by default."
+    )
+    parser.add_argument(
+        "--base-url", default=None,
+        help="Bot API base URL, e.g. http://127.0.0.1:8081/bot for the load-test server in tools/loadtest."
+    )
+    parser.add_argument(
+        "--log-level", default="DEBUG", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+        help="Minimum level of the bot's log records (default: DEBUG)."
+    )
+    parser.add_argument(
+        "--profile-sql", action="store_true",
+        help="Start with the SQL statement profiler enabled. It can also be toggled with /sqlprofile on|off."
+    )
+    parser.add_argument(
+        "--loop-lag-threshold", type=float, default=None, metavar="MS",
+        help="Sample the stack of code that blocks the event loop for longer than MS milliseconds "
+             "(default: 100, 0 turns the monitor off). See /looplag."
+    )
+    parser.add_argument(
+        "--record-updates", metavar="PATH", default=None,
+        help="Record anonymized incoming updates to PATH (gzip-compressed JSON lines) for tools/replay.py."
+    )
+    parser.add_argument(
+        "--voting-deadline", type=int, default=None, metavar="MINUTES",
+        help="Default deadline of a voting round; the moderator can change it per round (default: none)."
+    )
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.profile_sql:
+        # Set through the environment so spawned worker processes start with it enabled too
+        os.environ[PROFILE_SQL_ENV] = "1"
+        profiler.enabled = True
+    if args.loop_lag_threshold is not None:
+        os.environ[LOOP_LAG_THRESHOLD_ENV] = str(args.loop_lag_threshold)
+        monitor.threshold = args.loop_lag_threshold / 1000
+    if args.record_updates:
+        os.environ[RECORD_UPDATES_ENV] = args.record_updates
+        recorder.path = args.record_updates
+    if args.voting_deadline is not None:
+        os.environ[voting_deadline.VOTING_DEADLINE_ENV] = str(args.voting_deadline)
+        voting_deadline.default_deadline_minutes = args.voting_deadline
+    logger = setup_logging(args.log_level)
+    logger.info("Initializing the Mafia Bot...")
+
+    # Settings, database schema and role data. Worker processes restore the voting sessions of their own games.
+    bootstrap(restore_sessions=args.workers <= 1)
+
+    if args.workers > 1:
+        from src.dispatcher import run_dispatcher
+        logger.info("Starting the bot with %s worker processes...", args.workers)
+        run_dispatcher(
+            config.TOKEN, args.workers, register_handlers, functools.partial(setup_logging, args.log_level),
+            args.metrics_port, args.base_url
+        )
+        return
+
+    # Create the Application and pass it your bot's token.
+    builder = (
+        Application.builder()
+        .token(config.TOKEN)
+        .persistence(SQLitePersistence())
+        .request(InstrumentedRequest(connection_pool_size=CONNECTION_POOL_SIZE))
+    )
+    if args.base_url:
+        builder.base_url(args.base_url)
+    builder.post_init(functools.partial(post_init, metrics_port=args.metrics_port))
+    application = builder.build()
+
+    # Register handlers
+    register_handlers(application)
+
     # Run the bot
     logger.info("Starting the bot...")
     application.run_polling()
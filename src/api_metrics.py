@@ -0,0 +1,134 @@
+import logging
+import time
+from telegram.error import TimedOut
+from telegram.request import HTTPXRequest
+from src import metrics
+
+logger = logging.getLogger("Mafia Bot ApiMetrics")
+
+# Same pool size the Application builder uses for its default bot request
+CONNECTION_POOL_SIZE = 256
+
+# HTTP status Telegram answers with when flood control kicks in
+TOO_MANY_REQUESTS = 429
+
+
+class MethodStats:
+    __slots__ = ('latency', 'response_bytes', 'retry_after', 'timeouts', 'not_modified', 'errors')
+
+    def __init__(self):
+        self.latency = metrics.Histogram()
+        self.response_bytes = 0
+        self.retry_after = 0
+        self.timeouts = 0
+        self.not_modified = 0
+        self.errors = 0  # Other non-2xx responses and network errors
+
+
+class ApiCallTracker:
+    """Bot API calls by method, and by (handler route, method) of the update that made them."""
+
+    def __init__(self):
+        self.methods = {}  # api method -> MethodStats
+        self.by_route = {}  # (route, api method) -> call count
+
+    def _stats(self, api_method: str) -> MethodStats:
+        stats = self.methods.get(api_method)
+        if stats is None:
+            stats = self.methods[api_method] = MethodStats()
+        return stats
+
+    def record(self, api_method: str, seconds: float, status: int = None, payload: bytes = b"",
+               timed_out: bool = False) -> None:
+        stats = self._stats(api_method)
+        failed = timed_out or status is None or not 200 <= status <= 299
+        stats.latency.observe(seconds, failed)
+        stats.response_bytes += len(payload)
+        if timed_out:
+            stats.timeouts += 1
+        elif status == TOO_MANY_REQUESTS:
+            stats.retry_after += 1
+        elif failed and b"message is not modified" in payload:
+            stats.not_modified += 1
+        elif failed:
+            stats.errors += 1
+
+        key = (metrics.current_route.get() or "background", api_method)
+        self.by_route[key] = self.by_route.get(key, 0) + 1
+
+    def reset(self) -> None:
+        self.methods.clear()
+        self.by_route.clear()
+
+    def report(self, limit: int = 10) -> str:
+        if not self.methods:
+            return "No Bot API calls recorded yet."
+        lines = ["method: calls / p50 / p90 / p99 (ms) / KiB received / 429 / timeouts / not modified / errors"]
+        rows = sorted(self.methods.items(), key=lambda item: item[1].latency.total, reverse=True)
+        for api_method, stats in rows[:limit]:
+            latency = stats.latency
+            lines.append(
+                f"{api_method}: {latency.count} / {latency.quantile(0.5) * 1000:.0f} / "
+                f"{latency.quantile(0.9) * 1000:.0f} / {latency.quantile(0.99) * 1000:.0f} / "
+                f"{stats.response_bytes / 1024:.1f} / {stats.retry_after} / {stats.timeouts} / "
+                f"{stats.not_modified} / {stats.errors}"
+            )
+        lines.append("")
+        lines.append("Calls by handler route:")
+        for (route, api_method), count in sorted(self.by_route.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            lines.append(f"{route} -> {api_method}: {count}")
+        return "\n".join(lines)
+
+    def prometheus_lines(self) -> list:
+        lines = [
+            "# HELP mafia_bot_api_latency_seconds Latency of Bot API calls by method.",
+            "# TYPE mafia_bot_api_latency_seconds histogram",
+        ]
+        for api_method, stats in sorted(self.methods.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(metrics.LATENCY_BUCKETS + ("+Inf",), stats.latency.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'mafia_bot_api_latency_seconds_bucket{{method="{api_method}",le="{bound}"}} {cumulative}')
+            lines.append(f'mafia_bot_api_latency_seconds_sum{{method="{api_method}"}} {stats.latency.total:.6f}')
+            lines.append(f'mafia_bot_api_latency_seconds_count{{method="{api_method}"}} {stats.latency.count}')
+        lines.append("# HELP mafia_bot_api_outcomes_total Bot API calls that did not succeed, by method and outcome.")
+        lines.append("# TYPE mafia_bot_api_outcomes_total counter")
+        for api_method, stats in sorted(self.methods.items()):
+            for outcome in ('retry_after', 'timeouts', 'not_modified', 'errors'):
+                lines.append(f'mafia_bot_api_outcomes_total{{method="{api_method}",outcome="{outcome}"}} {getattr(stats, outcome)}')
+        lines.append("# HELP mafia_bot_api_response_bytes_total Bytes received from the Bot API by method.")
+        lines.append("# TYPE mafia_bot_api_response_bytes_total counter")
+        for api_method, stats in sorted(self.methods.items()):
+            lines.append(f'mafia_bot_api_response_bytes_total{{method="{api_method}"}} {stats.response_bytes}')
+        lines.append("# HELP mafia_bot_api_calls_total Bot API calls by originating handler route and method.")
+        lines.append("# TYPE mafia_bot_api_calls_total counter")
+        for (route, api_method), count in sorted(self.by_route.items()):
+            lines.append(f'mafia_bot_api_calls_total{{route="{route}",method="{api_method}"}} {count}')
+        return lines
+
+
+tracker = ApiCallTracker()
+metrics.registry.add_collector(tracker.prometheus_lines)
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest that reports every Bot API call to the tracker."""
+
+    async def do_request(self, url, method, request_data=None, read_timeout=HTTPXRequest.DEFAULT_NONE,
+                         write_timeout=HTTPXRequest.DEFAULT_NONE, connect_timeout=HTTPXRequest.DEFAULT_NONE,
+                         pool_timeout=HTTPXRequest.DEFAULT_NONE):
+        api_method = url.rsplit("/", 1)[-1]
+        start = time.perf_counter()
+        try:
+            status, payload = await super().do_request(
+                url, method, request_data=request_data, read_timeout=read_timeout,
+                write_timeout=write_timeout, connect_timeout=connect_timeout, pool_timeout=pool_timeout
+            )
+        except TimedOut:
+            tracker.record(api_method, time.perf_counter() - start, timed_out=True)
+            raise
+        except Exception:
+            tracker.record(api_method, time.perf_counter() - start)
+            raise
+        tracker.record(api_method, time.perf_counter() - start, status, payload)
+        return status, payload
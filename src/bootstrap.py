@@ -0,0 +1,20 @@
+import logging
+from src import config, db, roles
+
+logger = logging.getLogger("Mafia Bot Bootstrap")
+
+
+def bootstrap(restore_sessions: bool = True) -> None:
+    """
+    Loads what the bot needs before it takes updates, in dependency order: the settings in
+    token.txt, the database schema, the role catalog and templates, and the voting sessions in
+    progress. Importing the modules does none of this, so tools and tests only pay for what they use.
+    """
+    config.load_config()
+    db.initialize_database()
+    roles.load()
+    if restore_sessions:
+        # Rebuild voting sessions that were in progress when the bot last stopped
+        from src.handlers.game_management.voting import restore_voting_sessions
+        restore_voting_sessions()
+    logger.debug("Bootstrap complete.")
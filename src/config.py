@@ -1,3 +1,4 @@
+import functools
 import os
 import sys
 from src.utils import resource_path
@@ -5,6 +6,9 @@ import logging
 
 logger = logging.getLogger("Mafia Bot Config")
 
+# Settings read from token.txt, in the order of its lines
+SETTINGS = ('TOKEN', 'RANDOM_ORG_API_KEY', 'MAINTAINER_ID')
+
 def read_tokens():
     try:
         with open(resource_path(os.path.join('data','token.txt')), 'r') as file:
@@ -20,4 +24,13 @@ def read_tokens():
         logger.error("token.txt not found.")
         exit(1)
 
-TOKEN, RANDOM_ORG_API_KEY, MAINTAINER_ID = read_tokens()
\ No newline at end of file
+@functools.lru_cache(maxsize=None)
+def load_config():
+    """Reads token.txt on first use; later calls return the same values."""
+    return dict(zip(SETTINGS, read_tokens()))
+
+def __getattr__(name):
+    # Importing this module reads nothing; token.txt is read when a setting is first used
+    if name in SETTINGS:
+        return load_config()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,12 +1,13 @@
 import sqlite3
 from src.utils import resource_path
+from src.sql_profiler import ProfilingCursor
 import logging
 import os
 
 logger = logging.getLogger("Mafia Bot DB")
 
 conn = sqlite3.connect(resource_path(os.path.join('db', 'mafia_game.db')), check_same_thread=False)
-cursor = conn.cursor()
+cursor = conn.cursor(factory=ProfilingCursor)
 
 def initialize_database():
     logger.debug("Initializing the database and creating tables if they don't exist.")
@@ -91,6 +92,93 @@ def initialize_database():
     )
     ''')
     
+    # Create ActiveGames table (the game each user is currently working with)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS ActiveGames (
+        user_id INTEGER PRIMARY KEY,
+        game_id TEXT,
+        FOREIGN KEY (user_id) REFERENCES Users(user_id),
+        FOREIGN KEY (game_id) REFERENCES Games(game_id)
+    )
+    ''')
+
+    # Create UserData table (persisted context.user_data, stored as JSON)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS UserData (
+        user_id INTEGER PRIMARY KEY,
+        data TEXT NOT NULL,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # Create VotingSessions table (one row per ongoing voting session)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS VotingSessions (
+        game_id TEXT PRIMARY KEY,
+        anonymous INTEGER DEFAULT 0,
+        player_ids TEXT,
+        player_names TEXT,
+        permissions TEXT,
+        voting_open INTEGER DEFAULT 0,
+        summary_message_id INTEGER,
+        permissions_message_id INTEGER,
+        group_chat_id INTEGER,
+        group_message_id INTEGER,
+        poll_voting INTEGER DEFAULT 0,
+        deadline_minutes INTEGER DEFAULT 0,
+        deadline REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (game_id) REFERENCES Games(game_id)
+    )
+    ''')
+
+    # Create VotingEvents table (append-only log of vote actions, replayed on startup)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS VotingEvents (
+        event_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        game_id TEXT,
+        voter_id INTEGER,
+        event TEXT,
+        target_id INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (game_id) REFERENCES VotingSessions(game_id)
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_voting_events_game ON VotingEvents (game_id, event_id)")
+
+    # Create GroupChats table (the Telegram group a game's open votes are held in)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS GroupChats (
+        chat_id INTEGER PRIMARY KEY,
+        game_id TEXT UNIQUE,
+        bound_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (game_id) REFERENCES Games(game_id)
+    )
+    ''')
+
+    # Create VotingPolls table (the Telegram poll each voter answers in a poll-based vote)
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS VotingPolls (
+        poll_id TEXT PRIMARY KEY,
+        game_id TEXT,
+        voter_id INTEGER,
+        message_id INTEGER,
+        targets TEXT,
+        FOREIGN KEY (game_id) REFERENCES VotingSessions(game_id)
+    )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_voting_polls_game ON VotingPolls (game_id)")
+
+    # Ensure the group, poll and deadline columns exist in VotingSessions table
+    cursor.execute("PRAGMA table_info(VotingSessions)")
+    columns = [info[1] for info in cursor.fetchall()]
+    for column, definition in (('group_chat_id', 'INTEGER'), ('group_message_id', 'INTEGER'),
+                               ('poll_voting', 'INTEGER DEFAULT 0'), ('deadline_minutes', 'INTEGER DEFAULT 0'),
+                               ('deadline', 'REAL')):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE VotingSessions ADD COLUMN {column} {definition}")
+            logger.debug("Added '%s' column to VotingSessions table.", column)
+
     # Ensure the 'eliminated' column exists in Roles table
     cursor.execute("PRAGMA table_info(Roles)")
     columns = [info[1] for info in cursor.fetchall()]
@@ -0,0 +1,204 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+import zlib
+from telegram import Bot, Update
+from telegram.error import NetworkError, RetryAfter
+from telegram.ext import Application, TypeHandler
+from src import config
+from src.api_metrics import InstrumentedRequest, CONNECTION_POOL_SIZE
+from src.db import cursor
+from src.loop_monitor import monitor
+from src.metrics import start_metrics_server
+from src.persistence import SQLitePersistence
+import src.roles as roles
+
+logger = logging.getLogger("Mafia Bot Dispatcher")
+
+# Callback data prefixes whose last "_"-separated part is the game_id
+GAME_ID_CALLBACK_PREFIXES = ("final_confirm_vote_", "cancel_vote_", "gvote_", "gconfirm_", "night_", "nightskip_")
+
+# Seconds to wait before polling again after a network error
+POLL_RETRY_DELAY = 5
+
+# Seconds between checks whether another worker rewrote role_templates.json
+TEMPLATES_CHECK_INTERVAL = 5.0
+
+# time.monotonic() of this worker's last check of role_templates.json
+templates_checked_at = float('-inf')
+
+
+def worker_index(routing_key: str, workers: int) -> int:
+    """Maps a routing key to a worker. Stable across processes and restarts, unlike hash()."""
+    return zlib.crc32(routing_key.encode()) % workers
+
+
+def get_active_game(user_id: int):
+    cursor.execute("SELECT game_id FROM ActiveGames WHERE user_id = ?", (user_id,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+
+def resolve_routing_key(update: Update) -> str:
+    """
+    Returns the key an update is routed by: the game it belongs to if one is known,
+    otherwise the user who sent it (e.g. before they create or join a game).
+    """
+    query = update.callback_query
+    if query and query.data and query.data.startswith(GAME_ID_CALLBACK_PREFIXES):
+        return f"game:{query.data.split('_')[-1]}"
+
+    user = update.effective_user
+    if not user:
+        return "global"
+
+    game_id = get_active_game(user.id)
+    if game_id:
+        return f"game:{game_id}"
+    return f"user:{user.id}"
+
+
+async def sync_worker_state(update: Update, context, owns_game=None) -> None:
+    """
+    Runs before every handler in a worker process. user_data is local to each worker, so the
+    user's current game is taken from the DB, which is the state shared by all workers.
+
+    The DB is only read when user_data holds no game, or when its game is not routed to this
+    worker: the update was then routed here by another game, so the user's game has changed.
+    Without owns_game the game is always read.
+    """
+    global templates_checked_at
+    now = time.monotonic()
+    if now - templates_checked_at >= TEMPLATES_CHECK_INTERVAL:
+        templates_checked_at = now
+        roles.reload_role_templates_if_changed()
+    if not update.effective_user:
+        return
+    game_id = context.user_data.get('game_id')
+    if game_id and owns_game is not None and owns_game(game_id):
+        return
+    game_id = get_active_game(update.effective_user.id)
+    if game_id and context.user_data.get('game_id') != game_id:
+        logger.debug("Worker synced game_id %s for user %s", game_id, update.effective_user.id)
+        context.user_data['game_id'] = game_id
+
+
+async def _run_worker(index: int, workers: int, token: str, update_queue, configure, metrics_port: int = 0,
+                      base_url: str = None) -> None:
+    # Load settings and role data before the first update rather than while handling it
+    config.load_config()
+    roles.load()
+
+    # Only restore the voting sessions of games routed to this worker
+    from src.handlers.game_management.voting import restore_voting_sessions
+    from src.handlers.game_management.voting_deadline import schedule_restored_deadlines
+    owns_game = lambda game_id: worker_index(f"game:{game_id}", workers) == index
+    restore_voting_sessions(owns_game)
+
+    # Workers share the UserData table, so each re-reads a user's row before handling their update
+    persistence = SQLitePersistence(refresh_from_db=True)
+    builder = (
+        Application.builder()
+        .token(token)
+        .updater(None)
+        .persistence(persistence)
+        .request(InstrumentedRequest(connection_pool_size=CONNECTION_POOL_SIZE))
+    )
+    if base_url:
+        builder.base_url(base_url)
+    application = builder.build()
+    configure(application)
+    application.add_handler(TypeHandler(Update, functools.partial(sync_worker_state, owns_game=owns_game)), group=-1)
+
+    loop = asyncio.get_running_loop()
+    async with application:
+        await application.start()
+        await monitor.start()
+        schedule_restored_deadlines(application.job_queue)
+        if metrics_port:
+            await start_metrics_server(metrics_port + index)
+        logger.info("Worker %s started.", index)
+        while True:
+            data = await loop.run_in_executor(None, update_queue.get)
+            if data is None:
+                break
+            await application.update_queue.put(Update.de_json(data, application.bot))
+        monitor.stop()
+        await application.stop()
+    logger.info("Worker %s stopped.", index)
+
+
+def _worker_main(index: int, workers: int, token: str, update_queue, templates_lock, configure, setup_logging,
+                 metrics_port: int = 0, base_url: str = None) -> None:
+    setup_logging()
+    roles.templates_lock = templates_lock
+    try:
+        asyncio.run(_run_worker(index, workers, token, update_queue, configure, metrics_port, base_url))
+    except KeyboardInterrupt:
+        pass
+
+
+async def _poll_and_route(token: str, queues: list, base_url: str = None) -> None:
+    bot = Bot(token, base_url=base_url) if base_url else Bot(token)
+    async with bot:
+        await bot.delete_webhook()
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=Update.ALL_TYPES)
+            except RetryAfter as e:
+                await asyncio.sleep(e.retry_after)
+                continue
+            except NetworkError as e:
+                logger.error("Failed to fetch updates: %s", e)
+                await asyncio.sleep(POLL_RETRY_DELAY)
+                continue
+
+            for update in updates:
+                offset = update.update_id + 1
+                routing_key = resolve_routing_key(update)
+                index = worker_index(routing_key, len(queues))
+                logger.debug("Routing update %s (%s) to worker %s", update.update_id, routing_key, index)
+                queues[index].put(update.to_dict())
+
+
+def run_dispatcher(token: str, workers: int, configure, setup_logging, metrics_port: int = 0,
+                   base_url: str = None) -> None:
+    """
+    Runs a front dispatcher that long-polls Telegram and hands each update to one of
+    `workers` processes. Updates of the same game always reach the same worker, so the
+    in-memory voting data and per-game locks of that worker stay authoritative.
+
+    :param configure: Module-level function that registers handlers on a worker's Application.
+    :param setup_logging: Module-level function that configures logging in a worker.
+    :param metrics_port: If set, worker N serves its metrics on metrics_port + N.
+    :param base_url: Bot API base URL, if not Telegram's.
+    """
+    # Spawn rather than fork, so each worker opens its own SQLite connection
+    mp_context = multiprocessing.get_context("spawn")
+    templates_lock = mp_context.Lock()
+    queues = [mp_context.Queue() for _ in range(workers)]
+    processes = [
+        mp_context.Process(
+            target=_worker_main,
+            args=(index, workers, token, queues[index], templates_lock, configure, setup_logging, metrics_port, base_url),
+            name=f"mafia-bot-worker-{index}",
+            daemon=True
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    logger.info("Dispatcher started with %s workers.", workers)
+
+    try:
+        asyncio.run(_poll_and_route(token, queues, base_url))
+    except KeyboardInterrupt:
+        logger.info("Dispatcher shutting down.")
+    finally:
+        for update_queue in queues:
+            update_queue.put(None)
+        for process in processes:
+            process.join(timeout=10)
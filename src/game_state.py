@@ -0,0 +1,68 @@
+from collections import OrderedDict
+import logging
+
+logger = logging.getLogger("Mafia Bot GameState")
+
+# Upper bounds on cached renders and on remembered message contents
+MAX_RENDERED_VIEWS = 4096
+MAX_TRACKED_MESSAGES = 10000
+
+
+class GameStateVersions:
+    """
+    Monotonically increasing versions of each game's state, per aspect: 'roles' (the role counts
+    being set up) and 'votes' (the open voting session).
+
+    Writers bump the aspect they change. Views are rendered once per (view, version), and a
+    message is only edited when it does not show that version or the same content already, so
+    unchanged content never costs a "message is not modified" round trip.
+    """
+
+    def __init__(self, max_rendered: int = MAX_RENDERED_VIEWS, max_messages: int = MAX_TRACKED_MESSAGES):
+        self.max_rendered = max_rendered
+        self.max_messages = max_messages
+        self._versions = {}  # (game_id, aspect) -> version
+        self._rendered = OrderedDict()  # (game_id, view) -> (version, rendered), least recently used first
+        self._shown = OrderedDict()  # (chat_id, message_id) -> ((game_id, view, version), content)
+
+    def version(self, game_id: str, aspect: str) -> int:
+        return self._versions.get((game_id, aspect), 0)
+
+    def bump(self, game_id: str, aspect: str) -> int:
+        version = self._versions.get((game_id, aspect), 0) + 1
+        self._versions[(game_id, aspect)] = version
+        return version
+
+    def rendered(self, game_id: str, view: str, version: int):
+        """The view rendered at this version, or None."""
+        cached = self._rendered.get((game_id, view))
+        if cached is None or cached[0] != version:
+            return None
+        self._rendered.move_to_end((game_id, view))
+        return cached[1]
+
+    def store_rendered(self, game_id: str, view: str, version: int, rendered):
+        self._rendered[(game_id, view)] = (version, rendered)
+        self._rendered.move_to_end((game_id, view))
+        while len(self._rendered) > self.max_rendered:
+            self._rendered.popitem(last=False)
+        return rendered
+
+    def is_shown(self, chat_id: int, message_id: int, game_id: str, view: str, version: int, content=None) -> bool:
+        """
+        True if the message already shows this version of the game's view, or exactly this content.
+        Versions are per game, so the same message showing another game's view never matches.
+        """
+        shown = self._shown.get((chat_id, message_id))
+        if shown is None:
+            return False
+        return shown[0] == (game_id, view, version) or (content is not None and shown[1] == content)
+
+    def mark_shown(self, chat_id: int, message_id: int, game_id: str, view: str, version: int, content=None) -> None:
+        self._shown[(chat_id, message_id)] = ((game_id, view, version), content)
+        self._shown.move_to_end((chat_id, message_id))
+        while len(self._shown) > self.max_messages:
+            self._shown.popitem(last=False)
+
+
+versions = GameStateVersions()
@@ -1,13 +1,51 @@
-from .button_handler import (
-    button_handler,
-    final_confirm_vote_handler,
-    cancel_vote_handler,
-    handle_button,
-    show_manage_games_menu,
-    handle_maintainer_confirmation
-)
-from .passcode_handler import passcode_handler, handle_passcode, handle_template_confirmation, save_template_as_pending, is_valid_passcode
-from .start_handler import start_handler, start
+import importlib
+
+# Submodule each exported name is defined in. A submodule is only imported when one of its names is
+# first used, so importing e.g. src.handlers.dedup_handler does not pull in every other handler.
+# Names shared with a submodule (button_handler, passcode_handler, start_handler, dedup_handler) are
+# best imported from that submodule, since importing it directly binds the package attribute to it.
+_EXPORTS = {
+    ".button_handler": (
+        "button_handler",
+        "final_confirm_vote_handler",
+        "cancel_vote_handler",
+        "handle_button",
+        "show_manage_games_menu",
+        "handle_maintainer_confirmation",
+    ),
+    ".passcode_handler": (
+        "passcode_handler",
+        "handle_passcode",
+        "handle_template_confirmation",
+        "save_template_as_pending",
+        "is_valid_passcode",
+    ),
+    ".start_handler": ("start_handler", "start"),
+    ".game_management.group_voting": (
+        "bind_group_handler",
+        "unbind_group_handler",
+        "group_vote_handler",
+        "group_confirm_vote_handler",
+    ),
+    ".game_management.poll_voting": ("poll_answer_handler",),
+    ".game_management.night_phase": ("night_action_handler",),
+    ".dedup_handler": ("dedup_handler", "DEDUP_GROUP"),
+    ".maintainer_handler": (
+        "metrics_handler",
+        "metrics_command",
+        "sql_profile_handler",
+        "sql_profile_command",
+        "api_stats_handler",
+        "api_stats_command",
+        "loop_lag_handler",
+        "loop_lag_command",
+        "cpu_profile_handler",
+        "cpu_profile_command",
+        "memory_profile_handler",
+        "memory_profile_command",
+    ),
+}
+_SUBMODULE_OF = {name: submodule for submodule, names in _EXPORTS.items() for name in names}
 
 __all__ = [
     "button_handler",
@@ -22,5 +60,34 @@ __all__ = [
     "save_template_as_pending",
     "is_valid_passcode",
     "start_handler",
-    "start"
-]
\ No newline at end of file
+    "start",
+    "bind_group_handler",
+    "unbind_group_handler",
+    "group_vote_handler",
+    "group_confirm_vote_handler",
+    "poll_answer_handler",
+    "night_action_handler",
+    "dedup_handler",
+    "DEDUP_GROUP",
+    "metrics_handler",
+    "metrics_command",
+    "sql_profile_handler",
+    "sql_profile_command",
+    "api_stats_handler",
+    "api_stats_command",
+    "loop_lag_handler",
+    "loop_lag_command",
+    "cpu_profile_handler",
+    "cpu_profile_command",
+    "memory_profile_handler",
+    "memory_profile_command"
+]
+
+
+def __getattr__(name):
+    submodule = _SUBMODULE_OF.get(name)
+    if submodule is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(submodule, __name__), name)
+    globals()[name] = value
+    return value
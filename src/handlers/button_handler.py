@@ -2,7 +2,7 @@ from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import CallbackQueryHandler, ContextTypes
 import logging
 from src.db import conn, cursor
-from src.roles import available_roles, role_descriptions, role_templates, pending_templates, save_role_templates
+from src import roles
 
 from src.handlers.game_management import (get_random_shuffle, get_player_count, get_templates_for_player_count,
                                           create_game, join_game, eliminate_player, handle_elimination_confirmation,
@@ -17,7 +17,9 @@ from src.handlers.game_management import (get_random_shuffle, get_player_count,
 
 from src.handlers.start_handler import start
 
-from src.config import MAINTAINER_ID
+from src import config
+from src.game_state import versions
+from src.metrics import instrumented, route_for_callback
 import asyncio
 import json
 
@@ -26,6 +28,7 @@ logger = logging.getLogger("Mafia Bot ButtonHandler")
 # Initialize a dictionary to store locks for each game
 game_locks = {}
 
+@instrumented(lambda update, context: f"button:{route_for_callback(update.callback_query.data)}")
 async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.debug("Handling a button press.")
     query = update.callback_query
@@ -65,13 +68,14 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
         async with game_lock:
             cursor.execute("DELETE FROM GameRoles WHERE game_id = ?", (game_id,))
             # Initialize role counts to 0 for all roles
-            for role in available_roles:
+            for role in roles.available_roles:
                 cursor.execute(
                     "INSERT INTO GameRoles (game_id, role, count) VALUES (?, ?, 0) "
                     "ON CONFLICT(game_id, role) DO UPDATE SET count=0",
                     (game_id, role)
                 )
             conn.commit()
+            versions.bump(game_id, 'roles')
             context.user_data['current_page'] = 0
             await show_role_buttons(update, context, message_id)
 
@@ -139,17 +143,19 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
         if data == "start_game_manage_games":
             await start_latest_game(update, context)
 
-        elif data == "send_mafia_message":
-            await context.bot.send_message(chat_id=update.effective_chat.id, text="Send message to Mafia functionality is not implemented yet.")
-
-        elif data == "send_villagers_message":
-            await context.bot.send_message(chat_id=update.effective_chat.id, text="Send message to Villagers functionality is not implemented yet.")
-
-        elif data == "send_independents_message":
-            await context.bot.send_message(chat_id=update.effective_chat.id, text="Send message to Independents functionality is not implemented yet.")
-
         else:
-            await context.bot.send_message(chat_id=update.effective_chat.id, text="The functionality has not been implemented yet.")
+            if not game_id:
+                await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
+                return
+            # Check moderator
+            cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
+            result = cursor.fetchone()
+            if not result or result[0] != user_id:
+                await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to message factions.")
+                return
+
+            from src.handlers.game_management.faction_index import FACTION_BUTTONS, prompt_faction_message
+            await prompt_faction_message(update, context, game_id, FACTION_BUTTONS[data])
 
     elif data.startswith("vote_"):
         target_id = int(data.split("_")[1])
@@ -196,7 +202,7 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
 
     elif data.startswith("template_"):
         template_name = data.split("template_", 1)[1]
-        logger.debug(f"Template selected: {template_name}")
+        logger.debug("Template selected: %s", template_name)
         if not game_id:
             await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
             return
@@ -221,14 +227,15 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
                 DO UPDATE SET count=excluded.count
                 """, (game_id, role, count))
             conn.commit()
+            versions.bump(game_id, 'roles')
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Template '{template_name}' has been applied.")
         # Refresh the role buttons to reflect the new counts
         await show_role_buttons(update, context, message_id)
 
     elif data.startswith("increase_"):
         role = data.split("_", 1)[1]
-        logger.debug(f"Increase button pressed for role: {role}")
-        if role not in available_roles:
+        logger.debug("Increase button pressed for role: %s", role)
+        if role not in roles.available_roles:
             await context.bot.send_message(chat_id=update.effective_chat.id, text="Invalid role.")
             return
         if not game_id:
@@ -245,12 +252,13 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
                 (game_id, role)
             )
             conn.commit()
+            versions.bump(game_id, 'roles')
         await show_role_buttons(update, context, message_id)
 
     elif data.startswith("decrease_"):
         role = data.split("_", 1)[1]
-        logger.debug(f"Decrease button pressed for role: {role}")
-        if role not in available_roles:
+        logger.debug("Decrease button pressed for role: %s", role)
+        if role not in roles.available_roles:
             await context.bot.send_message(chat_id=update.effective_chat.id, text="Invalid role.")
             return
         if not game_id:
@@ -269,9 +277,10 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
                     "UPDATE GameRoles SET count = count - 1 WHERE game_id = ? AND role = ?",
                     (game_id, role)
                 )
-                logger.debug(f"Role count for {role} decreased to {current_count - 1}")
+                logger.debug("Role count for %s decreased to %s", role, current_count - 1)
+                versions.bump(game_id, 'roles')
             else:
-                logger.debug(f"Role count for {role} is already 0. Cannot decrease further.")
+                logger.debug("Role count for %s is already 0. Cannot decrease further.", role)
             conn.commit()
         await show_role_buttons(update, context, message_id)
 
@@ -402,10 +411,49 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
         from src.handlers.game_management.voting import prompt_voting_permissions
         await prompt_voting_permissions(update, context, game_id, anonymous=True)
 
+    elif data == "announce_poll_voting":
+        logger.debug("Announce Anonymous Poll voting button pressed.")
+        # Anonymous voting where every voter answers a Telegram poll
+        game_id = context.user_data.get('game_id')
+        if not game_id:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
+            return
+        # Check moderator
+        cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
+        result = cursor.fetchone()
+        if not result or result[0] != user_id:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to announce anonymous voting.")
+            return
+
+        from src.handlers.game_management.voting import prompt_voting_permissions
+        await prompt_voting_permissions(update, context, game_id, anonymous=True, use_polls=True)
+
     elif data.startswith("toggle_can_vote_") or data.startswith("toggle_can_be_voted_"):
         from src.handlers.game_management.voting import handle_voting_permission_toggle
         await handle_voting_permission_toggle(update, context)
 
+    elif data in ("start_night", "resolve_night"):
+        logger.debug("%s button pressed.", data)
+        if not game_id:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
+            return
+        # Check moderator
+        cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
+        result = cursor.fetchone()
+        if not result or result[0] != user_id:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to run the night.")
+            return
+
+        from src.handlers.game_management.night_phase import start_night, resolve_night
+        if data == "start_night":
+            await start_night(update, context, game_id)
+        else:
+            await resolve_night(context, game_id)
+
+    elif data == "cycle_voting_deadline":
+        from src.handlers.game_management.voting_deadline import cycle_voting_deadline
+        await cycle_voting_deadline(update, context)
+
     elif data == "confirm_permissions":
         from src.handlers.game_management.voting import confirm_permissions
         await confirm_permissions(update, context)
@@ -442,28 +490,31 @@ async def handle_button(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Unknown action.")
 
 
+# The Manage Games menu never changes, so it is built once and shared by every moderator
+MANAGE_GAMES_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Start Game", callback_data="start_game_manage_games")],
+    [InlineKeyboardButton("Announce voting", callback_data="announce_voting")],
+    [InlineKeyboardButton("Announce Anonymous voting", callback_data="announce_anonymous_voting")],
+    [InlineKeyboardButton("Announce Anonymous voting (Poll)", callback_data="announce_poll_voting")],
+    [InlineKeyboardButton("Start Night", callback_data="start_night")],
+    [InlineKeyboardButton("Send message to Mafia", callback_data="send_mafia_message")],
+    [InlineKeyboardButton("Send message to Villagers", callback_data="send_villagers_message")],
+    [InlineKeyboardButton("Send message to Independents", callback_data="send_independents_message")],
+    [InlineKeyboardButton("Eliminate Player", callback_data="eliminate_player")],
+    [InlineKeyboardButton("Revive Player", callback_data="revive_player")],
+    [InlineKeyboardButton("Inquiry (Summary)", callback_data="inquiry_summary")],
+    [InlineKeyboardButton("Inquiry (Detailed)", callback_data="inquiry_detailed")],
+    [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")],
+])
+
 async def show_manage_games_menu(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE):
     logger.debug("Showing Manage Games menu.")
-    keyboard = [
-        [InlineKeyboardButton("Start Game", callback_data="start_game_manage_games")],
-        [InlineKeyboardButton("Announce voting", callback_data="announce_voting")],
-        [InlineKeyboardButton("Announce Anonymous voting", callback_data="announce_anonymous_voting")],
-        [InlineKeyboardButton("Send message to Mafia", callback_data="send_mafia_message")],
-        [InlineKeyboardButton("Send message to Villagers", callback_data="send_villagers_message")],
-        [InlineKeyboardButton("Send message to Independents", callback_data="send_independents_message")],
-        [InlineKeyboardButton("Eliminate Player", callback_data="eliminate_player")],
-        [InlineKeyboardButton("Revive Player", callback_data="revive_player")],
-        [InlineKeyboardButton("Inquiry (Summary)", callback_data="inquiry_summary")],
-        [InlineKeyboardButton("Inquiry (Detailed)", callback_data="inquiry_detailed")],
-        [InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await context.bot.send_message(chat_id=update.effective_chat.id, text="Manage Games:", reply_markup=reply_markup)
+    await context.bot.send_message(chat_id=update.effective_chat.id, text="Manage Games:", reply_markup=MANAGE_GAMES_MENU)
 
 
 async def handle_maintainer_confirmation(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, template_name_with_count: str, confirm: bool) -> None:
     user_id = update.effective_user.id
-    if str(user_id) != str(MAINTAINER_ID):
+    if str(user_id) != str(config.MAINTAINER_ID):
         await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
         return
 
@@ -476,28 +527,28 @@ async def handle_maintainer_confirmation(update: ContextTypes.DEFAULT_TYPE, cont
     player_count = player_count.strip()
 
     # Find and remove the template from pending_templates
-    if player_count not in pending_templates:
+    if player_count not in roles.pending_templates:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No pending templates found for this player count.")
         return
 
-    template = next((t for t in pending_templates[player_count] if t['name'] == template_name_with_count), None)
+    template = next((t for t in roles.pending_templates[player_count] if t['name'] == template_name_with_count), None)
     if not template:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Template not found in pending templates.")
         return
 
-    pending_templates[player_count].remove(template)
+    roles.pending_templates[player_count].remove(template)
 
     if confirm:
         # Add to active templates
-        if player_count not in role_templates:
-            role_templates[player_count] = []
-        role_templates[player_count].append(template)
+        if player_count not in roles.role_templates:
+            roles.role_templates[player_count] = []
+        roles.role_templates[player_count].append(template)
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Template '{template_name_with_count}' has been confirmed and added to active templates.")
     else:
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Template '{template_name_with_count}' has been rejected.")
 
     # Save the updated templates
-    save_role_templates(role_templates, pending_templates)
+    roles.save_role_templates(roles.role_templates, roles.pending_templates)
 
 # Create the handler instance
 button_handler = CallbackQueryHandler(handle_button)
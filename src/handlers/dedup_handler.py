@@ -0,0 +1,94 @@
+from collections import OrderedDict
+from telegram.error import TelegramError
+from telegram.ext import ApplicationHandlerStop, CallbackQueryHandler, ContextTypes
+import logging
+import time
+
+logger = logging.getLogger("Mafia Bot DedupHandler")
+
+# Seconds within which a redelivered callback query (same query id), or a repeated tap of the
+# same one-shot button (e.g. "Final Confirm") by the same user, is dropped. Updates are handled
+# one at a time, so the second tap is only checked once the first one's round trips are done.
+DUPLICATE_WINDOW = 1.0
+
+# The role count buttons are pressed several times on purpose, but a double tap within this
+# many seconds counts once
+COUNTER_TAP_WINDOW = 0.3
+COUNTER_CALLBACK_PREFIXES = ("increase_", "decrease_")
+
+# Toggles whose immediate second press undoes the first, and paging. Only redeliveries are dropped.
+TOGGLE_CALLBACK_PREFIXES = (
+    "vote_", "gvote_", "toggle_can_vote_", "toggle_can_be_voted_", "cycle_voting_deadline",
+    "next_page", "prev_page",
+)
+
+# Upper bound on remembered queries and taps, in case of a burst larger than one window
+MAX_TRACKED_TAPS = 10000
+
+# Handler group of dedup_handler; runs before every other handler
+DEDUP_GROUP = -2
+
+
+class CallbackDeduplicator:
+    """Remembers recent callback queries by their id, and recent taps by (user, message, data)."""
+
+    def __init__(self, window: float = DUPLICATE_WINDOW, counter_window: float = COUNTER_TAP_WINDOW,
+                 max_entries: int = MAX_TRACKED_TAPS):
+        self.window = window
+        self.counter_window = counter_window
+        self.max_entries = max_entries
+        # Each maps a key to the time it was first seen, oldest first
+        self._ids = OrderedDict()  # query_id
+        self._taps = OrderedDict()  # (user_id, message_id, data) of one-shot buttons
+        self._counter_taps = OrderedDict()  # (user_id, message_id, data) of role count buttons
+
+    def is_duplicate(self, query_id: str, user_id: int, message_id, data: str, now: float = None) -> bool:
+        now = time.monotonic() if now is None else now
+        self._expire(self._ids, self.window, now)
+        self._expire(self._taps, self.window, now)
+        self._expire(self._counter_taps, self.counter_window, now)
+        if query_id in self._ids:
+            return True
+        self._remember(self._ids, query_id, now)
+        data = data or ""
+        if data.startswith(TOGGLE_CALLBACK_PREFIXES):
+            return False
+        taps = self._counter_taps if data.startswith(COUNTER_CALLBACK_PREFIXES) else self._taps
+        tap = (user_id, message_id, data)
+        if tap in taps:
+            return True
+        self._remember(taps, tap, now)
+        return False
+
+    def _remember(self, seen: OrderedDict, key, now: float) -> None:
+        seen[key] = now
+        while len(seen) > self.max_entries:
+            seen.popitem(last=False)
+
+    @staticmethod
+    def _expire(seen: OrderedDict, window: float, now: float) -> None:
+        while seen:
+            key, seen_at = next(iter(seen.items()))
+            if now - seen_at < window:
+                break
+            del seen[key]
+
+
+deduplicator = CallbackDeduplicator()
+
+
+async def drop_duplicate_callback(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stops processing of repeated taps before any DB or Telegram work is done for them."""
+    query = update.callback_query
+    message_id = query.message.message_id if query.message else query.inline_message_id
+    if deduplicator.is_duplicate(query.id, update.effective_user.id, message_id, query.data):
+        logger.debug("Dropped duplicate callback '%s' from user %s", query.data, update.effective_user.id)
+        # Stop the client's spinner; a redelivered query may already have been answered
+        try:
+            await query.answer()
+        except TelegramError as e:
+            logger.debug("Could not answer duplicate callback: %s", e)
+        raise ApplicationHandlerStop
+
+# Create the handler instance
+dedup_handler = CallbackQueryHandler(drop_duplicate_callback)
@@ -14,7 +14,12 @@ from .voting import (
     send_voting_summary,
     process_voting_results
 )
-from .inquiry import send_inquiry_summary, send_detailed_inquiry_summary
+from .inquiry import send_inquiry_summary, send_detailed_inquiry_summary, build_inquiry_counters, update_inquiry_counters
+from .group_voting import bind_group, unbind_group, handle_group_vote, confirm_group_vote, post_group_voting
+from .poll_voting import send_voting_polls, handle_poll_answer
+from .faction_index import build_faction_index, invalidate_faction_index, send_faction_message
+from .night_phase import start_night, resolve_night, handle_night_action
+from .voting_deadline import schedule_voting_deadline, cancel_voting_deadline, cycle_voting_deadline
 
 __all__ = [
     "get_random_shuffle",
@@ -44,5 +49,23 @@ __all__ = [
     "send_voting_summary",
     "process_voting_results",
     "send_inquiry_summary",
-    "send_detailed_inquiry_summary"
+    "send_detailed_inquiry_summary",
+    "bind_group",
+    "unbind_group",
+    "handle_group_vote",
+    "confirm_group_vote",
+    "post_group_voting",
+    "send_voting_polls",
+    "handle_poll_answer",
+    "schedule_voting_deadline",
+    "cancel_voting_deadline",
+    "cycle_voting_deadline",
+    "start_night",
+    "resolve_night",
+    "handle_night_action",
+    "build_faction_index",
+    "invalidate_faction_index",
+    "send_faction_message",
+    "build_inquiry_counters",
+    "update_inquiry_counters"
 ]
\ No newline at end of file
@@ -5,13 +5,14 @@ import logging
 import uuid
 import asyncio
 import random
-import aiohttp
 from src.db import conn, cursor
-from src.roles import available_roles, role_descriptions, role_templates, role_factions
-from src.utils import resource_path, generate_voting_summary  
-from src.config import RANDOM_ORG_API_KEY
+from src import roles
+from src.utils import resource_path, generate_voting_summary, lazy_import
 import json
 
+# Only needed when a Random.org key is configured; importing aiohttp takes longer than the rest of the bot
+aiohttp = lazy_import("aiohttp")
+
 logger = logging.getLogger("Mafia Bot GameManagement")
 
 # Initialize an asyncio lock for synchronization
@@ -48,7 +49,7 @@ async def get_random_shuffle(lst: list, api_key: str) -> list:
         async with aiohttp.ClientSession() as session:
             async with session.post('https://api.random.org/json-rpc/4/invoke', json=payload, headers=headers, timeout=10) as resp:
                 if resp.status != 200:
-                    logger.error(f"Random.org API returned non-200 status code: {resp.status}")
+                    logger.error("Random.org API returned non-200 status code: %s", resp.status)
                     return random.sample(lst, len(lst))  # Fallback to local shuffle
                 data = await resp.json()
                 if 'result' in data and 'random' in data['result'] and 'data' in data['result']['random']:
@@ -61,19 +62,19 @@ async def get_random_shuffle(lst: list, api_key: str) -> list:
                     shuffled_list = [lst[i - 1] for i in shuffle_sequence]
                     return shuffled_list
                 else:
-                    logger.error(f"Unexpected response format from Random.org: {data}")
+                    logger.error("Unexpected response format from Random.org: %s", data)
                     return random.sample(lst, len(lst))  # Fallback to local shuffle
     except Exception as e:
-        logger.error(f"Exception while fetching shuffle from Random.org: {e}")
+        logger.error("Exception while fetching shuffle from Random.org: %s", e)
         return random.sample(lst, len(lst))  # Fallback to local shuffle
 
 def get_player_count(game_id: int) -> int:
     cursor.execute("SELECT COUNT(*) FROM Roles WHERE game_id = ?", (game_id,))
     count = cursor.fetchone()[0]
-    logger.debug(f"Game ID {game_id} has {count} players.")
+    logger.debug("Game ID %s has %s players.", game_id, count)
     return count
 
 def get_templates_for_player_count(player_count: int) -> list:
-    templates = role_templates.get(str(player_count), [])
-    logger.debug(f"Templates for player count {player_count}: {templates}")
+    templates = roles.role_templates.get(str(player_count), [])
+    logger.debug("Templates for player count %s: %s", player_count, templates)
     return templates
\ No newline at end of file
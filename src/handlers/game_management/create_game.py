@@ -3,7 +3,7 @@ from telegram.ext import ContextTypes
 import logging
 import uuid
 from src.db import conn, cursor
-from src.roles import available_roles
+from src import roles
 from telegram.helpers import escape_markdown
 
 logger = logging.getLogger("Mafia Bot GameManagement.CreateGame")
@@ -17,24 +17,30 @@ async def create_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.D
     while attempts < max_attempts:
         # Generate a secure UUID-based passcode
         passcode = str(uuid.uuid4())
-        logger.debug(f"Generated passcode: {passcode}")
+        logger.debug("Generated passcode: %s", passcode)
 
         # Generate a unique game_id using UUID
         game_id = str(uuid.uuid4())
-        logger.debug(f"Generated game_id: {game_id}")
+        logger.debug("Generated game_id: %s", game_id)
 
         try:
             cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (game_id, passcode, user_id))
             # Initialize GameRoles with zero counts for all roles
-            for role in available_roles:
+            for role in roles.available_roles:
                 cursor.execute(
                     "INSERT INTO GameRoles (game_id, role, count) VALUES (?, ?, 0)",
                     (game_id, role)
                 )
+            # Remember the moderator's current game so updates can be routed to it
+            cursor.execute(
+                "INSERT INTO ActiveGames (user_id, game_id) VALUES (?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET game_id = excluded.game_id",
+                (user_id, game_id)
+            )
             conn.commit()
-            logger.debug(f"Game created with game_id: {game_id}, passcode: {passcode}, moderator_id: {user_id}")
+            logger.debug("Game created with game_id: %s, passcode: %s, moderator_id: %s", game_id, passcode, user_id)
             context.user_data['game_id'] = game_id  # Store game_id in user_data
-            logger.debug(f"Game created. game_id stored in user_data: {game_id}")
+            logger.debug("Game created. game_id stored in user_data: %s", game_id)
 
             message = f"Game created successfully!\nPasscode: {passcode}\nShare this passcode with players to join."
             safe_message = escape_markdown(message, version=2)
@@ -44,7 +50,7 @@ async def create_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.D
             await context.bot.send_message(chat_id=update.effective_chat.id, text=safe_passcode, parse_mode='MarkdownV2')
             return  # Exit the loop if game creation is successful
         except sqlite3.IntegrityError:
-            logger.error(f"Failed to create game due to game_id collision. Attempt {attempts + 1}/{max_attempts}")
+            logger.error("Failed to create game due to game_id collision. Attempt %s/%s", attempts + 1, max_attempts)
             attempts += 1
 
     # If the loop completes without creating a game
@@ -0,0 +1,102 @@
+from telegram.error import RetryAfter
+from telegram.ext import ContextTypes
+import asyncio
+import logging
+from src import roles
+from src.db import cursor
+
+logger = logging.getLogger("Mafia Bot GameManagement.FactionIndex")
+
+# Faction each "Send message to ..." button of the Manage Games menu addresses
+FACTION_BUTTONS = {
+    "send_mafia_message": "Mafia",
+    "send_villagers_message": "Villager",
+    "send_independents_message": "Independent",
+}
+
+# Sends started per second by a broadcast, below Telegram's limit of about 30 messages per second
+BROADCAST_RATE = 25
+
+# -------------------- Faction index --------------------
+# game_id -> {faction: {user_id: username}} of the alive players. Built from the roles handed out
+# at start_game, so a faction message needs neither a Roles scan nor a faction lookup per player.
+# Eliminations and revivals drop a game's index; the next faction message rebuilds it with one query.
+faction_indexes = {}
+
+def build_faction_index(game_id: str, players: list) -> dict:
+    """
+    :param players: List of (user_id, role, username) tuples of the alive players.
+    """
+    index = {}
+    for user_id, role, username in players:
+        index.setdefault(roles.role_factions.get(role, "Unknown"), {})[user_id] = username
+    faction_indexes[game_id] = index
+    logger.debug("Faction index of game %s built: %s", game_id, {faction: len(members) for faction, members in index.items()})
+    return index
+
+def invalidate_faction_index(game_id: str) -> None:
+    faction_indexes.pop(game_id, None)
+
+def get_faction_members(game_id: str, faction: str) -> dict:
+    """The alive members of a faction as {user_id: username}."""
+    index = faction_indexes.get(game_id)
+    if index is None:
+        cursor.execute("""
+        SELECT Roles.user_id, Roles.role, Users.username
+        FROM Roles
+        JOIN Users ON Roles.user_id = Users.user_id
+        WHERE Roles.game_id = ? AND Roles.eliminated = 0
+        """, (game_id,))
+        index = build_faction_index(game_id, cursor.fetchall())
+    return index.get(faction, {})
+
+async def broadcast(bot, chat_ids: list, text: str) -> list:
+    """
+    Sends text to all chats concurrently, starting at most BROADCAST_RATE sends per second.
+    Returns the chats the message could not be sent to.
+    """
+    async def send(position, chat_id):
+        await asyncio.sleep(position / BROADCAST_RATE)
+        for attempt in range(2):
+            try:
+                await bot.send_message(chat_id=chat_id, text=text)
+                return None
+            except RetryAfter as e:
+                if attempt:
+                    break
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                logger.error("Failed to send a broadcast to chat %s: %s", chat_id, e)
+                break
+        return chat_id
+
+    results = await asyncio.gather(*(send(position, chat_id) for position, chat_id in enumerate(chat_ids)))
+    return [chat_id for chat_id in results if chat_id is not None]
+
+async def prompt_faction_message(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, faction: str) -> None:
+    members = get_faction_members(game_id, faction)
+    if not members:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=f"No alive player is in the {faction} faction.")
+        return
+    context.user_data['action'] = "awaiting_faction_message"
+    context.user_data['message_faction'] = faction
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text=f"Type the message for the {faction} faction ({len(members)} player(s))."
+    )
+
+async def send_faction_message(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, text: str) -> None:
+    """The moderator's reply to prompt_faction_message: sends it to the faction's alive players."""
+    context.user_data['action'] = None
+    game_id = context.user_data.get('game_id')
+    faction = context.user_data.pop('message_faction', None)
+    if not game_id or not faction:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
+        return
+
+    members = get_faction_members(game_id, faction)
+    failed = await broadcast(context.bot, list(members), f"📨 Message from the moderator to the {faction} faction:\n\n{text}")
+    reply = f"Message sent to {len(members) - len(failed)} of {len(members)} {faction} player(s)."
+    if failed:
+        reply += f"\nFailed: {', '.join(members[user_id] for user_id in failed)}"
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=reply)
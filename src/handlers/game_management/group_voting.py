@@ -0,0 +1,192 @@
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.ext import CallbackQueryHandler, CommandHandler, ContextTypes, filters
+import logging
+from src.db import conn, cursor
+from src.metrics import instrumented, route_for_callback
+from .voting import game_voting_data, record_vote_event, save_voting_session, process_voting_results
+
+logger = logging.getLogger("Mafia Bot GameManagement.GroupVoting")
+
+# -------------------- Group chat mode --------------------
+# A game bound to a Telegram group holds its open votes on one shared message in that group:
+# every voter taps the same keyboard, which shows live counts, and the results are posted
+# once. Each round then costs O(1) messages instead of one per player. Anonymous votes still
+# use private messages.
+
+def group_voting_text(session) -> str:
+    waiting = [session.player_names[user_id] for user_id in session.player_ids if user_id in session.voters]
+    text = "📢 Voting Session\nTap the players you vote to eliminate, then confirm your vote.\n\n"
+    if waiting:
+        text += f"Waiting for: {', '.join(waiting)}"
+    else:
+        text += "Everyone has voted."
+    return text
+
+def group_voting_keyboard(session) -> InlineKeyboardMarkup:
+    # The game_id is the last part of the callback data, so the dispatcher can route group taps
+    keyboard = [
+        [InlineKeyboardButton(f"{name} ({session.votes_for(target_id)})",
+                              callback_data=f"gvote_{target_id}_{session.game_id}")]
+        for target_id, name in session.candidates()
+    ]
+    keyboard.append([InlineKeyboardButton("Confirm My Vote", callback_data=f"gconfirm_{session.game_id}")])
+    return InlineKeyboardMarkup(keyboard)
+
+def selection_text(session, voter_id: int) -> str:
+    selected = [session.player_names[target_id] for target_id in session.selected_targets(voter_id)]
+    if selected:
+        return f"Your votes: {', '.join(selected)}"
+    return "You have not voted for anyone."
+
+async def post_group_voting(context: ContextTypes.DEFAULT_TYPE, game_id: str) -> bool:
+    """Posts the shared voting message. Returns False if the group cannot be reached."""
+    session = game_voting_data[game_id]
+    try:
+        message = await context.bot.send_message(
+            chat_id=session.group_chat_id,
+            text=group_voting_text(session),
+            reply_markup=group_voting_keyboard(session)
+        )
+    except Exception as e:
+        logger.error("Failed to post the voting message to group %s: %s", session.group_chat_id, e)
+        # Fall back to voting in private messages
+        session.group_chat_id = None
+        save_voting_session(game_id)
+        return False
+    session.group_message_id = message.message_id
+    save_voting_session(game_id)
+    return True
+
+async def post_group_results(context: ContextTypes.DEFAULT_TYPE, session, safe_summary: str, safe_detailed_report: str) -> None:
+    """Closes the shared voting message and posts the results to the group in one message."""
+    try:
+        await context.bot.edit_message_text(
+            chat_id=session.group_chat_id,
+            message_id=session.group_message_id,
+            text="📢 Voting Session\nVoting has ended."
+        )
+    except Exception as e:
+        logger.error("Failed to close the voting message in group %s: %s", session.group_chat_id, e)
+    try:
+        await context.bot.send_message(
+            chat_id=session.group_chat_id,
+            text=f"{safe_summary}\n\n{safe_detailed_report}",
+            parse_mode='MarkdownV2'
+        )
+    except Exception as e:
+        logger.error("Failed to post the voting results to group %s: %s", session.group_chat_id, e)
+
+@instrumented(lambda update, context: f"button:{route_for_callback(update.callback_query.data)}")
+async def handle_group_vote(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    logger.debug("Handling a group vote.")
+    query = update.callback_query
+    voter_id = update.effective_user.id
+    _, target_id, game_id = query.data.split("_", 2)
+    target_id = int(target_id)
+
+    session = game_voting_data.get(game_id)
+    if session is None:
+        await query.answer("This voting session has ended.")
+        return
+    if voter_id not in session.voters:
+        await query.answer("You cannot vote in this session, or you have already confirmed your vote.")
+        return
+    if target_id not in session.can_be_voted:
+        await query.answer("This player cannot be voted.")
+        return
+
+    session.toggle(voter_id, target_id)
+    record_vote_event(game_id, voter_id, 'toggle', target_id)
+    # The voter's own selection is only shown to them, as a notification
+    await query.answer(selection_text(session, voter_id))
+
+    try:
+        await query.edit_message_reply_markup(reply_markup=group_voting_keyboard(session))
+    except Exception as e:
+        logger.error("Failed to edit group voting message: %s", e)
+
+@instrumented(lambda update, context: f"button:{route_for_callback(update.callback_query.data)}")
+async def confirm_group_vote(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    logger.debug("Confirming a group vote.")
+    query = update.callback_query
+    voter_id = update.effective_user.id
+    game_id = query.data.split("_", 1)[1]
+
+    session = game_voting_data.get(game_id)
+    if session is None:
+        await query.answer("This voting session has ended.")
+        return
+    if voter_id not in session.voters:
+        await query.answer("You cannot vote in this session, or you have already confirmed your vote.")
+        return
+
+    session.confirm(voter_id)
+    record_vote_event(game_id, voter_id, 'confirm')
+    await query.answer(f"Vote confirmed. {selection_text(session, voter_id)}")
+
+    if not session.voters:
+        await process_voting_results(update, context, game_id)
+        return
+
+    try:
+        await query.edit_message_text(text=group_voting_text(session), reply_markup=group_voting_keyboard(session))
+    except Exception as e:
+        logger.error("Failed to edit group voting message: %s", e)
+
+async def bind_group(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """/bindgame in a group: the moderator binds their current game to the group."""
+    logger.debug("Handling /bindgame.")
+    chat_id = update.effective_chat.id
+    user_id = update.effective_user.id
+
+    cursor.execute("""
+    SELECT Games.game_id
+    FROM ActiveGames
+    JOIN Games ON ActiveGames.game_id = Games.game_id
+    WHERE ActiveGames.user_id = ? AND Games.moderator_id = ?
+    """, (user_id, user_id))
+    result = cursor.fetchone()
+    if not result:
+        await context.bot.send_message(
+            chat_id=chat_id,
+            text="Only a game's moderator can bind it. Create or select your game in a private chat with me first."
+        )
+        return
+    game_id = result[0]
+
+    # A game is held in one group, and a group holds one game
+    cursor.execute("DELETE FROM GroupChats WHERE game_id = ?", (game_id,))
+    cursor.execute("""
+    INSERT INTO GroupChats (chat_id, game_id) VALUES (?, ?)
+    ON CONFLICT(chat_id) DO UPDATE SET game_id = excluded.game_id, bound_at = CURRENT_TIMESTAMP
+    """, (chat_id, game_id))
+    conn.commit()
+    logger.debug("Game %s bound to group %s.", game_id, chat_id)
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text="This group is now bound to your game. Open votes will be held here on a single message."
+    )
+
+async def unbind_group(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """/unbindgame in a group: open votes go back to private messages."""
+    logger.debug("Handling /unbindgame.")
+    chat_id = update.effective_chat.id
+    cursor.execute("""
+    SELECT Games.moderator_id
+    FROM GroupChats
+    JOIN Games ON GroupChats.game_id = Games.game_id
+    WHERE GroupChats.chat_id = ?
+    """, (chat_id,))
+    result = cursor.fetchone()
+    if not result or result[0] != update.effective_user.id:
+        await context.bot.send_message(chat_id=chat_id, text="Only the moderator of the bound game can unbind it.")
+        return
+    cursor.execute("DELETE FROM GroupChats WHERE chat_id = ?", (chat_id,))
+    conn.commit()
+    await context.bot.send_message(chat_id=chat_id, text="This group is no longer bound to a game.")
+
+# Create the handler instances. They are registered before button_handler, which handles every other button.
+bind_group_handler = CommandHandler("bindgame", bind_group, filters=filters.ChatType.GROUPS)
+unbind_group_handler = CommandHandler("unbindgame", unbind_group, filters=filters.ChatType.GROUPS)
+group_vote_handler = CallbackQueryHandler(handle_group_vote, pattern="^gvote_")
+group_confirm_vote_handler = CallbackQueryHandler(confirm_group_vote, pattern="^gconfirm_")
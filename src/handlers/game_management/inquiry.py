@@ -3,62 +3,137 @@
 import logging
 from telegram.ext import ContextTypes
 from src.db import cursor
-from src.roles import role_factions
+from src import roles
 from telegram.helpers import escape_markdown
 
 logger = logging.getLogger("Mafia Bot GameManagement.Inquiry")
 
-async def send_inquiry_summary(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
-    """Sends a summary of the factions present in the game to all players."""
-    logger.debug(f"Sending inquiry summary for game ID {game_id}.")
-
-    # Fetch all players (both active and eliminated) and their roles
-    cursor.execute("""
-        SELECT Roles.user_id, Roles.role, Roles.eliminated
-        FROM Roles
-        WHERE Roles.game_id = ?
-    """, (game_id,))
-    players = cursor.fetchall()
-
-    if not players:
-        await context.bot.send_message(chat_id=update.effective_chat.id, text="No players found in this game.")
-        return
 
-    # Count factions for active and eliminated players
-    active_factions = {}
-    eliminated_factions = {}
-    for _, role, eliminated in players:
-        faction = role_factions.get(role, "Unknown")
+class InquiryCounters:
+    """
+    Player counts of one game by faction and by role, split into active and eliminated.
+
+    Built once when the game starts and updated in O(1) on every elimination or revival, so an
+    inquiry never re-reads the Roles table. Each change bumps version, which keys the rendered texts.
+    """
+
+    __slots__ = ('player_ids', 'player_roles', 'eliminated', 'factions', 'roles', 'version', '_rendered')
+
+    def __init__(self, players: list):
+        """
+        :param players: List of (user_id, role, eliminated) tuples of all players of the game.
+        """
+        self.player_ids = [user_id for user_id, _, _ in players]
+        self.player_roles = {user_id: role for user_id, role, _ in players}
+        self.eliminated = {user_id for user_id, _, eliminated in players if eliminated}
+        # faction -> [active, eliminated] and faction -> role -> [active, eliminated]
+        self.factions = {}
+        self.roles = {}
+        for user_id, role, eliminated in players:
+            self._count(role, bool(eliminated), 1)
+        self.version = 0
+        self._rendered = {}  # detailed -> (version, text)
+
+    def _count(self, role: str, eliminated: bool, delta: int) -> None:
+        faction = roles.role_factions.get(role, "Unknown")
+        self.factions.setdefault(faction, [0, 0])[eliminated] += delta
+        self.roles.setdefault(faction, {}).setdefault(role, [0, 0])[eliminated] += delta
+
+    def set_eliminated(self, user_id: int, eliminated: bool) -> None:
+        """Moves a player between the active and eliminated counts."""
+        if user_id not in self.player_roles or (user_id in self.eliminated) == eliminated:
+            return
+        role = self.player_roles[user_id]
+        self._count(role, not eliminated, -1)
+        self._count(role, eliminated, 1)
         if eliminated:
-            eliminated_factions[faction] = eliminated_factions.get(faction, 0) + 1
+            self.eliminated.add(user_id)
         else:
-            active_factions[faction] = active_factions.get(faction, 0) + 1
-
-    # Prepare the summary message
-    summary_message = "📢 **Inquiry (Faction Summary):** 📢\n\n"
-
-    summary_message += "**Active Players:**\n"
-    if active_factions:
-        for faction, count in active_factions.items():
-            summary_message += f"- {faction}: {count} player(s)\n"
-    else:
-        summary_message += "- No active players.\n"
-
-    summary_message += "\n**Eliminated Players:**\n"
-    if eliminated_factions:
-        for faction, count in eliminated_factions.items():
-            summary_message += f"- {faction}: {count} player(s)\n"
+            self.eliminated.discard(user_id)
+        self.version += 1
+
+    def render(self, detailed: bool) -> str:
+        """The escaped inquiry text, rendered at most once per version."""
+        cached = self._rendered.get(detailed)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+        text = escape_markdown(render_inquiry(self, detailed), version=2)
+        self._rendered[detailed] = (self.version, text)
+        return text
+
+
+def render_inquiry(counters: InquiryCounters, detailed: bool) -> str:
+    if detailed:
+        summary_message = "📢 **Inquiry (Detailed Summary):** 📢\n\n"
     else:
-        summary_message += "- No players have been eliminated.\n"
+        summary_message = "📢 **Inquiry (Faction Summary):** 📢\n\n"
+
+    for state, (title, empty) in enumerate((("**Active Players:**\n", "- No active players.\n"),
+                                            ("\n**Eliminated Players:**\n", "- No players have been eliminated.\n"))):
+        summary_message += title
+        lines = []
+        for faction, counts in counters.factions.items():
+            if not counts[state]:
+                continue
+            if not detailed:
+                lines.append(f"- {faction}: {counts[state]} player(s)\n")
+                continue
+            lines.append(f"- {faction}:\n")
+            for role, role_counts in counters.roles[faction].items():
+                if role_counts[state]:
+                    lines.append(f"  - {role} ({role_counts[state]})\n")
+        summary_message += "".join(lines) or empty
+    return summary_message
+
+
+# game_id -> InquiryCounters
+inquiry_counters = {}
+
+def build_inquiry_counters(game_id: str, players: list) -> InquiryCounters:
+    """
+    :param players: List of (user_id, role, eliminated) tuples of all players of the game.
+    """
+    counters = InquiryCounters(players)
+    inquiry_counters[game_id] = counters
+    return counters
+
+def get_inquiry_counters(game_id: str):
+    """The game's counters, built from the Roles table on first use after a restart. None without players."""
+    counters = inquiry_counters.get(game_id)
+    if counters is None:
+        cursor.execute("""
+            SELECT Roles.user_id, Roles.role, Roles.eliminated
+            FROM Roles
+            WHERE Roles.game_id = ?
+        """, (game_id,))
+        players = cursor.fetchall()
+        if not players:
+            return None
+        counters = build_inquiry_counters(game_id, players)
+    return counters
+
+def update_inquiry_counters(game_id: str, user_id: int, eliminated: bool) -> None:
+    """Records an elimination or revival. Games whose counters are not built yet read it from the DB later."""
+    counters = inquiry_counters.get(game_id)
+    if counters is not None:
+        counters.set_eliminated(user_id, eliminated)
+
+
+async def send_inquiry(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, detailed: bool) -> None:
+    counters = get_inquiry_counters(game_id)
+    if counters is None:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="No players found in this game.")
+        return
 
-    safe_summary = escape_markdown(summary_message, version=2)
+    safe_summary = counters.render(detailed)
+    kind = "detailed inquiry summary" if detailed else "inquiry summary"
 
-    # Send the summary to all players
-    for user_id, _, _ in players:
+    # Send the summary to all players (both active and eliminated)
+    for user_id in counters.player_ids:
         try:
             await context.bot.send_message(chat_id=user_id, text=safe_summary, parse_mode='MarkdownV2')
         except Exception as e:
-            logger.error(f"Failed to send inquiry summary to user {user_id}: {e}")
+            logger.error("Failed to send %s to user %s: %s", kind, user_id, e)
 
     # Also send the summary to the moderator
     cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
@@ -67,76 +142,16 @@ async def send_inquiry_summary(update: ContextTypes.DEFAULT_TYPE, context: Conte
         try:
             await context.bot.send_message(chat_id=moderator_id, text=safe_summary, parse_mode='MarkdownV2')
         except Exception as e:
-            logger.error(f"Failed to send inquiry summary to moderator {moderator_id}: {e}")
-
-
-async def send_detailed_inquiry_summary(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
-    """Sends a detailed summary of the factions and roles present in the game to all players."""
-    logger.debug(f"Sending detailed inquiry summary for game ID {game_id}.")
-
-    # Fetch all players (both active and eliminated) and their roles
-    cursor.execute("""
-        SELECT Roles.user_id, Roles.role, Roles.eliminated
-        FROM Roles
-        WHERE Roles.game_id = ?
-    """, (game_id,))
-    players = cursor.fetchall()
-
-    if not players:
-        await context.bot.send_message(chat_id=update.effective_chat.id, text="No players found in this game.")
-        return
+            logger.error("Failed to send %s to moderator %s: %s", kind, moderator_id, e)
 
-    # Organize roles and factions for active and eliminated players
-    active_info = {}
-    eliminated_info = {}
-    for _, role, eliminated in players:
-        faction = role_factions.get(role, "Unknown")
-        if eliminated:
-            if faction not in eliminated_info:
-                eliminated_info[faction] = []
-            eliminated_info[faction].append(role)
-        else:
-            if faction not in active_info:
-                active_info[faction] = []
-            active_info[faction].append(role)
-
-    # Prepare the detailed summary message
-    summary_message = "📢 **Inquiry (Detailed Summary):** 📢\n\n"
-
-    summary_message += "**Active Players:**\n"
-    if active_info:
-        for faction, roles in active_info.items():
-            summary_message += f"- {faction}:\n"
-            for role in set(roles):  # Use set to avoid duplicate role entries
-                count = roles.count(role)
-                summary_message += f"  - {role} ({count})\n"
-    else:
-        summary_message += "- No active players.\n"
-
-    summary_message += "\n**Eliminated Players:**\n"
-    if eliminated_info:
-        for faction, roles in eliminated_info.items():
-            summary_message += f"- {faction}:\n"
-            for role in set(roles):  # Use set to avoid duplicate role entries
-                count = roles.count(role)
-                summary_message += f"  - {role} ({count})\n"
-    else:
-        summary_message += "- No players have been eliminated.\n"
 
-    safe_summary = escape_markdown(summary_message, version=2)
+async def send_inquiry_summary(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
+    """Sends a summary of the factions present in the game to all players."""
+    logger.debug("Sending inquiry summary for game ID %s.", game_id)
+    await send_inquiry(update, context, game_id, detailed=False)
 
-    # Send the summary to all players
-    for user_id, _, _ in players:
-        try:
-            await context.bot.send_message(chat_id=user_id, text=safe_summary, parse_mode='MarkdownV2')
-        except Exception as e:
-            logger.error(f"Failed to send detailed inquiry summary to user {user_id}: {e}")
 
-    # Also send the summary to the moderator
-    cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
-    moderator_id = cursor.fetchone()[0]
-    if moderator_id:
-        try:
-            await context.bot.send_message(chat_id=moderator_id, text=safe_summary, parse_mode='MarkdownV2')
-        except Exception as e:
-            logger.error(f"Failed to send detailed inquiry summary to moderator {moderator_id}: {e}")
\ No newline at end of file
+async def send_detailed_inquiry_summary(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
+    """Sends a detailed summary of the factions and roles present in the game to all players."""
+    logger.debug("Sending detailed inquiry summary for game ID %s.", game_id)
+    await send_inquiry(update, context, game_id, detailed=True)
@@ -15,12 +15,12 @@ async def join_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEF
         game_id, moderator_id, started = result
 
         if started:
-            logger.debug(f"Attempt to join started game_id: {game_id}")
+            logger.debug("Attempt to join started game_id: %s", game_id)
             await context.bot.send_message(chat_id=update.effective_chat.id, text="Cannot join. The game has already started.")
             return  # Exit the function to prevent joining
 
         context.user_data['game_id'] = game_id  # Store game_id in user_data
-        logger.debug(f"User joined game. game_id stored in user_data: {game_id}")
+        logger.debug("User joined game. game_id stored in user_data: %s", game_id)
 
         # Update or insert user information
         cursor.execute("""
@@ -37,17 +37,24 @@ async def join_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEF
         VALUES (?, ?, NULL)
         """, (game_id, user_id))
 
+        # Remember the player's current game so updates can be routed to it
+        cursor.execute(
+            "INSERT INTO ActiveGames (user_id, game_id) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET game_id = excluded.game_id",
+            (user_id, game_id)
+        )
+
         conn.commit()
         message = "Joined the game successfully!"
         await context.bot.send_message(chat_id=update.effective_chat.id, text=message)
-        logger.debug(f"User {username} (ID: {user_id}) joined game {game_id}")
+        logger.debug("User %s (ID: %s) joined game %s", username, user_id, game_id)
 
         # Notify moderator
         if moderator_id != user_id:
             try:
                 await context.bot.send_message(chat_id=moderator_id, text=f"User {username} (ID: {user_id}) has joined the game!")
             except Exception as e:
-                logger.error(f"Failed to notify moderator {moderator_id}: {e}")
+                logger.error("Failed to notify moderator %s: %s", moderator_id, e)
     else:
         message = "Invalid passcode. Please try again."
         await context.bot.send_message(chat_id=update.effective_chat.id, text=message)
\ No newline at end of file
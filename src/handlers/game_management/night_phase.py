@@ -0,0 +1,268 @@
+from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.ext import CallbackQueryHandler, ContextTypes
+import logging
+from src import roles
+from src.db import conn, cursor
+from src.metrics import instrumented, route_for_callback
+from .voting import game_voting_data, record_vote_event, process_voting_results, get_group_chat
+from .faction_index import invalidate_faction_index
+from .inquiry import update_inquiry_counters
+
+logger = logging.getLogger("Mafia Bot GameManagement.NightPhase")
+
+# What the role-holder is asked to do, by the type of their night action in roles.json
+ACTION_PROMPTS = {
+    'block': "choose a player whose ability is blocked tonight",
+    'save': "choose a player to save tonight",
+    'kill': "choose a player to kill tonight",
+    'investigate': "choose a player to investigate",
+}
+
+# -------------------- Night phase --------------------
+# Every alive player whose role has a night_action in roles.json gets a keyboard of targets in
+# their private chat. Choices are only collected in memory; once everyone has chosen, or the
+# moderator resolves the night early, all actions are resolved in one pass in order of their
+# role's priority. The eliminations are written in a single transaction and announced once.
+
+class NightSession:
+    """In-memory state of one night round."""
+
+    __slots__ = ('game_id', 'player_names', 'player_roles', 'actors', 'actions')
+
+    def __init__(self, game_id: str, players: list):
+        """
+        :param players: List of (user_id, username, role) tuples of the alive players.
+        """
+        self.game_id = game_id
+        self.player_names = {user_id: username for user_id, username, _ in players}
+        self.player_roles = {user_id: role for user_id, _, role in players}
+        # Players who act tonight, mapped to their role's night action
+        self.actors = {
+            user_id: roles.role_night_actions[role] for user_id, _, role in players if role in roles.role_night_actions
+        }
+        self.actions = {}  # actor_id -> target_id, or None if the actor skips
+
+    def submit(self, actor_id: int, target_id) -> None:
+        self.actions[actor_id] = target_id
+
+    def pending(self) -> list:
+        """The actors who have not chosen yet."""
+        return [actor_id for actor_id in self.actors if actor_id not in self.actions]
+
+    def resolve(self) -> dict:
+        """
+        Resolves the submitted actions, lowest priority first, so blocks apply before saves and
+        saves before kills. Returns the eliminated and surviving targets, the blocked actors and
+        the investigation results as {actor_id: (target_id, faction)}.
+        """
+        outcome = {'blocked': set(), 'saved': set(), 'attacked': set(), 'investigations': {}}
+        ordered = sorted(
+            ((actor_id, target_id) for actor_id, target_id in self.actions.items() if target_id is not None),
+            key=lambda action: self.actors[action[0]]['priority']
+        )
+        for actor_id, target_id in ordered:
+            if actor_id in outcome['blocked']:
+                continue
+            action_type = self.actors[actor_id]['type']
+            resolver = ACTION_RESOLVERS.get(action_type)
+            if resolver is None:
+                logger.warning("Unknown night action type %s of role %s.", action_type, self.player_roles[actor_id])
+                continue
+            resolver(self, outcome, actor_id, target_id)
+
+        eliminated = [
+            user_id for user_id in self.player_names
+            if user_id in outcome['attacked'] and user_id not in outcome['saved']
+            and self.player_roles[user_id] not in roles.night_immune_roles
+        ]
+        return {
+            'eliminated': eliminated,
+            'survived': [user_id for user_id in self.player_names if user_id in outcome['attacked'] and user_id not in eliminated],
+            'blocked': outcome['blocked'],
+            'investigations': outcome['investigations'],
+        }
+
+def resolve_block(session: NightSession, outcome: dict, actor_id: int, target_id: int) -> None:
+    outcome['blocked'].add(target_id)
+
+def resolve_save(session: NightSession, outcome: dict, actor_id: int, target_id: int) -> None:
+    outcome['saved'].add(target_id)
+
+def resolve_kill(session: NightSession, outcome: dict, actor_id: int, target_id: int) -> None:
+    outcome['attacked'].add(target_id)
+
+def resolve_investigate(session: NightSession, outcome: dict, actor_id: int, target_id: int) -> None:
+    faction = roles.role_appearances.get(session.player_roles[target_id], "Unknown")
+    outcome['investigations'][actor_id] = (target_id, faction)
+
+ACTION_RESOLVERS = {
+    'block': resolve_block,
+    'save': resolve_save,
+    'kill': resolve_kill,
+    'investigate': resolve_investigate,
+}
+
+# Night rounds in progress, by game_id
+game_night_data = {}
+
+def night_action_keyboard(session: NightSession) -> InlineKeyboardMarkup:
+    # The game_id is the last part of the callback data, so the dispatcher can route the choices
+    keyboard = [
+        [InlineKeyboardButton(username, callback_data=f"night_{target_id}_{session.game_id}")]
+        for target_id, username in session.player_names.items()
+    ]
+    keyboard.append([InlineKeyboardButton("Skip", callback_data=f"nightskip_{session.game_id}")])
+    return InlineKeyboardMarkup(keyboard)
+
+async def start_night(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
+    logger.debug("Starting the night of game %s.", game_id)
+    chat_id = update.effective_chat.id
+    resolve_keyboard = InlineKeyboardMarkup([[InlineKeyboardButton("Resolve Night Now", callback_data="resolve_night")]])
+    if game_id in game_night_data:
+        await context.bot.send_message(chat_id=chat_id, text="The night is already in progress.", reply_markup=resolve_keyboard)
+        return
+
+    cursor.execute("""
+    SELECT Roles.user_id, Users.username, Roles.role
+    FROM Roles
+    JOIN Users ON Roles.user_id = Users.user_id
+    WHERE Roles.game_id = ? AND Roles.eliminated = 0
+    """, (game_id,))
+    session = NightSession(game_id, cursor.fetchall())
+    if not session.actors:
+        await context.bot.send_message(chat_id=chat_id, text="No alive player has a night action.")
+        return
+    game_night_data[game_id] = session
+
+    reply_markup = night_action_keyboard(session)
+    for actor_id, action in session.actors.items():
+        prompt = ACTION_PROMPTS.get(action['type'], "choose a player")
+        try:
+            await context.bot.send_message(
+                chat_id=actor_id,
+                text=f"🌙 Night falls. {session.player_roles[actor_id]}, {prompt}.",
+                reply_markup=reply_markup
+            )
+        except Exception as e:
+            logger.error("Failed to send the night action keyboard to user %s: %s", actor_id, e)
+            # An unreachable actor does not hold up the night
+            session.submit(actor_id, None)
+
+    waiting = [session.player_names[actor_id] for actor_id in session.pending()]
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"🌙 The night has started. Waiting for: {', '.join(waiting) or 'nobody'}",
+        reply_markup=resolve_keyboard
+    )
+    if not session.pending():
+        await resolve_night(context, game_id)
+
+@instrumented(lambda update, context: f"button:{route_for_callback(update.callback_query.data)}")
+async def handle_night_action(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    logger.debug("Handling a night action.")
+    query = update.callback_query
+    actor_id = update.effective_user.id
+    if query.data.startswith("nightskip_"):
+        target_id = None
+        game_id = query.data.split("_", 1)[1]
+    else:
+        _, target_id, game_id = query.data.split("_", 2)
+        target_id = int(target_id)
+
+    session = game_night_data.get(game_id)
+    if session is None:
+        await query.answer("This night has ended.")
+        return
+    if actor_id not in session.actors:
+        await query.answer("You have no action to take tonight.")
+        return
+    if actor_id in session.actions:
+        await query.answer("You have already made your choice tonight.")
+        return
+    if target_id is not None and target_id not in session.player_names:
+        await query.answer("This player is no longer in the game.")
+        return
+
+    session.submit(actor_id, target_id)
+    await query.answer()
+    text = f"You chose {session.player_names[target_id]}." if target_id is not None else "You skip tonight."
+    try:
+        await query.edit_message_text(text=f"🌙 {text}")
+    except Exception as e:
+        logger.error("Failed to edit night action message: %s", e)
+
+    if not session.pending():
+        await resolve_night(context, game_id)
+
+def night_report(session: NightSession, outcome: dict) -> str:
+    """The moderator's account of every action and its result."""
+    lines = ["🌙 Night report:"]
+    for actor_id, action in session.actors.items():
+        actor = f"{session.player_names[actor_id]} ({session.player_roles[actor_id]})"
+        target_id = session.actions.get(actor_id)
+        if target_id is None:
+            lines.append(f"• {actor} did not act.")
+        elif actor_id in outcome['blocked']:
+            lines.append(f"• {actor} was blocked ({action['type']} {session.player_names[target_id]}).")
+        else:
+            lines.append(f"• {actor}: {action['type']} {session.player_names[target_id]}")
+    for label, user_ids in (("Survived", outcome['survived']), ("Eliminated", outcome['eliminated'])):
+        if user_ids:
+            lines.append(f"\n{label}: {', '.join(session.player_names[user_id] for user_id in user_ids)}")
+    return "\n".join(lines)
+
+async def resolve_night(context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
+    """Resolves the night, applies its eliminations in one transaction and announces the morning."""
+    session = game_night_data.pop(game_id, None)
+    if session is None:
+        return
+    outcome = session.resolve()
+    eliminated = outcome['eliminated']
+    logger.debug("Night of game %s resolved, eliminated: %s", game_id, eliminated)
+
+    cursor.executemany(
+        "UPDATE Roles SET eliminated = 1 WHERE game_id = ? AND user_id = ?",
+        [(game_id, user_id) for user_id in eliminated]
+    )
+    # Eliminated players lose their vote in an ongoing voting session
+    voting_session = game_voting_data.get(game_id)
+    if voting_session:
+        for user_id in eliminated:
+            voting_session.remove_voter(user_id)
+            record_vote_event(game_id, user_id, 'remove', commit=False)
+    conn.commit()
+    if eliminated:
+        invalidate_faction_index(game_id)
+    for user_id in eliminated:
+        update_inquiry_counters(game_id, user_id, eliminated=True)
+
+    for actor_id, (target_id, faction) in outcome['investigations'].items():
+        try:
+            await context.bot.send_message(chat_id=actor_id, text=f"🔍 {session.player_names[target_id]} is {faction}.")
+        except Exception as e:
+            logger.error("Failed to send the investigation result to user %s: %s", actor_id, e)
+
+    cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
+    result = cursor.fetchone()
+    if result:
+        try:
+            await context.bot.send_message(chat_id=result[0], text=night_report(session, outcome))
+        except Exception as e:
+            logger.error("Failed to send the night report to moderator %s: %s", result[0], e)
+
+    if eliminated:
+        announcement = f"☀️ The night is over. Eliminated: {', '.join(session.player_names[user_id] for user_id in eliminated)}."
+    else:
+        announcement = "☀️ The night is over. Nobody was eliminated."
+    group_chat_id = get_group_chat(game_id)
+    for chat_id in ([group_chat_id] if group_chat_id else session.player_names):
+        try:
+            await context.bot.send_message(chat_id=chat_id, text=announcement)
+        except Exception as e:
+            logger.error("Failed to announce the morning to chat %s: %s", chat_id, e)
+
+    if voting_session and eliminated and voting_session.voting_open and not voting_session.voters:
+        await process_voting_results(None, context, game_id)
+
+# Create the handler instance. It is registered before button_handler, which handles every other button.
+night_action_handler = CallbackQueryHandler(handle_night_action, pattern="^night(skip)?_")
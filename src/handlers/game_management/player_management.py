@@ -3,7 +3,9 @@ from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
 from src.db import conn, cursor
-from src.handlers.game_management.voting import process_voting_results, game_voting_data
+from src.handlers.game_management.voting import process_voting_results, game_voting_data, record_vote_event
+from src.handlers.game_management.faction_index import invalidate_faction_index
+from src.handlers.game_management.inquiry import update_inquiry_counters
 
 logger = logging.getLogger("Mafia Bot GameManagement.PlayerManagement")
 
@@ -35,7 +37,7 @@ async def eliminate_player(update: ContextTypes.DEFAULT_TYPE, context: ContextTy
     await context.bot.send_message(chat_id=update.effective_chat.id, text="Select a player to eliminate:", reply_markup=reply_markup)
 
 async def handle_elimination_confirmation(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Handling elimination confirmation for user ID {target_user_id} in game ID {game_id}.")
+    logger.debug("Handling elimination confirmation for user ID %s in game ID %s.", target_user_id, game_id)
     
     # Fetch the username of the target user
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
@@ -54,7 +56,7 @@ async def handle_elimination_confirmation(update: ContextTypes.DEFAULT_TYPE, con
     await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Are you sure you want to eliminate {username}?", reply_markup=reply_markup)
 
 async def confirm_elimination(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Confirming elimination for user ID {target_user_id} in game ID {game_id}.")
+    logger.debug("Confirming elimination for user ID %s in game ID %s.", target_user_id, game_id)
     
     # Mark the player as eliminated in the database
     cursor.execute("""
@@ -63,6 +65,8 @@ async def confirm_elimination(update: ContextTypes.DEFAULT_TYPE, context: Contex
         WHERE game_id = ? AND user_id = ?
     """, (game_id, target_user_id))
     conn.commit()
+    invalidate_faction_index(game_id)
+    update_inquiry_counters(game_id, target_user_id, eliminated=True)
     
     # Fetch the username of the eliminated player
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
@@ -79,21 +83,21 @@ async def confirm_elimination(update: ContextTypes.DEFAULT_TYPE, context: Contex
             text="You have been eliminated from the game. Better luck next time!"
         )
     except Exception as e:
-        logger.error(f"Failed to notify user {target_user_id} about elimination: {e}")
+        logger.error("Failed to notify user %s about elimination: %s", target_user_id, e)
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Failed to notify {username} about their elimination.")
 
     # Remove the eliminated player from any ongoing voting session
     if game_id in game_voting_data:
-        if target_user_id in game_voting_data[game_id]['voters']:
-            game_voting_data[game_id]['voters'].remove(target_user_id)
-        if target_user_id in game_voting_data[game_id]['player_votes']:
-            del game_voting_data[game_id]['player_votes'][target_user_id]
-        # Optionally, re-check if all voters have voted after removal
-        if not game_voting_data[game_id]['voters']:
+        session = game_voting_data[game_id]
+        session.remove_voter(target_user_id)
+        record_vote_event(game_id, target_user_id, 'remove')
+        # Re-check if all voters have voted after removal. Before voting opens there are no
+        # voters yet, while the moderator is still setting the permissions.
+        if session.voting_open and not session.voters:
             await process_voting_results(update, context, game_id)
 
 async def cancel_elimination(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Elimination of user ID {target_user_id} in game ID {game_id} has been canceled.")
+    logger.debug("Elimination of user ID %s in game ID %s has been canceled.", target_user_id, game_id)
     
     # Fetch the username of the target user
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
@@ -131,7 +135,7 @@ async def revive_player(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
     await context.bot.send_message(chat_id=update.effective_chat.id, text="Select a player to revive:", reply_markup=reply_markup)
 
 async def handle_revive_confirmation(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Handling revive confirmation for user ID {target_user_id} in game ID {game_id}.")
+    logger.debug("Handling revive confirmation for user ID %s in game ID %s.", target_user_id, game_id)
 
     # Fetch the username of the target user
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
@@ -150,7 +154,7 @@ async def handle_revive_confirmation(update: ContextTypes.DEFAULT_TYPE, context:
     await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Are you sure you want to revive {username}?", reply_markup=reply_markup)
 
 async def confirm_revive(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Confirming revive for user ID {target_user_id} in game ID {game_id}.")
+    logger.debug("Confirming revive for user ID %s in game ID %s.", target_user_id, game_id)
 
     # Mark the player as not eliminated in the database
     cursor.execute("""
@@ -159,6 +163,8 @@ async def confirm_revive(update: ContextTypes.DEFAULT_TYPE, context: ContextType
     WHERE game_id = ? AND user_id = ?
     """, (game_id, target_user_id))
     conn.commit()
+    invalidate_faction_index(game_id)
+    update_inquiry_counters(game_id, target_user_id, eliminated=False)
 
     # Fetch the username of the revived player
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
@@ -175,11 +181,11 @@ async def confirm_revive(update: ContextTypes.DEFAULT_TYPE, context: ContextType
             text="You have been revived in the game! Welcome back!"
         )
     except Exception as e:
-        logger.error(f"Failed to notify user {target_user_id} about revival: {e}")
+        logger.error("Failed to notify user %s about revival: %s", target_user_id, e)
         await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Failed to notify {username} about their revival.")
 
 async def cancel_revive(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_user_id: int) -> None:
-    logger.debug(f"Revive of user ID {target_user_id} in game ID {game_id} has been canceled.")
+    logger.debug("Revive of user ID %s in game ID %s has been canceled.", target_user_id, game_id)
 
     # Fetch the username of the target user
     cursor.execute("SELECT username FROM Users WHERE user_id = ?", (target_user_id,))
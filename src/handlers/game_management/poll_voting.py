@@ -0,0 +1,100 @@
+from telegram.ext import ContextTypes, PollAnswerHandler
+import json
+import logging
+from src.db import conn, cursor
+from src.metrics import instrumented
+from .voting import game_voting_data, record_vote_event, save_voting_session, send_voting_summary, process_voting_results
+
+logger = logging.getLogger("Mafia Bot GameManagement.PollVoting")
+
+# Telegram allows at most 10 options per poll; the last one is ABSTAIN_OPTION
+MAX_POLL_OPTIONS = 10
+ABSTAIN_OPTION = "Abstain"
+
+# Maximum length of a poll option
+MAX_OPTION_LENGTH = 100
+
+# -------------------- Poll-based voting --------------------
+# Every voter gets a Telegram poll in their private chat with the bot. Selecting and deselecting
+# targets happens on the voter's device without any bot edits; the bot only receives the submitted
+# answer as a PollAnswer update and applies it to the same VotingSession tally as button votes.
+# The polls are not anonymous in Telegram's sense, since anonymous polls send no PollAnswer
+# updates, but each poll lives in a private chat, so no other player sees who voted for whom.
+
+async def send_voting_polls(context: ContextTypes.DEFAULT_TYPE, game_id: str, voters: list) -> bool:
+    """Sends a poll to every voter. Returns False if the candidates do not fit in a poll."""
+    session = game_voting_data[game_id]
+    candidates = session.candidates()
+    if not candidates or len(candidates) >= MAX_POLL_OPTIONS:
+        logger.info("%s candidates do not fit in a poll, game %s votes with buttons.", len(candidates), game_id)
+        session.use_polls = False
+        save_voting_session(game_id)
+        return False
+
+    # Player each option votes for, by option index; None for ABSTAIN_OPTION
+    targets = [target_id for target_id, _ in candidates] + [None]
+    options = [target_username[:MAX_OPTION_LENGTH] for _, target_username in candidates] + [ABSTAIN_OPTION]
+    for voter_id in voters:
+        try:
+            message = await context.bot.send_poll(
+                chat_id=voter_id,
+                question="📢 Anonymous Voting Session: vote for the players to eliminate",
+                options=options,
+                is_anonymous=False,
+                allows_multiple_answers=True
+            )
+        except Exception as e:
+            logger.error("Failed to send voting poll to user %s: %s", voter_id, e)
+            continue
+        cursor.execute(
+            "INSERT INTO VotingPolls (poll_id, game_id, voter_id, message_id, targets) VALUES (?, ?, ?, ?, ?)",
+            (message.poll.id, game_id, voter_id, message.message_id, json.dumps(targets))
+        )
+    conn.commit()
+    return True
+
+async def close_voting_polls(context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
+    """Stops the polls of a finished vote, so late answers are not lost silently."""
+    cursor.execute("SELECT voter_id, message_id FROM VotingPolls WHERE game_id = ?", (game_id,))
+    for voter_id, message_id in cursor.fetchall():
+        try:
+            await context.bot.stop_poll(chat_id=voter_id, message_id=message_id)
+        except Exception as e:
+            logger.error("Failed to stop voting poll of user %s: %s", voter_id, e)
+
+@instrumented(lambda update, context: "poll_answer")
+async def handle_poll_answer(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Applies a voter's submitted poll answer as their whole ballot. The first answer confirms the
+    votes; retracting the answer clears them until the voter answers again.
+    """
+    logger.debug("Handling a poll answer.")
+    answer = update.poll_answer
+    cursor.execute("SELECT game_id, voter_id, targets FROM VotingPolls WHERE poll_id = ?", (answer.poll_id,))
+    result = cursor.fetchone()
+    if not result:
+        logger.debug("Answer to unknown poll %s ignored.", answer.poll_id)
+        return
+    game_id, voter_id, targets = result
+
+    session = game_voting_data.get(game_id)
+    # Eliminated players lose their vote
+    if session is None or voter_id not in session.can_vote:
+        return
+
+    targets = json.loads(targets)
+    chosen = {targets[index] for index in answer.option_ids if index < len(targets) and targets[index] is not None}
+    for target_id in set(session.selected_targets(voter_id)) ^ chosen:
+        session.toggle(voter_id, target_id)
+        record_vote_event(game_id, voter_id, 'toggle', target_id)
+    if answer.option_ids and voter_id in session.voters:
+        session.confirm(voter_id)
+        record_vote_event(game_id, voter_id, 'confirm')
+
+    await send_voting_summary(context, game_id)
+
+    if not session.voters:
+        await process_voting_results(update, context, game_id)
+
+# Create the handler instance
+poll_answer_handler = PollAnswerHandler(handle_poll_answer)
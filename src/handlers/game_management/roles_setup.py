@@ -2,8 +2,9 @@ from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 import logging
 from src.db import conn, cursor
-from src.roles import available_roles, role_descriptions
-from src.config import RANDOM_ORG_API_KEY
+from src import roles
+from src import config
+from src.game_state import versions
 from .base import role_counts_lock, ROLES_PER_PAGE, get_random_shuffle
 from telegram.helpers import escape_markdown  # Newly added import
 import random
@@ -23,21 +24,52 @@ async def show_role_buttons(update: ContextTypes.DEFAULT_TYPE, context: ContextT
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
         return
 
+    # Get the current page from user_data, default to 0
+    current_page = context.user_data.get('current_page', 0)
+
+    # The page only changes with the game's role counts, so an unchanged page is neither rebuilt nor re-sent
+    view = f"role_buttons:{current_page}"
+    version = versions.version(game_id, 'roles')
+    chat_id = update.effective_chat.id
+    if message_id and versions.is_shown(chat_id, message_id, game_id, view, version):
+        logger.debug("Role buttons are up to date, edit skipped.")
+        return message_id
+    rendered = versions.rendered(game_id, view, version)
+    if rendered is None:
+        rendered = versions.store_rendered(game_id, view, version, await render_role_buttons(game_id, current_page))
+    text, reply_markup = rendered
+
+    if message_id:
+        await context.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=text,
+            reply_markup=reply_markup
+        )
+    else:
+        sent_message = await context.bot.send_message(
+            chat_id=chat_id,
+            text=text,
+            reply_markup=reply_markup
+        )
+        message_id = sent_message.message_id
+    versions.mark_shown(chat_id, message_id, game_id, view, version)
+    return message_id  # The edited message, or the new one
+
+async def render_role_buttons(game_id: str, current_page: int) -> tuple:
+    """The text and keyboard of one page of role counts."""
     async with role_counts_lock:
         cursor.execute("SELECT role, count FROM GameRoles WHERE game_id = ?", (game_id,))
         role_counts = {role: count for role, count in cursor.fetchall()}
 
     # Ensure all available roles are present
-    for role in available_roles:
+    for role in roles.available_roles:
         if role not in role_counts:
             role_counts[role] = 0
 
-    # Get the current page from user_data, default to 0
-    current_page = context.user_data.get('current_page', 0)
-
     start_index = current_page * ROLES_PER_PAGE
     end_index = start_index + ROLES_PER_PAGE
-    roles_on_page = available_roles[start_index:end_index]
+    roles_on_page = roles.available_roles[start_index:end_index]
 
     keyboard = []
     for role in roles_on_page:
@@ -51,7 +83,7 @@ async def show_role_buttons(update: ContextTypes.DEFAULT_TYPE, context: ContextT
     nav_buttons = []
     if current_page > 0:
         nav_buttons.append(InlineKeyboardButton("Previous", callback_data="prev_page"))
-    if end_index < len(available_roles):
+    if end_index < len(roles.available_roles):
         nav_buttons.append(InlineKeyboardButton("Next", callback_data="next_page"))
     if nav_buttons:
         keyboard.append(nav_buttons)
@@ -65,30 +97,13 @@ async def show_role_buttons(update: ContextTypes.DEFAULT_TYPE, context: ContextT
         InlineKeyboardButton("Confirm Roles", callback_data="confirm_roles"),
         InlineKeyboardButton("Back to Menu", callback_data="back_to_menu")
     ])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    text = "Select roles and their counts:"
-
-    if message_id:
-        await context.bot.edit_message_text(
-            chat_id=update.effective_chat.id,
-            message_id=message_id,
-            text=text,
-            reply_markup=reply_markup
-        )
-        return message_id  # Return the same message_id if editing
-    else:
-        sent_message = await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=text,
-            reply_markup=reply_markup
-        )
-        return sent_message.message_id  # Return the new message_id
+    return "Select roles and their counts:", InlineKeyboardMarkup(keyboard)
 
 async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: int) -> (bool, str):
     logger.debug("Confirming and setting roles.")
     cursor.execute("SELECT user_id FROM Roles WHERE game_id = ?", (game_id,))
     users = [r[0] for r in cursor.fetchall()]
-    logger.debug(f"Users in game ID {game_id}: {users}")
+    logger.debug("Users in game ID %s: %s", game_id, users)
 
     if not users:
         logger.debug("No users found in the game.")
@@ -103,7 +118,7 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
     total_players = len(users)
 
     if total_roles != total_players:
-        logger.debug(f"Number of roles does not match number of players: {total_players} users, {total_roles} roles.")
+        logger.debug("Number of roles does not match number of players: %s users, %s roles.", total_players, total_roles)
         await context.bot.send_message(
             chat_id=update.effective_chat.id,
             text=f"Number of roles does not match number of players.\n{len(users)} users, {sum(role_counts.values())} roles."
@@ -114,12 +129,12 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
     user_roles = []
     for role, count in role_counts.items():
         user_roles.extend([role] * count)
-    logger.debug(f"Role assignments: {user_roles}")
+    logger.debug("Role assignments: %s", user_roles)
 
     # Attempt to shuffle using Random.org
     method_used = "fallback (local random)"
-    if RANDOM_ORG_API_KEY:
-        shuffled_user_roles = await get_random_shuffle(user_roles, RANDOM_ORG_API_KEY)
+    if config.RANDOM_ORG_API_KEY:
+        shuffled_user_roles = await get_random_shuffle(user_roles, config.RANDOM_ORG_API_KEY)
         if shuffled_user_roles:
             user_roles = shuffled_user_roles
             method_used = "Random.org"
@@ -132,8 +147,8 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
         logger.debug("Shuffled roles using local random.")
 
     # Shuffle users to randomize role assignments
-    if RANDOM_ORG_API_KEY and method_used == "Random.org":
-        shuffled_users = await get_random_shuffle(users, RANDOM_ORG_API_KEY)
+    if config.RANDOM_ORG_API_KEY and method_used == "Random.org":
+        shuffled_users = await get_random_shuffle(users, config.RANDOM_ORG_API_KEY)
         if shuffled_users:
             users = shuffled_users
             logger.debug("Shuffled users using Random.org")
@@ -153,17 +168,17 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
                 "UPDATE Roles SET role = ? WHERE game_id = ? AND user_id = ?",
                 (role, game_id, user)
             )
-            logger.debug(f"Role {role} set for user ID {user}")
+            logger.debug("Role %s set for user ID %s", role, user)
         # Update the randomness_method in Games table
         cursor.execute(
             "UPDATE Games SET randomness_method = ? WHERE game_id = ?",
             (method_used, game_id)
         )
         conn.commit()
-        logger.debug(f"Roles set for game ID {game_id} using {method_used}")
+        logger.debug("Roles set for game ID %s using %s", game_id, method_used)
     except Exception as e:
         conn.rollback()
-        logger.error(f"Failed to set roles due to error: {e}")
+        logger.error("Failed to set roles due to error: %s", e)
         return False, method_used
 
     # -------------------- Send the roles, their count, and descriptions to all players --------------------
@@ -181,7 +196,7 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
                       f"**Roles in the Game:**\n"
 
     for role, count in role_counts:
-        description = role_descriptions.get(role, "No description available.")
+        description = roles.role_descriptions.get(role, "No description available.")
         summary_message += f"- **{role}** ({count}): {description}\n\n"
 
     # Send the summary message to all players
@@ -201,13 +216,13 @@ async def confirm_and_set_roles(update: ContextTypes.DEFAULT_TYPE, context: Cont
                 parse_mode='MarkdownV2'
             )
         except Exception as e:
-            logger.error(f"Failed to send game summary to user {user_id}: {e}")
+            logger.error("Failed to send game summary to user %s: %s", user_id, e)
             try:
                 await context.bot.send_message(
                     chat_id=update.effective_user.id,
                     text=f"Failed to send game summary to user {username} (ID: {user_id}). Please check their privacy settings."
                 )
             except Exception as ex:
-                logger.error(f"Failed to notify moderator about summary message for user {user_id}: {ex}")
+                logger.error("Failed to notify moderator about summary message for user %s: %s", user_id, ex)
 
     return True, method_used
\ No newline at end of file
@@ -1,8 +1,10 @@
 from telegram.ext import ContextTypes
 import logging
 from src.db import conn, cursor
-from src.roles import role_descriptions, role_factions
+from src import roles
 from telegram.helpers import escape_markdown  # Newly added import
+from .faction_index import build_faction_index
+from .inquiry import build_inquiry_counters
 
 logger = logging.getLogger("Mafia Bot GameManagement.StartGame")
 
@@ -40,7 +42,7 @@ async def start_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DE
         WHERE Roles.game_id = ?
     """, (game_id,))
     player_roles = cursor.fetchall()
-    logger.debug(f"Player roles: {player_roles}")
+    logger.debug("Player roles: %s", player_roles)
 
     if not player_roles or any(role is None or role == '' for _, role, _ in player_roles):
         await context.bot.send_message(
@@ -80,8 +82,8 @@ async def start_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DE
     # Notify each player of their role and the randomness methodology
     for user_id, role, username in player_roles:
         if role:
-            role_description = role_descriptions.get(role, "No description available.")
-            role_faction = role_factions.get(role, "Unknown Faction")
+            role_description = roles.role_descriptions.get(role, "No description available.")
+            role_faction = roles.role_factions.get(role, "Unknown Faction")
             msg = (f"Hi {username}, your role is: {role} ({role_faction})\n\n"
                    f"Role Description:\n{role_description}\n\n{methodology_description}")
             try:
@@ -93,14 +95,14 @@ async def start_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DE
                 )
                 role_message += f"{username} (ID: {user_id}): {role}\n"
             except Exception as e:
-                logger.error(f"Failed to send role to user {user_id}: {e}")
+                logger.error("Failed to send role to user %s: %s", user_id, e)
                 try:
                     await context.bot.send_message(
                         chat_id=moderator_id,
                         text=f"Failed to send role to user {username} (ID: {user_id}). Please check their privacy settings."
                     )
                 except Exception as ex:
-                    logger.error(f"Failed to notify moderator about summary message for user {user_id}: {ex}")
+                    logger.error("Failed to notify moderator about summary message for user %s: %s", user_id, ex)
         else:
             await context.bot.send_message(
                 chat_id=user_id,
@@ -118,11 +120,13 @@ async def start_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DE
     # Mark the game as started
     cursor.execute("UPDATE Games SET started = 1 WHERE game_id = ?", (game_id,))
     conn.commit()
+    build_faction_index(game_id, player_roles)
+    build_inquiry_counters(game_id, [(player_id, role, 0) for player_id, role, _ in player_roles])
     await context.bot.send_message(
         chat_id=update.effective_chat.id,
         text=f"The game has started! Roles, descriptions, and randomness methodology have been sent to all players. Method used: {randomness_method}"
     )
-    logger.debug(f"Game {game_id} started using {randomness_method}")
+    logger.debug("Game %s started using %s", game_id, randomness_method)
 
 async def start_latest_game(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.debug("Starting the latest game created by the moderator.")
@@ -150,6 +154,12 @@ async def start_latest_game(update: ContextTypes.DEFAULT_TYPE, context: ContextT
 
     # Store game_id in context.user_data
     context.user_data['game_id'] = game_id
+    cursor.execute(
+        "INSERT INTO ActiveGames (user_id, game_id) VALUES (?, ?) "
+        "ON CONFLICT(user_id) DO UPDATE SET game_id = excluded.game_id",
+        (user_id, game_id)
+    )
+    conn.commit()
 
     # ------------------- Commented Out Section -------------------
     # Previously, confirm_and_set_roles was called here, which sends the game summary.
@@ -172,4 +182,4 @@ async def start_latest_game(update: ContextTypes.DEFAULT_TYPE, context: ContextT
         chat_id=update.effective_chat.id,
         text="The game has started successfully!"
     )
-    logger.debug(f"Game {game_id} started successfully.")
\ No newline at end of file
+    logger.debug("Game %s started successfully.", game_id)
\ No newline at end of file
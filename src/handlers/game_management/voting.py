@@ -1,21 +1,226 @@
 from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+from telegram.error import TelegramError
 from telegram.ext import ContextTypes
 import logging
 from src.db import conn, cursor
 from src.utils import generate_voting_summary
-from telegram import InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.helpers import escape_markdown  # <-- New import
+from src.game_state import versions
+from .voting_session import VotingSession
+import asyncio
+import json
+import time
 
 logger = logging.getLogger("Mafia Bot GameManagement.Voting")
 
-# Initialize a dictionary to store voting data for each game
+# Initialize a dictionary to store the VotingSession of each game
 game_voting_data = {}
 
+# Number of leading players shown in the moderator's live tally
+LEADERBOARD_SIZE = 5
+
+# -------------------- Durable voting sessions --------------------
+# Session-level fields live in VotingSessions; every vote action is appended to VotingEvents
+# as one small row. On startup the in-memory game_voting_data is rebuilt from both tables.
+
+def save_voting_session(game_id: str, new_session: bool = False) -> None:
+    """Writes the session-level fields of a voting session. Individual votes are stored as events."""
+    session = game_voting_data[game_id]
+    if new_session:
+        cursor.execute("DELETE FROM VotingEvents WHERE game_id = ?", (game_id,))
+        cursor.execute("DELETE FROM VotingPolls WHERE game_id = ?", (game_id,))
+    cursor.execute("""
+    INSERT INTO VotingSessions (game_id, anonymous, player_ids, player_names, permissions, voting_open,
+                                summary_message_id, permissions_message_id, group_chat_id, group_message_id,
+                                poll_voting, deadline_minutes, deadline)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(game_id) DO UPDATE SET
+    anonymous = excluded.anonymous,
+    player_ids = excluded.player_ids,
+    player_names = excluded.player_names,
+    permissions = excluded.permissions,
+    voting_open = excluded.voting_open,
+    summary_message_id = excluded.summary_message_id,
+    permissions_message_id = excluded.permissions_message_id,
+    group_chat_id = excluded.group_chat_id,
+    group_message_id = excluded.group_message_id,
+    poll_voting = excluded.poll_voting,
+    deadline_minutes = excluded.deadline_minutes,
+    deadline = excluded.deadline
+    """, (
+        game_id,
+        int(session.anonymous),
+        json.dumps(session.player_ids),
+        json.dumps(session.player_names),
+        json.dumps(session.permissions()),
+        int(session.voting_open),
+        session.summary_message_id,
+        session.permissions_message_id,
+        session.group_chat_id,
+        session.group_message_id,
+        int(session.use_polls),
+        session.deadline_minutes,
+        session.deadline
+    ))
+    conn.commit()
+
+def record_vote_event(game_id: str, voter_id: int, event: str, target_id: int = None, commit: bool = True) -> None:
+    """
+    Appends a single vote action ('toggle', 'reset', 'confirm' or 'remove') to the event log.
+    With commit=False it joins the caller's transaction.
+    """
+    cursor.execute(
+        "INSERT INTO VotingEvents (game_id, voter_id, event, target_id) VALUES (?, ?, ?, ?)",
+        (game_id, voter_id, event, target_id)
+    )
+    if commit:
+        conn.commit()
+
+def delete_voting_session(game_id: str) -> None:
+    cursor.execute("DELETE FROM VotingPolls WHERE game_id = ?", (game_id,))
+    cursor.execute("DELETE FROM VotingEvents WHERE game_id = ?", (game_id,))
+    cursor.execute("DELETE FROM VotingSessions WHERE game_id = ?", (game_id,))
+    conn.commit()
+
+def get_group_chat(game_id: str):
+    """The group chat bound to the game with /bindgame, if any."""
+    cursor.execute("SELECT chat_id FROM GroupChats WHERE game_id = ?", (game_id,))
+    result = cursor.fetchone()
+    return result[0] if result else None
+
+def restore_voting_sessions(game_filter=None) -> int:
+    """Rebuilds game_voting_data from the database. Returns the number of restored sessions."""
+    cursor.execute("""
+    SELECT game_id, anonymous, player_ids, player_names, permissions, voting_open,
+           summary_message_id, permissions_message_id, group_chat_id, group_message_id, poll_voting,
+           deadline_minutes, deadline
+    FROM VotingSessions
+    """)
+    sessions = cursor.fetchall()
+    restored = 0
+    for (game_id, anonymous, player_ids, player_names, permissions, voting_open,
+         summary_message_id, permissions_message_id, group_chat_id, group_message_id, poll_voting,
+         deadline_minutes, deadline) in sessions:
+        if game_filter and not game_filter(game_id):
+            continue
+        # JSON object keys are strings; user IDs are integers everywhere else
+        player_names = {int(uid): name for uid, name in json.loads(player_names).items()}
+        permissions = {int(uid): perm for uid, perm in json.loads(permissions or '{}').items()}
+        session = VotingSession(game_id, [(uid, player_names[uid]) for uid in json.loads(player_ids)], bool(anonymous))
+        session.can_vote = {uid for uid, perm in permissions.items() if perm['can_vote']}
+        session.can_be_voted = {uid for uid, perm in permissions.items() if perm['can_be_voted']}
+        session.summary_message_id = summary_message_id
+        session.permissions_message_id = permissions_message_id
+        session.group_chat_id = group_chat_id
+        session.group_message_id = group_message_id
+        session.use_polls = bool(poll_voting)
+        session.deadline_minutes = deadline_minutes or 0
+        session.deadline = deadline
+        if voting_open:
+            session.open_voting()
+        cursor.execute(
+            "SELECT voter_id, event, target_id FROM VotingEvents WHERE game_id = ? ORDER BY event_id",
+            (game_id,)
+        )
+        for voter_id, event, target_id in cursor.fetchall():
+            session.apply_event(voter_id, event, target_id)
+        game_voting_data[game_id] = session
+        restored += 1
+    logger.debug("Restored %s voting sessions from the database.", restored)
+    return restored
+
+def vote_keyboard(session: VotingSession) -> InlineKeyboardMarkup:
+    """The voting keyboard with nothing selected, built once per session and shared by all voters."""
+    reply_markup = session.keyboards.get('vote')
+    if reply_markup is None:
+        candidates = session.candidates()
+        keyboard = [
+            [InlineKeyboardButton(f"{target_username} ❌", callback_data=f"vote_{target_id}")]
+            for target_id, target_username in candidates
+        ]
+        keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data="confirm_votes")])
+        reply_markup = session.keyboards['vote'] = InlineKeyboardMarkup(keyboard)
+        # The row of each target's button, so a toggle only replaces that row
+        session.keyboards['vote_rows'] = {target_id: row for row, (target_id, _) in enumerate(candidates)}
+    return reply_markup
+
+def patch_vote_keyboard(session: VotingSession, voter_id: int, target_id: int) -> InlineKeyboardMarkup:
+    """
+    Returns the voter's keyboard with target's button matching their selection. Every other row is
+    shared with the voter's previous keyboard, and the buttons themselves are shared by all voters;
+    if the button is already right, the previous keyboard itself is returned.
+    """
+    reply_markup = session.keyboards.get(('voter', voter_id))
+    if reply_markup is None:
+        # First toggle of this voter, or the session was restored: start from their selections
+        reply_markup = vote_keyboard(session)
+        session.keyboards[('voter', voter_id)] = reply_markup
+        for selected_id in session.selected_targets(voter_id):
+            if selected_id != target_id:
+                reply_markup = patch_vote_keyboard(session, voter_id, selected_id)
+
+    row = session.keyboards['vote_rows'].get(target_id)
+    if row is None:
+        return reply_markup
+    if session.has_voted_for(voter_id, target_id):
+        button = session.keyboards.get(('selected', target_id))
+        if button is None:
+            button = InlineKeyboardButton(f"{session.player_names[target_id]} ✅", callback_data=f"vote_{target_id}")
+            session.keyboards[('selected', target_id)] = button
+    else:
+        button = vote_keyboard(session).inline_keyboard[row][0]
+    if reply_markup.inline_keyboard[row][0] is button:
+        return reply_markup
+
+    keyboard = list(reply_markup.inline_keyboard)
+    keyboard[row] = [button]
+    reply_markup = session.keyboards[('voter', voter_id)] = InlineKeyboardMarkup(keyboard)
+    return reply_markup
+
+# A voter's keyboard edits run in one application task at a time. Toggles that arrive while an
+# edit is in flight only replace the session's waiting keyboard for that voter, so a burst of
+# taps costs one edit for the final state.
+
+def schedule_vote_keyboard_edit(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE,
+                                session: VotingSession, voter_id: int, reply_markup: InlineKeyboardMarkup) -> None:
+    session.pending_keyboards[voter_id] = (update.callback_query, reply_markup)
+    if voter_id not in session.keyboard_edits:
+        session.keyboard_edits[voter_id] = context.application.create_task(
+            edit_vote_keyboard(session, voter_id), update=update
+        )
+
+async def edit_vote_keyboard(session: VotingSession, voter_id: int) -> None:
+    """Sends the voter's latest keyboard until no newer one is waiting, skipping ones already shown."""
+    try:
+        while voter_id in session.pending_keyboards:
+            query, reply_markup = session.pending_keyboards.pop(voter_id)
+            if reply_markup == session.keyboards.get(('shown', voter_id)):
+                continue
+            try:
+                await query.edit_message_reply_markup(reply_markup=reply_markup)
+            except TelegramError as e:
+                # The vote itself is recorded; only its keyboard is out of date
+                logger.error("Failed to edit message: %s", e)
+                continue
+            session.keyboards[('shown', voter_id)] = reply_markup
+    finally:
+        session.keyboard_edits.pop(voter_id, None)
+
+async def settle_vote_keyboard(session: VotingSession, voter_id: int) -> None:
+    """
+    Drops the voter's waiting keyboard and waits for an edit already in flight, so a message that
+    is about to show something else is not overwritten by a stale voting keyboard afterwards.
+    """
+    session.pending_keyboards.pop(voter_id, None)
+    task = session.keyboard_edits.get(voter_id)
+    if task is not None:
+        await asyncio.wait([task])
+
 async def announce_voting(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.debug("Announcing Voting.")
     user_id = update.effective_user.id
     game_id = context.user_data.get('game_id')
-    logger.debug(f"Announcing voting for game_id: {game_id}")
+    logger.debug("Announcing voting for game_id: %s", game_id)
 
     if not game_id:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
@@ -36,38 +241,25 @@ async def announce_voting(update: ContextTypes.DEFAULT_TYPE, context: ContextTyp
     WHERE Roles.game_id = ? AND Roles.eliminated = 0
     """, (game_id,))
     players = cursor.fetchall()
-    player_ids = [player[0] for player in players]
-    player_names = {user_id: username for user_id, username in players}
-
-    # Initialize voting data with 'anonymous' flag set to False
-    game_voting_data[game_id] = {
-        'votes': {},  # Will store individual votes for each voter
-        'voters': set(player_ids),  # Initialize voters as the set of active player IDs
-        'player_ids': player_ids,
-        'player_names': player_names,  # Store player names
-        'summary_message_id': None,  # Initialize summary message ID
-        'anonymous': False  # Flag to indicate anonymous voting
-    }
-
-    # Send voting message to each player
-    for player_id, player_username in players:
-        keyboard = []
-        for target_id, target_username in players:
-            button_text = f"{target_username} ❌"  # Voting button
-            callback_data = f"vote_{target_id}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
 
-        keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data=f"confirm_votes")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    # Initialize the voting session with 'anonymous' flag set to False; every active player votes
+    game_voting_data[game_id] = VotingSession(game_id, players, anonymous=False)
+    game_voting_data[game_id].open_voting()
+    save_voting_session(game_id, new_session=True)
 
+    # Send voting message to each player; they all start from the same keyboard
+    session = game_voting_data[game_id]
+    reply_markup = vote_keyboard(session)
+    for player_id, player_username in players:
         try:
             await context.bot.send_message(
                 chat_id=player_id,
                 text=f"📢 **Voting Session:**\nVote for a player to eliminate:",
                 reply_markup=reply_markup
             )
+            session.keyboards[('shown', player_id)] = reply_markup
         except Exception as e:
-            logger.error(f"Failed to send voting message to user {player_id}: {e}")
+            logger.error("Failed to send voting message to user %s: %s", player_id, e)
 
     # Send initial voting summary to the moderator
     await send_voting_summary(context, game_id)
@@ -76,7 +268,7 @@ async def announce_anonymous_voting(update: ContextTypes.DEFAULT_TYPE, context:
     logger.debug("Announcing Anonymous Voting.")
     user_id = update.effective_user.id
     game_id = context.user_data.get('game_id')
-    logger.debug(f"Announcing anonymous voting for game_id: {game_id}")
+    logger.debug("Announcing anonymous voting for game_id: %s", game_id)
 
     if not game_id:
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No game selected.")
@@ -97,38 +289,25 @@ async def announce_anonymous_voting(update: ContextTypes.DEFAULT_TYPE, context:
     WHERE Roles.game_id = ? AND Roles.eliminated = 0
     """, (game_id,))
     players = cursor.fetchall()
-    player_ids = [player[0] for player in players]
-    player_names = {user_id: username for user_id, username in players}
-
-    # Initialize voting data with 'anonymous' flag set to True
-    game_voting_data[game_id] = {
-        'votes': {},  # Will store individual votes for each voter
-        'voters': set(player_ids),  # Initialize voters as the set of active player IDs
-        'player_ids': player_ids,
-        'player_names': player_names,  # Store player names
-        'summary_message_id': None,  # Initialize summary message ID
-        'anonymous': True  # Flag to indicate anonymous voting
-    }
-
-    # Send voting message to each player
-    for player_id, player_username in players:
-        keyboard = []
-        for target_id, target_username in players:
-            button_text = f"{target_username} ❌"  # Voting button
-            callback_data = f"vote_{target_id}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
 
-        keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data=f"confirm_votes")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
+    # Initialize the voting session with 'anonymous' flag set to True; every active player votes
+    game_voting_data[game_id] = VotingSession(game_id, players, anonymous=True)
+    game_voting_data[game_id].open_voting()
+    save_voting_session(game_id, new_session=True)
 
+    # Send voting message to each player; they all start from the same keyboard
+    session = game_voting_data[game_id]
+    reply_markup = vote_keyboard(session)
+    for player_id, player_username in players:
         try:
             await context.bot.send_message(
                 chat_id=player_id,
                 text=f"📢 **Anonymous Voting Session:**\nVote for a player to eliminate:",
                 reply_markup=reply_markup
             )
+            session.keyboards[('shown', player_id)] = reply_markup
         except Exception as e:
-            logger.error(f"Failed to send voting message to user {player_id}: {e}")
+            logger.error("Failed to send voting message to user %s: %s", player_id, e)
 
     # Send initial voting summary to the moderator
     await send_voting_summary(context, game_id)
@@ -136,52 +315,67 @@ async def announce_anonymous_voting(update: ContextTypes.DEFAULT_TYPE, context:
 
 async def send_voting_summary(context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
     """Sends or updates the voting summary message to the moderator."""
-    logger.debug(f"Sending voting summary for game ID {game_id}.")
+    logger.debug("Sending voting summary for game ID %s.", game_id)
 
     if game_id not in game_voting_data:
-        logger.error(f"Game ID {game_id} not found in voting data.")
+        logger.error("Game ID %s not found in voting data.", game_id)
         return
 
     # Fetch moderator ID
     cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
     result = cursor.fetchone()
     if not result:
-        logger.error(f"Game ID {game_id} not found when fetching moderator.")
+        logger.error("Game ID %s not found when fetching moderator.", game_id)
         return
     moderator_id = result[0]
 
-    voted_players = [
-        game_voting_data[game_id]['player_names'][voter_id]
-        for voter_id in game_voting_data[game_id]['player_ids']
-        if voter_id not in game_voting_data[game_id]['voters']
-    ]
-    not_voted_players = [
-        game_voting_data[game_id]['player_names'][voter_id]
-        for voter_id in game_voting_data[game_id]['voters']
-    ]
+    session = game_voting_data[game_id]
+    version = versions.version(game_id, 'votes')
+    if session.summary_message_id and versions.is_shown(moderator_id, session.summary_message_id, game_id, 'voting_summary', version):
+        logger.debug("Voting summary of game %s is up to date.", game_id)
+        return
 
-    summary_message = generate_voting_summary(voted_players, not_voted_players)
-    safe_summary = escape_markdown(summary_message, version=2)  # Escape summary
+    safe_summary = versions.rendered(game_id, 'voting_summary', version)
+    if safe_summary is None:
+        voted_players = [
+            session.player_names[voter_id]
+            for voter_id in session.player_ids
+            if voter_id not in session.voters
+        ]
+        not_voted_players = [
+            session.player_names[voter_id]
+            for voter_id in session.voters
+        ]
+
+        # The moderator also sees the running tally, which is kept up to date on every toggle
+        summary_message = generate_voting_summary(voted_players, not_voted_players, session.leaderboard(LEADERBOARD_SIZE))
+        safe_summary = escape_markdown(summary_message, version=2)  # Escape summary
+        versions.store_rendered(game_id, 'voting_summary', version, safe_summary)
 
     # Check if a summary message already exists for this game
-    if game_voting_data[game_id]['summary_message_id']:
+    if session.summary_message_id and versions.is_shown(moderator_id, session.summary_message_id, game_id,
+                                                        'voting_summary', version, safe_summary):
+        # E.g. a toggle that was undone: the text is the same as before
+        logger.debug("Voting summary of game %s is unchanged.", game_id)
+    elif session.summary_message_id:
         try:
             # Edit the existing message using safe_summary
             await context.bot.edit_message_text(
                 chat_id=moderator_id,
-                message_id=game_voting_data[game_id]['summary_message_id'],
+                message_id=session.summary_message_id,
                 text=safe_summary,
                 parse_mode='MarkdownV2'  # Updated
             )
         except Exception as e:
-            logger.error(f"Failed to edit voting summary message: {e}")
+            logger.error("Failed to edit voting summary message: %s", e)
             # Optionally, send a new message if editing fails
             message = await context.bot.send_message(
                 chat_id=moderator_id,
                 text=safe_summary,
                 parse_mode='MarkdownV2'  # Updated
             )
-            game_voting_data[game_id]['summary_message_id'] = message.message_id
+            session.summary_message_id = message.message_id
+            save_voting_session(game_id)
     else:
         # Send a new message
         message = await context.bot.send_message(
@@ -189,55 +383,30 @@ async def send_voting_summary(context: ContextTypes.DEFAULT_TYPE, game_id: str)
             text=safe_summary,
             parse_mode='MarkdownV2'  # Updated
         )
-        game_voting_data[game_id]['summary_message_id'] = message.message_id
+        session.summary_message_id = message.message_id
+        save_voting_session(game_id)
+    versions.mark_shown(moderator_id, session.summary_message_id, game_id, 'voting_summary', version, safe_summary)
 
 async def handle_vote(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, target_id: int) -> None:
     logger.debug("Handling vote.")
     voter_id = update.effective_user.id
-    query = update.callback_query
 
     if game_id not in game_voting_data:
         await context.bot.send_message(chat_id=voter_id, text="Voting session not found.")
         return
 
-    if voter_id not in game_voting_data[game_id]['voters']:
+    session = game_voting_data[game_id]
+    if voter_id not in session.voters:
         await context.bot.send_message(chat_id=voter_id, text="You have already confirmed your votes.")
         return
 
-    # Initialize voter's votes if not present
-    if voter_id not in game_voting_data[game_id]['votes']:
-        game_voting_data[game_id]['votes'][voter_id] = []
-
     # Toggle vote
-    if target_id in game_voting_data[game_id]['votes'][voter_id]:
-        game_voting_data[game_id]['votes'][voter_id].remove(target_id)
-    else:
-        game_voting_data[game_id]['votes'][voter_id].append(target_id)
+    session.toggle(voter_id, target_id)
+    record_vote_event(game_id, voter_id, 'toggle', target_id)
 
-    # Rebuild the keyboard based on permissions rather than DB query
-    permissions = game_voting_data[game_id]['permissions']
-    player_names = game_voting_data[game_id]['player_names']
-    
-    # Filter only those who can be voted
-    can_be_voted_players = [(uid, player_names[uid]) for uid in permissions if permissions[uid]['can_be_voted']]
-    
-    keyboard = []
-    for target_id_loop, target_username in can_be_voted_players:
-        # Check if the voter selected this target
-        if target_id_loop in game_voting_data[game_id]['votes'][voter_id]:
-            button_text = f"{target_username} ✅"
-        else:
-            button_text = f"{target_username} ❌"
-        callback_data = f"vote_{target_id_loop}"
-        keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-
-    keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data="confirm_votes")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
-    try:
-        await query.edit_message_reply_markup(reply_markup=reply_markup)
-    except Exception as e:
-        logger.error(f"Failed to edit message: {e}")
+    # Only the toggled button changes; the edit runs in the background and absorbs later taps
+    reply_markup = patch_vote_keyboard(session, voter_id, target_id)
+    schedule_vote_keyboard_edit(update, context, session, voter_id, reply_markup)
 
 async def confirm_votes(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
     logger.debug("Confirming votes.")
@@ -248,13 +417,18 @@ async def confirm_votes(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes
         await context.bot.send_message(chat_id=voter_id, text="Voting session not found.")
         return
 
-    if voter_id not in game_voting_data[game_id]['voters']:
-        await context.bot.send_message(chat_id=voter_id, text="You have already confirmed your votes.")
+    session = game_voting_data[game_id]
+    if voter_id not in session.voters:
+        # A repeated tap after confirming; handle_button has already answered the query silently
+        logger.debug("Voter %s of game %s has already confirmed.", voter_id, game_id)
         return
 
+    # The message is about to show the confirmation instead of the voting keyboard
+    await settle_vote_keyboard(session, voter_id)
+
     # Prepare confirmation message
-    voter_votes = game_voting_data[game_id]['votes'].get(voter_id, [])
-    player_names = game_voting_data[game_id]['player_names']
+    voter_votes = session.selected_targets(voter_id)
+    player_names = session.player_names
     if voter_votes:
         voted_for_names = [player_names.get(target_id, f"User {target_id}") for target_id in voter_votes]
         confirmation_message = f"You are voting for: {', '.join(voted_for_names)}.\nAre you sure?"
@@ -283,17 +457,21 @@ async def final_confirm_vote(update: ContextTypes.DEFAULT_TYPE, context: Context
         await context.bot.send_message(chat_id=voter_id, text="Voting session not found.")
         return
 
+    session = game_voting_data[game_id]
+
     # Check if the voter is part of the game
-    if voter_id not in game_voting_data[game_id]['player_ids']:
+    if not session.is_player(voter_id):
         await context.bot.send_message(chat_id=voter_id, text="You are not part of this game.")
         return
     
-    if voter_id not in game_voting_data[game_id]['voters']:
-        await context.bot.send_message(chat_id=voter_id, text="You have already confirmed your votes.")
+    if voter_id not in session.voters:
+        # A repeated "Final Confirm" tap; handle_button has already answered the query silently
+        logger.debug("Voter %s of game %s has already confirmed.", voter_id, game_id)
         return
 
     # Remove voter from the set of active voters
-    game_voting_data[game_id]['voters'].remove(voter_id)
+    session.confirm(voter_id)
+    record_vote_event(game_id, voter_id, 'confirm')
 
     await query.edit_message_text(text="Your votes have been finally confirmed.")
 
@@ -301,7 +479,7 @@ async def final_confirm_vote(update: ContextTypes.DEFAULT_TYPE, context: Context
     await send_voting_summary(context, game_id)
 
     # Check if all players have voted
-    if not game_voting_data[game_id]['voters']:
+    if not session.voters:
         await process_voting_results(update, context, game_id)
 
 async def cancel_vote(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -316,50 +494,29 @@ async def cancel_vote(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.D
         return
 
     # Reset the voter's votes
-    game_voting_data[game_id]['votes'][voter_id] = []
-
-    # Rebuild the keyboard using permissions rather than DB
-    permissions = game_voting_data[game_id]['permissions']
-    player_names = game_voting_data[game_id]['player_names']
-    
-    can_be_voted_players = [(uid, player_names[uid]) for uid in permissions if permissions[uid]['can_be_voted']]
-
-    keyboard = []
-    for target_id_loop, target_username in can_be_voted_players:
-        button_text = f"{target_username} ✗"  # Reset to default "not voted"
-        callback_data = f"vote_{target_id_loop}"
-        keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-
-    keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data="confirm_votes")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
-
+    session = game_voting_data[game_id]
+    session.reset(voter_id)
+    record_vote_event(game_id, voter_id, 'reset')
+
+    # With nothing selected the voter is back to the shared keyboard
+    await settle_vote_keyboard(session, voter_id)
+    reply_markup = vote_keyboard(session)
+    session.keyboards[('voter', voter_id)] = reply_markup
     await query.edit_message_text(text="Vote cancelled. Please recast your votes.", reply_markup=reply_markup)
+    session.keyboards[('shown', voter_id)] = reply_markup
 
 
 async def process_voting_results(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str) -> None:
     logger.debug("Processing voting results.")
     if game_id not in game_voting_data:
-        logger.error(f"Game ID {game_id} not found in voting data.")
+        logger.error("Game ID %s not found in voting data.", game_id)
         return
 
-    # Fetch active (non-eliminated) player names
-    cursor.execute("""
-    SELECT Roles.user_id, Users.username
-    FROM Roles
-    JOIN Users ON Roles.user_id = Users.user_id
-    WHERE Roles.game_id = ? AND Roles.eliminated = 0
-    """, (game_id,))
-    players = cursor.fetchall()
-    player_names = {user_id: username for user_id, username in players}
-
-    # Count votes
-    vote_counts = {}
-    for voter_id, votes in game_voting_data[game_id]['votes'].items():
-        for voted_id in votes:
-            vote_counts[voted_id] = vote_counts.get(voted_id, 0) + 1
+    session = game_voting_data[game_id]
+    player_names = session.player_names
 
-    # Sort results
-    sorted_results = sorted(vote_counts.items(), key=lambda item: item[1], reverse=True)
+    # The tally is maintained on every toggle, so the results are already counted
+    sorted_results = session.results()
 
     # Prepare the summary message
     summary_message = "🔍 **Voting Results (Summary):**\n\n"
@@ -376,26 +533,21 @@ async def process_voting_results(update: ContextTypes.DEFAULT_TYPE, context: Con
     cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
     result = cursor.fetchone()
     if not result:
-        logger.error(f"Game ID {game_id} not found when fetching moderator.")
+        logger.error("Game ID %s not found when fetching moderator.", game_id)
         return
     moderator_id = result[0]
 
-    # Send the summary message to all players
-    for player_id in game_voting_data[game_id]['player_ids']:
-        try:
-            await context.bot.send_message(chat_id=player_id, text=safe_summary, parse_mode='MarkdownV2')
-        except Exception as e:
-            logger.error(f"Failed to send summary message to user {player_id}: {e}")
+    if session.use_polls:
+        from .poll_voting import close_voting_polls
+        await close_voting_polls(context, game_id)
 
-    # Send the summary message to the moderator
-    try:
-        await context.bot.send_message(chat_id=moderator_id, text=safe_summary, parse_mode='MarkdownV2')
-    except Exception as e:
-        logger.error(f"Failed to send voting summary to moderator {moderator_id}: {e}")
+    if session.deadline:
+        from .voting_deadline import cancel_voting_deadline
+        cancel_voting_deadline(context.job_queue, game_id)
 
     # Generate detailed voting report
     detailed_report = "🗳️ **Detailed Voting Report:**\n\n"
-    for voter_id, votes in game_voting_data[game_id]['votes'].items():
+    for voter_id, votes in session.ballots():
         voter_name = player_names.get(voter_id, f"User {voter_id}")
         if votes:
             voted_names = [player_names.get(target_id, f"User {target_id}") for target_id in votes]
@@ -407,22 +559,44 @@ async def process_voting_results(update: ContextTypes.DEFAULT_TYPE, context: Con
     # Escape detailed report
     safe_detailed_report = escape_markdown(detailed_report, version=2)
 
+    if session.group_chat_id:
+        # An open vote held in the game's group: the results are posted there once
+        from .group_voting import post_group_results
+        await post_group_results(context, session, safe_summary, safe_detailed_report)
+        del game_voting_data[game_id]
+        delete_voting_session(game_id)
+        logger.debug("Voting data for game ID %s has been cleared.", game_id)
+        return
+
+    # Send the summary message to all players
+    for player_id in session.player_ids:
+        try:
+            await context.bot.send_message(chat_id=player_id, text=safe_summary, parse_mode='MarkdownV2')
+        except Exception as e:
+            logger.error("Failed to send summary message to user %s: %s", player_id, e)
+
+    # Send the summary message to the moderator
+    try:
+        await context.bot.send_message(chat_id=moderator_id, text=safe_summary, parse_mode='MarkdownV2')
+    except Exception as e:
+        logger.error("Failed to send voting summary to moderator %s: %s", moderator_id, e)
+
     # Check if the voting was anonymous
-    anonymous = game_voting_data[game_id].get('anonymous', False)
+    anonymous = session.anonymous
 
     if anonymous:
         # Send detailed report only to the moderator
         try:
             await context.bot.send_message(chat_id=moderator_id, text=safe_detailed_report, parse_mode='MarkdownV2')
         except Exception as e:
-            logger.error(f"Failed to send detailed voting report to moderator {moderator_id}: {e}")
+            logger.error("Failed to send detailed voting report to moderator %s: %s", moderator_id, e)
     else:
         # Send the detailed report to all players
-        for player_id in game_voting_data[game_id]['player_ids']:
+        for player_id in session.player_ids:
             try:
                 await context.bot.send_message(chat_id=player_id, text=safe_detailed_report, parse_mode='MarkdownV2')
             except Exception as e:
-                logger.error(f"Failed to send detailed voting report to user {player_id}: {e}")
+                logger.error("Failed to send detailed voting report to user %s: %s", player_id, e)
                 # Notify the moderator about the failure
                 try:
                     await context.bot.send_message(
@@ -430,24 +604,26 @@ async def process_voting_results(update: ContextTypes.DEFAULT_TYPE, context: Con
                         text=f"⚠️ Failed to send detailed voting report to user {player_id}."
                     )
                 except Exception as ex:
-                    logger.error(f"Failed to notify moderator about failed message to user {player_id}: {ex}")
+                    logger.error("Failed to notify moderator about failed message to user %s: %s", player_id, ex)
 
         # Send the detailed report to the moderator
         try:
             await context.bot.send_message(chat_id=moderator_id, text=safe_detailed_report, parse_mode='MarkdownV2')
         except Exception as e:
-            logger.error(f"Failed to send detailed voting report to moderator {moderator_id}: {e}")
+            logger.error("Failed to send detailed voting report to moderator %s: %s", moderator_id, e)
 
     # Clean up voting data for the game
     del game_voting_data[game_id]
-    logger.debug(f"Voting data for game ID {game_id} has been cleared.")
+    delete_voting_session(game_id)
+    logger.debug("Voting data for game ID %s has been cleared.", game_id)
 
 
 
-async def prompt_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, anonymous: bool) -> None:
+async def prompt_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, anonymous: bool, use_polls: bool = False) -> None:
     """
     Prompt the moderator with a list of players and their default voting permissions.
     Moderator can toggle "Can Vote" and "Can be Voted" for each player.
+    With use_polls, voters answer a Telegram poll instead of a button keyboard.
     """
     # Fetch the moderator ID
     cursor.execute("SELECT moderator_id FROM Games WHERE game_id = ?", (game_id,))
@@ -466,17 +642,16 @@ async def prompt_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context:
     """, (game_id,))
     players = cursor.fetchall()
 
-    # Initialize permissions in memory
-    # By default everyone can vote and be voted
-    game_voting_data[game_id] = {
-        'votes': {},
-        'player_ids': [p[0] for p in players],
-        'player_names': {p[0]: p[1] for p in players},
-        'summary_message_id': None,
-        'anonymous': anonymous,
-        'permissions': {p[0]: {'can_vote': True, 'can_be_voted': True} for p in players},
-        'voters': set(),  # Will fill after confirmation based on can_vote
-    }
+    # Initialize the session in memory
+    # By default everyone can vote and be voted; voters are filled after confirmation based on can_vote
+    game_voting_data[game_id] = VotingSession(game_id, players, anonymous=anonymous)
+    game_voting_data[game_id].use_polls = use_polls
+    from .voting_deadline import default_deadline_minutes
+    game_voting_data[game_id].deadline_minutes = default_deadline_minutes
+    if not anonymous:
+        # Open votes of a game bound to a group are cast on one shared message there
+        game_voting_data[game_id].group_chat_id = get_group_chat(game_id)
+    save_voting_session(game_id, new_session=True)
 
     # Build the initial permissions keyboard
     await show_voting_permissions(update, context, game_id, moderator_id)
@@ -484,16 +659,15 @@ async def prompt_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context:
 
 async def show_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE, game_id: str, moderator_id: int, message_id=None) -> None:
     """Show the current voting permissions in a nicely formatted table to the moderator."""
-    permissions = game_voting_data[game_id]['permissions']
-    player_names = game_voting_data[game_id]['player_names']
+    session = game_voting_data[game_id]
 
     keyboard = []
     # Header row (You can skip or include as text)
     # We'll send the header as a separate message text instead.
     # Rows: [Can Vote - Name - Can be Voted]
-    for user_id, name in player_names.items():
-        can_vote = "✅" if permissions[user_id]['can_vote'] else "❌"
-        can_be_voted = "✅" if permissions[user_id]['can_be_voted'] else "❌"
+    for user_id, name in session.player_names.items():
+        can_vote = "✅" if user_id in session.can_vote else "❌"
+        can_be_voted = "✅" if user_id in session.can_be_voted else "❌"
         
         keyboard.append([
             InlineKeyboardButton(can_vote, callback_data=f"toggle_can_vote_{user_id}"),
@@ -501,6 +675,10 @@ async def show_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context: Co
             InlineKeyboardButton(can_be_voted, callback_data=f"toggle_can_be_voted_{user_id}")
         ])
 
+    # The round closes by itself at the deadline; tapping switches to the next choice
+    deadline = f"⏱ Deadline: {session.deadline_minutes} min" if session.deadline_minutes else "⏱ No deadline"
+    keyboard.append([InlineKeyboardButton(deadline, callback_data="cycle_voting_deadline")])
+
     # Add a confirmation button at the bottom
     keyboard.append([InlineKeyboardButton("Confirm & Start Voting", callback_data="confirm_permissions")])
 
@@ -521,7 +699,8 @@ async def show_voting_permissions(update: ContextTypes.DEFAULT_TYPE, context: Co
             reply_markup=reply_markup
         )
         # Store the message_id if needed
-        game_voting_data[game_id]['permissions_message_id'] = sent_msg.message_id
+        session.permissions_message_id = sent_msg.message_id
+        save_voting_session(game_id)
 
 
 async def handle_voting_permission_toggle(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -534,26 +713,26 @@ async def handle_voting_permission_toggle(update: ContextTypes.DEFAULT_TYPE, con
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No active voting session.")
         return
 
-    permissions = game_voting_data[game_id]['permissions']
+    session = game_voting_data[game_id]
 
     if data.startswith("toggle_can_vote_"):
         # This means we are toggling the 'can_vote' permission
         target_user_id = int(data.replace("toggle_can_vote_", ""))
-        current = permissions[target_user_id]['can_vote']
-        permissions[target_user_id]['can_vote'] = not current
+        session.toggle_permission(target_user_id, 'can_vote')
     elif data.startswith("toggle_can_be_voted_"):
         # This means we are toggling the 'can_be_voted' permission
         target_user_id = int(data.replace("toggle_can_be_voted_", ""))
-        current = permissions[target_user_id]['can_be_voted']
-        permissions[target_user_id]['can_be_voted'] = not current
+        session.toggle_permission(target_user_id, 'can_be_voted')
     else:
         # Unknown action
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Unknown toggle action.")
         return
 
+    save_voting_session(game_id)
+
     moderator_id = update.effective_chat.id
     # Now redraw the permissions keyboard with updated states
-    await show_voting_permissions(update, context, game_id, moderator_id, message_id=game_voting_data[game_id].get('permissions_message_id'))
+    await show_voting_permissions(update, context, game_id, moderator_id, message_id=session.permissions_message_id)
 
 
 
@@ -567,42 +746,51 @@ async def confirm_permissions(update: ContextTypes.DEFAULT_TYPE, context: Contex
         await context.bot.send_message(chat_id=update.effective_chat.id, text="No active voting session.")
         return
     
-    permissions = game_voting_data[game_id]['permissions']
+    session = game_voting_data[game_id]
     # Set the voters set to those who can vote
-    voters = [uid for uid, perm in permissions.items() if perm['can_vote']]
-    game_voting_data[game_id]['voters'] = set(voters)
+    voters = session.open_voting()
+    if session.deadline_minutes:
+        session.deadline = time.time() + session.deadline_minutes * 60
+    save_voting_session(game_id)
+    if session.deadline:
+        from .voting_deadline import schedule_voting_deadline
+        schedule_voting_deadline(context.job_queue, session)
+
+    if session.group_chat_id:
+        # One shared voting message in the game's group instead of a message to every voter
+        from .group_voting import post_group_voting
+        if await post_group_voting(context, game_id):
+            await context.bot.edit_message_reply_markup(chat_id=query.message.chat_id, message_id=query.message.message_id, reply_markup=None)
+            return
+
+    if session.use_polls:
+        # Voters select their targets in a poll on their own device; only their answers reach the bot
+        from .poll_voting import send_voting_polls
+        if await send_voting_polls(context, game_id, voters):
+            await send_voting_summary(context, game_id)
+            await context.bot.edit_message_reply_markup(chat_id=query.message.chat_id, message_id=query.message.message_id, reply_markup=None)
+            return
 
     # Now proceed with sending voting messages only to those who can vote
     # and include only players who can be voted.
 
-    # Prepare lists
-    can_be_voted_players = [(uid, game_voting_data[game_id]['player_names'][uid]) 
-                            for uid, perm in permissions.items() if perm['can_be_voted']]
-    
-    # Send voting messages to each player who can vote
+    # Send voting messages to each player who can vote; they all start from the same keyboard
+    reply_markup = vote_keyboard(session)
+    if session.anonymous:
+        vote_text = "📢 **Anonymous Voting Session:**\nVote for a player to eliminate:"
+    else:
+        vote_text = "📢 **Voting Session:**\nVote for a player to eliminate:"
     for voter_id in voters:
-        keyboard = []
-        for target_id, target_username in can_be_voted_players:
-            button_text = f"{target_username} ❌"
-            callback_data = f"vote_{target_id}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=callback_data)])
-        keyboard.append([InlineKeyboardButton("Confirm Votes", callback_data=f"confirm_votes")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-
         try:
-            if game_voting_data[game_id]['anonymous']:
-                vote_text = "📢 **Anonymous Voting Session:**\nVote for a player to eliminate:"
-            else:
-                vote_text = "📢 **Voting Session:**\nVote for a player to eliminate:"
-
             await context.bot.send_message(
                 chat_id=voter_id,
                 text=vote_text,
                 parse_mode='Markdown',
                 reply_markup=reply_markup
             )
+            session.keyboards[('shown', voter_id)] = reply_markup
         except Exception as e:
-            logger.error(f"Failed to send voting message to user {voter_id}: {e}")
+            logger.error("Failed to send voting message to user %s: %s", voter_id, e)
 
     # Send initial voting summary to the moderator
     await send_voting_summary(context, game_id)
@@ -0,0 +1,117 @@
+from telegram.ext import ContextTypes
+import logging
+import os
+import time
+from .voting import (game_voting_data, record_vote_event, save_voting_session, process_voting_results,
+                     show_voting_permissions)
+
+logger = logging.getLogger("Mafia Bot GameManagement.VotingDeadline")
+
+# Deadline of a voting round in minutes unless the moderator picks another one; 0 means none
+VOTING_DEADLINE_ENV = "MAFIA_BOT_VOTING_DEADLINE_MINUTES"
+default_deadline_minutes = int(os.environ.get(VOTING_DEADLINE_ENV, 0))
+
+# Deadlines the moderator cycles through on the permissions keyboard
+DEADLINE_CHOICES = (0, 2, 5, 10, 15, 30, 60)
+
+# Seconds before the deadline at which voters who have not confirmed are reminded
+REMINDER_OFFSETS = (300, 60)
+
+# -------------------- Voting deadlines --------------------
+# Each timed round schedules its reminders and its deadline as one-off jobs on the Application's
+# JobQueue. The scheduler keeps jobs ordered by run time and sleeps until the next one is due,
+# so thousands of open rounds cost nothing until a timer fires. Jobs of a round share its name
+# and carry its deadline, so a job left over from an earlier round of the same game does nothing.
+
+def job_name(game_id: str) -> str:
+    return f"voting_deadline:{game_id}"
+
+def schedule_voting_deadline(job_queue, session) -> None:
+    """Schedules the reminders and the automatic close of a round whose deadline is set."""
+    if not session.deadline:
+        return
+    if job_queue is None:
+        logger.warning("No JobQueue, the deadline of game %s is not enforced. "
+                       "Install python-telegram-bot[job-queue].", session.game_id)
+        return
+    cancel_voting_deadline(job_queue, session.game_id)
+    data = {'game_id': session.game_id, 'deadline': session.deadline}
+    remaining = session.deadline - time.time()
+    for offset in REMINDER_OFFSETS:
+        if remaining > offset:
+            job_queue.run_once(remind_voters, remaining - offset, data=data, name=job_name(session.game_id))
+    job_queue.run_once(close_expired_voting, max(remaining, 0), data=data, name=job_name(session.game_id))
+    logger.debug("Voting deadline of game %s in %.0f s.", session.game_id, remaining)
+
+def cancel_voting_deadline(job_queue, game_id: str) -> None:
+    if job_queue is None:
+        return
+    for job in job_queue.get_jobs_by_name(job_name(game_id)):
+        job.schedule_removal()
+
+def schedule_restored_deadlines(job_queue) -> int:
+    """Reschedules the deadlines of the voting sessions restored at startup. Returns their number."""
+    scheduled = 0
+    for session in game_voting_data.values():
+        if session.voting_open and session.deadline:
+            schedule_voting_deadline(job_queue, session)
+            scheduled += 1
+    return scheduled
+
+def current_session(job):
+    """The session a job was scheduled for, or None if that round has ended since."""
+    session = game_voting_data.get(job.data['game_id'])
+    if session is None or session.deadline != job.data['deadline']:
+        return None
+    return session
+
+async def remind_voters(context: ContextTypes.DEFAULT_TYPE) -> None:
+    session = current_session(context.job)
+    if session is None or not session.voters:
+        return
+    minutes = max(1, round((session.deadline - time.time()) / 60))
+    text = f"⏰ Voting closes in {minutes} minute(s). Please confirm your vote."
+    if session.group_chat_id:
+        waiting = [session.player_names[user_id] for user_id in session.player_ids if user_id in session.voters]
+        try:
+            await context.bot.send_message(chat_id=session.group_chat_id, text=f"{text}\nWaiting for: {', '.join(waiting)}")
+        except Exception as e:
+            logger.error("Failed to send voting reminder to group %s: %s", session.group_chat_id, e)
+        return
+    for voter_id in session.voters:
+        try:
+            await context.bot.send_message(chat_id=voter_id, text=text)
+        except Exception as e:
+            logger.error("Failed to send voting reminder to user %s: %s", voter_id, e)
+
+async def close_expired_voting(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Ends a round at its deadline. Votes that were never confirmed are not counted."""
+    session = current_session(context.job)
+    if session is None:
+        return
+    game_id = session.game_id
+    logger.debug("Voting deadline of game %s reached with %s unconfirmed voters.", game_id, len(session.voters))
+    for voter_id in list(session.voters):
+        session.reset(voter_id)
+        record_vote_event(game_id, voter_id, 'reset')
+    await process_voting_results(None, context, game_id)
+
+async def cycle_voting_deadline(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """The deadline button of the permissions keyboard: switches to the next choice."""
+    query = update.callback_query
+    await query.answer()
+
+    game_id = context.user_data.get('game_id')
+    if not game_id or game_id not in game_voting_data:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="No active voting session.")
+        return
+
+    session = game_voting_data[game_id]
+    choices = list(DEADLINE_CHOICES)
+    if session.deadline_minutes not in choices:
+        choices.append(session.deadline_minutes)
+        choices.sort()
+    session.deadline_minutes = choices[(choices.index(session.deadline_minutes) + 1) % len(choices)]
+    save_voting_session(game_id)
+
+    await show_voting_permissions(update, context, game_id, update.effective_chat.id, message_id=session.permissions_message_id)
@@ -0,0 +1,164 @@
+from src.game_state import versions
+
+
+class VotingSession:
+    """
+    In-memory state of one voting session.
+
+    Players are addressed by their index in player_ids. Each voter's selection is an int bitmask
+    over those indexes, and a running tally per index is updated on every toggle, so results
+    never require recounting the votes. Every change bumps the game's 'votes' version.
+    """
+
+    __slots__ = (
+        'game_id', 'anonymous', 'player_ids', 'player_names', '_index',
+        'can_vote', 'can_be_voted', 'voters', 'voting_open',
+        '_selections', '_tally', 'summary_message_id', 'permissions_message_id',
+        'group_chat_id', 'group_message_id', 'use_polls', 'deadline_minutes', 'deadline', 'keyboards',
+        'pending_keyboards', 'keyboard_edits'
+    )
+
+    def __init__(self, game_id: str, players: list, anonymous: bool = False):
+        """
+        :param players: List of (user_id, username) tuples of the active players.
+        """
+        self.game_id = game_id
+        self.anonymous = anonymous
+        self.player_ids = [user_id for user_id, _ in players]
+        self.player_names = {user_id: username for user_id, username in players}
+        self._index = {user_id: index for index, user_id in enumerate(self.player_ids)}
+        # By default everyone can vote and be voted
+        self.can_vote = set(self.player_ids)
+        self.can_be_voted = set(self.player_ids)
+        self.voters = set()  # Voters who have not confirmed yet; filled when voting opens
+        self.voting_open = False
+        self._selections = {}  # voter_id -> bitmask of selected player indexes
+        self._tally = [0] * len(self.player_ids)
+        self.summary_message_id = None
+        self.permissions_message_id = None
+        # Set when the votes are cast on one shared message in the game's group chat
+        self.group_chat_id = None
+        self.group_message_id = None
+        # Set when every voter answers a Telegram poll instead of a button keyboard
+        self.use_polls = False
+        # Length of the round picked by the moderator, and the time.time() at which it closes
+        self.deadline_minutes = 0
+        self.deadline = None
+        # Keyboards rendered for this session by the voting views, dropped with it
+        self.keyboards = {}
+        # Per voter: the (query, markup) waiting to be sent, and the task sending their edits
+        self.pending_keyboards = {}
+        self.keyboard_edits = {}
+        versions.bump(game_id, 'votes')
+
+    # -------------------- Permissions --------------------
+
+    def toggle_permission(self, user_id: int, permission: str) -> bool:
+        """Toggles 'can_vote' or 'can_be_voted' for a player. Returns the new value."""
+        members = self.can_vote if permission == 'can_vote' else self.can_be_voted
+        versions.bump(self.game_id, 'votes')
+        self.keyboards.clear()
+        if user_id in members:
+            members.discard(user_id)
+            return False
+        members.add(user_id)
+        return True
+
+    def permissions(self) -> dict:
+        return {
+            user_id: {'can_vote': user_id in self.can_vote, 'can_be_voted': user_id in self.can_be_voted}
+            for user_id in self.player_ids
+        }
+
+    def open_voting(self) -> list:
+        """Starts the actual voting. Returns the voters, in player order."""
+        voters = [user_id for user_id in self.player_ids if user_id in self.can_vote]
+        self.voters = set(voters)
+        self.voting_open = True
+        versions.bump(self.game_id, 'votes')
+        return voters
+
+    def candidates(self) -> list:
+        """Returns (user_id, username) of the players that can be voted, in player order."""
+        return [(user_id, self.player_names[user_id]) for user_id in self.player_ids if user_id in self.can_be_voted]
+
+    def is_player(self, user_id: int) -> bool:
+        return user_id in self._index
+
+    # -------------------- Votes --------------------
+
+    def toggle(self, voter_id: int, target_id: int) -> bool:
+        """Toggles the voter's vote for target. Returns True if the target is now selected."""
+        index = self._index.get(target_id)
+        if index is None:
+            return False
+        bit = 1 << index
+        mask = self._selections.get(voter_id, 0) ^ bit
+        self._selections[voter_id] = mask
+        versions.bump(self.game_id, 'votes')
+        if mask & bit:
+            self._tally[index] += 1
+            return True
+        self._tally[index] -= 1
+        return False
+
+    def reset(self, voter_id: int) -> None:
+        """Clears all of the voter's votes."""
+        self._remove_from_tally(self._selections.get(voter_id, 0))
+        self._selections[voter_id] = 0
+        versions.bump(self.game_id, 'votes')
+
+    def confirm(self, voter_id: int) -> None:
+        self.voters.discard(voter_id)
+        versions.bump(self.game_id, 'votes')
+
+    def remove_voter(self, voter_id: int) -> None:
+        """Removes an eliminated player's votes and their pending confirmation."""
+        self.voters.discard(voter_id)
+        self.can_vote.discard(voter_id)
+        self._remove_from_tally(self._selections.pop(voter_id, 0))
+        versions.bump(self.game_id, 'votes')
+
+    def _remove_from_tally(self, mask: int) -> None:
+        index = 0
+        while mask:
+            if mask & 1:
+                self._tally[index] -= 1
+            mask >>= 1
+            index += 1
+
+    def has_voted_for(self, voter_id: int, target_id: int) -> bool:
+        index = self._index.get(target_id)
+        return index is not None and bool(self._selections.get(voter_id, 0) >> index & 1)
+
+    def votes_for(self, target_id: int) -> int:
+        index = self._index.get(target_id)
+        return self._tally[index] if index is not None else 0
+
+    def selected_targets(self, voter_id: int) -> list:
+        mask = self._selections.get(voter_id, 0)
+        return [user_id for index, user_id in enumerate(self.player_ids) if mask >> index & 1]
+
+    def ballots(self) -> list:
+        """Returns (voter_id, [target_ids]) for every voter who has touched their ballot."""
+        return [(voter_id, self.selected_targets(voter_id)) for voter_id in self._selections]
+
+    def results(self) -> list:
+        """Returns (user_id, vote_count) of every player with votes, most votes first."""
+        counted = [(self.player_ids[index], count) for index, count in enumerate(self._tally) if count]
+        return sorted(counted, key=lambda item: item[1], reverse=True)
+
+    def leaderboard(self, limit: int = None) -> list:
+        """Returns (username, vote_count) of the leading players."""
+        return [(self.player_names[user_id], count) for user_id, count in self.results()[:limit]]
+
+    def apply_event(self, voter_id: int, event: str, target_id: int = None) -> None:
+        """Applies a vote action. Used both by the live handlers and when replaying the event log."""
+        if event == 'toggle':
+            self.toggle(voter_id, target_id)
+        elif event == 'reset':
+            self.reset(voter_id)
+        elif event == 'confirm':
+            self.confirm(voter_id)
+        elif event == 'remove':
+            self.remove_voter(voter_id)
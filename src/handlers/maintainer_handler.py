@@ -0,0 +1,194 @@
+from telegram.ext import CommandHandler, ContextTypes
+import asyncio
+import io
+import logging
+from src import config
+from src.api_metrics import tracker
+from src.loop_monitor import monitor
+from src.metrics import registry
+from src.profiling import cpu_profiler, memory_profiler
+from src.sql_profiler import profiler
+from src.handlers.button_handler import game_locks
+from src.handlers.game_management.voting import game_voting_data
+
+logger = logging.getLogger("Mafia Bot MaintainerHandler")
+
+# Default and maximum duration of a profile, in seconds
+DEFAULT_CPU_PROFILE_SECONDS = 30
+DEFAULT_MEMORY_PROFILE_SECONDS = 60
+MAX_PROFILE_SECONDS = 600
+
+# Tasks that end the running profiles once their time is up
+profile_tasks = {}
+
+memory_profiler.watch("game_voting_data", lambda: len(game_voting_data))
+memory_profiler.watch("game_locks", lambda: len(game_locks))
+
+
+def is_maintainer(update: ContextTypes.DEFAULT_TYPE) -> bool:
+    return str(update.effective_user.id) == str(config.MAINTAINER_ID)
+
+
+async def metrics_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Sends the slowest routes as a message and the full Prometheus dump as a file."""
+    if not is_maintainer(update):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
+        return
+    logger.debug("Maintainer requested the metrics dump.")
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=registry.render_summary())
+    await context.bot.send_document(
+        chat_id=update.effective_chat.id,
+        document=io.BytesIO(registry.render_prometheus().encode()),
+        filename="metrics.txt"
+    )
+
+
+async def sql_profile_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /sqlprofile on|off|reset — toggles or clears the SQL profiler.
+    /sqlprofile [N] — sends the top N statements by cumulative time (default 10).
+    """
+    if not is_maintainer(update):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
+        return
+    argument = context.args[0].lower() if context.args else ""
+    if argument in ("on", "off"):
+        profiler.enabled = argument == "on"
+        logger.info("SQL profiler turned %s by the maintainer.", argument)
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=f"SQL profiler is now {argument}.")
+    elif argument == "reset":
+        profiler.reset()
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="SQL profiler statistics cleared.")
+    else:
+        limit = int(argument) if argument.isdigit() else 10
+        report = profiler.report(limit)
+        if len(report) > 4000:
+            await context.bot.send_document(
+                chat_id=update.effective_chat.id,
+                document=io.BytesIO(report.encode()),
+                filename="sql_profile.txt"
+            )
+        else:
+            await context.bot.send_message(chat_id=update.effective_chat.id, text=report)
+
+
+async def api_stats_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /apistats [N] — sends Bot API call statistics for the N busiest methods (default 10).
+    /apistats reset — clears them.
+    """
+    if not is_maintainer(update):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
+        return
+    argument = context.args[0].lower() if context.args else ""
+    if argument == "reset":
+        tracker.reset()
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="Bot API statistics cleared.")
+        return
+    limit = int(argument) if argument.isdigit() else 10
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=tracker.report(limit))
+
+async def loop_lag_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /looplag [N] — sends event loop lag percentiles and the stacks of the last N stalls (default 3).
+    /looplag reset — clears them.
+    """
+    if not is_maintainer(update):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
+        return
+    argument = context.args[0].lower() if context.args else ""
+    if argument == "reset":
+        monitor.reset()
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="Event loop lag statistics cleared.")
+        return
+    if not monitor.enabled:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="The event loop lag monitor is off.")
+        return
+    limit = int(argument) if argument.isdigit() else 3
+    report = monitor.report(limit)
+    if len(report) > 4000:
+        await context.bot.send_document(
+            chat_id=update.effective_chat.id,
+            document=io.BytesIO(report.encode()),
+            filename="loop_lag.txt"
+        )
+    else:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=report)
+
+def profile_seconds(argument: str, default: int) -> int:
+    return min(int(argument), MAX_PROFILE_SECONDS) if argument.isdigit() and int(argument) > 0 else default
+
+
+async def send_cpu_profile(bot, chat_id: int) -> None:
+    cpu_profiler.stop()
+    await bot.send_message(chat_id=chat_id, text=cpu_profiler.summary())
+    await bot.send_document(chat_id=chat_id, document=io.BytesIO(cpu_profiler.collapsed().encode()),
+                            filename="cpu_profile.collapsed.txt")
+
+
+async def send_memory_profile(bot, chat_id: int) -> None:
+    summary, details = memory_profiler.stop()
+    await bot.send_message(chat_id=chat_id, text=summary[:4000])
+    await bot.send_document(chat_id=chat_id, document=io.BytesIO(details.encode()), filename="memory_diff.txt")
+
+
+async def finish_profile_later(name: str, seconds: int, finish, bot, chat_id: int) -> None:
+    await asyncio.sleep(seconds)
+    profile_tasks.pop(name, None)
+    try:
+        await finish(bot, chat_id)
+    except Exception as e:
+        logger.error("Failed to send the %s profile: %s", name, e)
+
+
+async def run_profile_command(update, context, name: str, command: str, target, default_seconds: int,
+                              finish) -> None:
+    """Shared flow of /cpuprofile and /memprofile: start for a bounded time, or stop early."""
+    if not is_maintainer(update):
+        await context.bot.send_message(chat_id=update.effective_chat.id, text="You are not authorized to perform this action.")
+        return
+    chat_id = update.effective_chat.id
+    argument = context.args[0].lower() if context.args else ""
+    if argument == "stop":
+        task = profile_tasks.pop(name, None)
+        if task is None or not target.running:
+            await context.bot.send_message(chat_id=chat_id, text=f"No {name} profile is running.")
+            return
+        task.cancel()
+        await finish(context.bot, chat_id)
+        return
+    if target.running:
+        await context.bot.send_message(chat_id=chat_id, text=f"A {name} profile is already running.")
+        return
+    seconds = profile_seconds(argument, default_seconds)
+    target.start()
+    profile_tasks[name] = asyncio.create_task(finish_profile_later(name, seconds, finish, context.bot, chat_id))
+    logger.info("Maintainer started a %s profile for %s s.", name, seconds)
+    await context.bot.send_message(chat_id=chat_id, text=f"Profiling {name} for {seconds} s. Send /{command} stop to end it early.")
+
+
+async def cpu_profile_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /cpuprofile [seconds] — samples the event loop thread, then sends the hottest functions and a
+    collapsed-stack file for a flame graph.
+    /cpuprofile stop — ends the profile early.
+    """
+    await run_profile_command(update, context, "cpu", "cpuprofile", cpu_profiler, DEFAULT_CPU_PROFILE_SECONDS, send_cpu_profile)
+
+
+async def memory_profile_command(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    /memprofile [seconds] — diffs tracemalloc snapshots taken at the start and the end, and the sizes
+    of game_voting_data and game_locks.
+    /memprofile stop — ends the profile early.
+    """
+    await run_profile_command(update, context, "memory", "memprofile", memory_profiler,
+                              DEFAULT_MEMORY_PROFILE_SECONDS, send_memory_profile)
+
+# Create the handler instances
+metrics_handler = CommandHandler("metrics", metrics_command)
+sql_profile_handler = CommandHandler("sqlprofile", sql_profile_command)
+api_stats_handler = CommandHandler("apistats", api_stats_command)
+loop_lag_handler = CommandHandler("looplag", loop_lag_command)
+cpu_profile_handler = CommandHandler("cpuprofile", cpu_profile_command)
+memory_profile_handler = CommandHandler("memprofile", memory_profile_command)
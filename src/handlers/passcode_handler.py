@@ -4,9 +4,11 @@ import logging
 from src.handlers.game_management.base import get_player_count
 from src.handlers.game_management.join_game import join_game
 from src.handlers.game_management.start_game import start_game
-from src.roles import role_templates, pending_templates, save_role_templates
+from src.handlers.game_management.faction_index import send_faction_message
+from src import roles
 from src.db import conn, cursor
-from src.config import MAINTAINER_ID
+from src import config
+from src.metrics import instrumented
 import json
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
@@ -14,6 +16,7 @@ from telegram.helpers import escape_markdown  # newly added import
 
 logger = logging.getLogger("Mafia Bot PasscodeHandler")
 
+@instrumented(lambda update, context: f"passcode:{context.user_data.get('action') or 'none'}")
 async def handle_passcode(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.debug("Handling a text message.")
     user_input = update.message.text.strip()
@@ -64,6 +67,9 @@ async def handle_passcode(update: ContextTypes.DEFAULT_TYPE, context: ContextTyp
     elif action == "start_game":
         await start_game(update, context, user_input)
 
+    elif action == "awaiting_faction_message":
+        await send_faction_message(update, context, user_input)
+
     elif action == "awaiting_template_name_confirmation":
         # Handle the input as template name and save as pending
         await handle_template_confirmation(update, context, user_input)
@@ -81,8 +87,8 @@ async def handle_template_confirmation(update: ContextTypes.DEFAULT_TYPE, contex
 
     # Get roles from the database
     cursor.execute("SELECT role, count FROM GameRoles WHERE game_id = ?", (game_id,))
-    roles = {role: count for role, count in cursor.fetchall()}
-    context.user_data['roles_for_template'] = roles
+    game_roles = {role: count for role, count in cursor.fetchall()}
+    context.user_data['roles_for_template'] = game_roles
 
     # Get player count
     player_count = get_player_count(game_id)
@@ -112,13 +118,13 @@ async def save_template_as_pending(update: ContextTypes.DEFAULT_TYPE, context: C
     template_name_with_count = f"{template_name} - {player_count}"
 
     # Check if the template name already exists in active templates
-    existing_templates = role_templates.get(str(player_count), [])
+    existing_templates = roles.role_templates.get(str(player_count), [])
     if any(t['name'] == template_name_with_count for t in existing_templates):
         await context.bot.send_message(chat_id=update.effective_chat.id, text="A template with this name already exists. Please use a different name.")
         return
 
     # Check if the template name already exists in pending templates
-    existing_pending = pending_templates.get(str(player_count), [])
+    existing_pending = roles.pending_templates.get(str(player_count), [])
     if any(t['name'] == template_name_with_count for t in existing_pending):
         await context.bot.send_message(chat_id=update.effective_chat.id, text="This template is already pending confirmation.")
         return
@@ -129,12 +135,12 @@ async def save_template_as_pending(update: ContextTypes.DEFAULT_TYPE, context: C
     }
 
     # Load existing pending templates
-    if str(player_count) not in pending_templates:
-        pending_templates[str(player_count)] = []
-    pending_templates[str(player_count)].append(new_template)
+    if str(player_count) not in roles.pending_templates:
+        roles.pending_templates[str(player_count)] = []
+    roles.pending_templates[str(player_count)].append(new_template)
 
     # Save the updated templates
-    save_role_templates(role_templates, pending_templates)
+    roles.save_role_templates(roles.role_templates, roles.pending_templates)
 
     # Notify the maintainer
     template_details = json.dumps(new_template, indent=2)
@@ -150,13 +156,13 @@ async def save_template_as_pending(update: ContextTypes.DEFAULT_TYPE, context: C
         message = f"New role template pending confirmation:\n```{template_details}```"
         safe_text = escape_markdown(message, version=2)
         await context.bot.send_message(
-            chat_id=MAINTAINER_ID,
+            chat_id=config.MAINTAINER_ID,
             text=safe_text,
             parse_mode='MarkdownV2',
             reply_markup=confirmation_markup
         )
     except Exception as e:
-        logger.error(f"Failed to send confirmation message to maintainer: {e}")
+        logger.error("Failed to send confirmation message to maintainer: %s", e)
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Failed to notify the maintainer. The template is saved as pending.")
 
     await context.bot.send_message(chat_id=update.effective_chat.id, text=f"Template '{template_name_with_count}' is pending confirmation by the maintainer.")
@@ -173,4 +179,5 @@ def is_valid_passcode(text):
     return bool(pattern.match(text))
 
 # Create the handler instance
-passcode_handler = MessageHandler(filters.TEXT & ~filters.COMMAND, handle_passcode)
+# Group chats only take commands; their messages are not answers to the bot's prompts
+passcode_handler = MessageHandler(filters.TEXT & ~filters.COMMAND & filters.ChatType.PRIVATE, handle_passcode)
@@ -4,18 +4,19 @@ import logging
 
 logger = logging.getLogger("Mafia Bot StartHandler")
 
+# The main menu never changes, so it is built once and shared by every /start
+START_MENU = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Create Game", callback_data="create_game")],
+    [InlineKeyboardButton("Join Game", callback_data="join_game")],
+    [InlineKeyboardButton("Set Roles", callback_data="set_roles")],
+    [InlineKeyboardButton("Select Template", callback_data="select_template")],
+    [InlineKeyboardButton("Manage Games", callback_data="manage_games")],  # Updated button
+])
+
 async def start(update: ContextTypes.DEFAULT_TYPE, context: ContextTypes.DEFAULT_TYPE) -> None:
     logger.debug("Handling /start command.")
-    keyboard = [
-        [InlineKeyboardButton("Create Game", callback_data="create_game")],
-        [InlineKeyboardButton("Join Game", callback_data="join_game")],
-        [InlineKeyboardButton("Set Roles", callback_data="set_roles")],
-        [InlineKeyboardButton("Select Template", callback_data="select_template")],
-        [InlineKeyboardButton("Manage Games", callback_data="manage_games")],  # Updated button
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     message = "Welcome to the Mafia Game Bot!"
-    await context.bot.send_message(chat_id=update.effective_chat.id, text=message, reply_markup=reply_markup)
+    await context.bot.send_message(chat_id=update.effective_chat.id, text=message, reply_markup=START_MENU)
 
 # Create the handler instance
 start_handler = CommandHandler("start", start)
\ No newline at end of file
@@ -0,0 +1,156 @@
+import asyncio
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime
+from src import metrics
+
+logger = logging.getLogger("Mafia Bot LoopMonitor")
+
+# Loop lag (in milliseconds) above which the blocking code is sampled; 0 turns the monitor off
+LOOP_LAG_THRESHOLD_ENV = "MAFIA_BOT_LOOP_LAG_THRESHOLD_MS"
+DEFAULT_THRESHOLD_MS = 100
+
+# Seconds between two lag probes on the event loop
+PROBE_INTERVAL = 0.1
+
+# Stalls kept for /looplag, and frames kept per stall
+MAX_STALLS = 50
+STACK_DEPTH = 12
+
+
+class Stall:
+    __slots__ = ('at', 'route', 'stack', 'duration')
+
+    def __init__(self, at: float, route: str, stack: list):
+        self.at = at
+        self.route = route
+        self.stack = stack
+        self.duration = None  # Known once the loop runs again
+
+
+# Code object of the wrapper that metrics.instrumented puts around handlers; its 'route' local names the handler
+_instrumented_wrapper_code = metrics.instrumented(lambda *args: None)(lambda *args: None).__code__
+
+
+def route_of_stack(frame) -> str:
+    """The route of the instrumented handler running in this stack, if any."""
+    while frame is not None:
+        if frame.f_code is _instrumented_wrapper_code:
+            return frame.f_locals.get("route")
+        frame = frame.f_back
+    return None
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled PROBE_INTERVAL ahead. A watchdog
+    thread notices when the probe is overdue by more than the threshold, i.e. while the loop is
+    blocked, and samples the stack of the loop thread to show which code is blocking it.
+    """
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold  # seconds
+        self.lag = metrics.Histogram()
+        self.max_lag = 0.0
+        self.stalls = collections.deque(maxlen=MAX_STALLS)
+        self.stall_count = 0
+        self._heartbeat = None
+        self._loop_thread_id = None
+        self._task = None
+        self._stopped = threading.Event()
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._stopped.clear()
+        threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True).start()
+        logger.info("Event loop lag monitor started (threshold %.0f ms).", self.threshold * 1000)
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self) -> None:
+        self.lag = metrics.Histogram()
+        self.max_lag = 0.0
+        self.stalls.clear()
+        self.stall_count = 0
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + PROBE_INTERVAL
+            await asyncio.sleep(PROBE_INTERVAL)
+            self.observe(max(0.0, loop.time() - scheduled))
+            self._heartbeat = time.monotonic()
+
+    def observe(self, lag: float) -> None:
+        self.lag.observe(lag)
+        self.max_lag = max(self.max_lag, lag)
+        if lag >= self.threshold:
+            stall = self.stalls[-1] if self.stalls else None
+            if stall is not None and stall.duration is None:
+                stall.duration = lag
+            logger.warning("Event loop was blocked for %.0f ms%s", lag * 1000,
+                           f" in {stall.route}" if stall is not None and stall.route else "")
+
+    def _watch(self) -> None:
+        sampled = None  # Heartbeat of the stall already sampled
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            if heartbeat == sampled or time.monotonic() - heartbeat < PROBE_INTERVAL + self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            sampled = heartbeat
+            self.stall_count += 1
+            stack = traceback.format_list(traceback.extract_stack(frame)[-STACK_DEPTH:])
+            self.stalls.append(Stall(time.time(), route_of_stack(frame), stack))
+
+    def report(self, limit: int = 5) -> str:
+        lines = [
+            f"Event loop lag over {self.lag.count} probes: p50 {self.lag.quantile(0.5) * 1000:.1f} ms / "
+            f"p99 {self.lag.quantile(0.99) * 1000:.1f} ms / max {self.max_lag * 1000:.1f} ms",
+            f"Stalls over {self.threshold * 1000:.0f} ms: {self.stall_count}",
+        ]
+        for stall in list(self.stalls)[-limit:][::-1]:
+            duration = f"{stall.duration * 1000:.0f} ms" if stall.duration is not None else "ongoing"
+            lines.append("")
+            lines.append(f"{datetime.fromtimestamp(stall.at):%H:%M:%S} {stall.route or 'background'}, {duration}:")
+            lines.append("".join(stall.stack).rstrip())
+        return "\n".join(lines)
+
+    def prometheus_lines(self) -> list:
+        lines = [
+            "# HELP mafia_bot_event_loop_lag_seconds Delay of the event loop in running a scheduled probe.",
+            "# TYPE mafia_bot_event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        for bound, bucket_count in zip(metrics.LATENCY_BUCKETS + ("+Inf",), self.lag.bucket_counts):
+            cumulative += bucket_count
+            lines.append(f'mafia_bot_event_loop_lag_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"mafia_bot_event_loop_lag_seconds_sum {self.lag.total:.6f}")
+        lines.append(f"mafia_bot_event_loop_lag_seconds_count {self.lag.count}")
+        lines.append("# HELP mafia_bot_event_loop_stalls_total Times the event loop was blocked longer than the threshold.")
+        lines.append("# TYPE mafia_bot_event_loop_stalls_total counter")
+        lines.append(f"mafia_bot_event_loop_stalls_total {self.stall_count}")
+        return lines
+
+
+monitor = LoopLagMonitor(float(os.environ.get(LOOP_LAG_THRESHOLD_ENV, DEFAULT_THRESHOLD_MS)) / 1000)
+metrics.registry.add_collector(monitor.prometheus_lines)
@@ -0,0 +1,187 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import logging
+import time
+
+logger = logging.getLogger("Mafia Bot Metrics")
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Callback data prefixes that are followed by a variable part (IDs, role or template names)
+CALLBACK_ROUTE_PREFIXES = (
+    "final_confirm_vote_", "cancel_vote_", "vote_",
+    "increase_", "decrease_", "role_", "template_",
+    "maintainer_confirm_", "maintainer_reject_",
+    "eliminate_confirm_", "eliminate_yes_", "eliminate_cancel_",
+    "revive_confirm_", "revive_yes_", "revive_cancel_",
+    "toggle_can_vote_", "toggle_can_be_voted_",
+    "gvote_", "gconfirm_", "night_", "nightskip_",
+)
+
+# Route of the update currently being handled, e.g. "button:vote". Other instrumentation
+# (SQL, Bot API calls) uses it to attribute its measurements to a handler.
+current_route = contextvars.ContextVar("current_route", default=None)
+
+# The running metrics endpoint, kept referenced for the lifetime of the process
+metrics_server = None
+
+
+class Histogram:
+    """Latency histogram over the fixed LATENCY_BUCKETS bounds; bucket counts are not cumulative."""
+
+    __slots__ = ('bucket_counts', 'count', 'total', 'errors')
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool = False) -> None:
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if error:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimates a quantile by linear interpolation inside the bucket that contains it."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = LATENCY_BUCKETS[index - 1] if index > 0 else 0.0
+                if index == len(LATENCY_BUCKETS):
+                    return lower
+                upper = LATENCY_BUCKETS[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return LATENCY_BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """Handler latencies per route, plus extra Prometheus sections registered as collectors."""
+
+    def __init__(self):
+        self.handlers = {}  # route -> Histogram
+        self._collectors = []
+
+    def observe(self, route: str, seconds: float, error: bool = False) -> None:
+        histogram = self.handlers.get(route)
+        if histogram is None:
+            histogram = self.handlers[route] = Histogram()
+        histogram.observe(seconds, error)
+
+    def add_collector(self, collector) -> None:
+        """Registers a callable returning extra lines of Prometheus text exposition."""
+        if collector not in self._collectors:
+            self._collectors.append(collector)
+
+    def reset(self) -> None:
+        self.handlers.clear()
+
+    def render_prometheus(self) -> str:
+        lines = [
+            "# HELP mafia_bot_handler_latency_seconds Latency of update handlers by route.",
+            "# TYPE mafia_bot_handler_latency_seconds histogram",
+        ]
+        for route, histogram in sorted(self.handlers.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + ("+Inf",), histogram.bucket_counts):
+                cumulative += bucket_count
+                lines.append(f'mafia_bot_handler_latency_seconds_bucket{{route="{route}",le="{bound}"}} {cumulative}')
+            lines.append(f'mafia_bot_handler_latency_seconds_sum{{route="{route}"}} {histogram.total:.6f}')
+            lines.append(f'mafia_bot_handler_latency_seconds_count{{route="{route}"}} {histogram.count}')
+        lines.append("# HELP mafia_bot_handler_errors_total Handler invocations that raised an exception.")
+        lines.append("# TYPE mafia_bot_handler_errors_total counter")
+        for route, histogram in sorted(self.handlers.items()):
+            lines.append(f'mafia_bot_handler_errors_total{{route="{route}"}} {histogram.errors}')
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    def render_summary(self, limit: int = 15) -> str:
+        """Human-readable table of the routes with the worst p99 latency."""
+        if not self.handlers:
+            return "No handler metrics recorded yet."
+        rows = sorted(self.handlers.items(), key=lambda item: item[1].quantile(0.99), reverse=True)[:limit]
+        lines = ["route: count / errors / p50 / p99 (ms)"]
+        for route, histogram in rows:
+            lines.append(
+                f"{route}: {histogram.count} / {histogram.errors} / "
+                f"{histogram.quantile(0.5) * 1000:.1f} / {histogram.quantile(0.99) * 1000:.1f}"
+            )
+        return "\n".join(lines)
+
+
+registry = MetricsRegistry()
+
+
+def route_for_callback(data: str) -> str:
+    """Names the handle_button branch for callback data, without its variable part."""
+    if not data:
+        return "unknown"
+    for prefix in CALLBACK_ROUTE_PREFIXES:
+        if data.startswith(prefix):
+            return prefix.rstrip("_")
+    return data
+
+
+def instrumented(route_of):
+    """
+    Decorator recording the latency and errors of a handler.
+
+    :param route_of: Called with (update, context) before the handler runs; returns the route name.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(update, context, *args, **kwargs):
+            route = route_of(update, context)
+            token = current_route.set(route)
+            start = time.perf_counter()
+            error = False
+            try:
+                return await func(update, context, *args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                registry.observe(route, time.perf_counter() - start, error)
+                current_route.reset(token)
+        return wrapper
+    return decorator
+
+
+async def _handle_metrics_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        request_line = await reader.readline()
+        # Drain the headers; the request body is never used
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode(errors="replace").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            status, body = "200 OK", registry.render_prometheus().encode()
+        else:
+            status, body = "404 Not Found", b"Not found\n"
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+    except Exception as e:
+        logger.error("Failed to serve metrics request: %s", e)
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(port: int, host: str = "127.0.0.1") -> asyncio.AbstractServer:
+    """Serves the registry in Prometheus text format at http://host:port/metrics."""
+    global metrics_server
+    metrics_server = await asyncio.start_server(_handle_metrics_request, host, port)
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", host, port)
+    return metrics_server
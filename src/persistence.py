@@ -0,0 +1,142 @@
+import asyncio
+import json
+import logging
+from telegram.ext import BasePersistence, PersistenceInput
+from src.db import conn, cursor
+
+logger = logging.getLogger("Mafia Bot Persistence")
+
+
+class SQLitePersistence(BasePersistence):
+    """
+    Persists context.user_data in the UserData table of the bot's SQLite database.
+
+    The Application hands over the data of every user touched since its last run. Only users whose
+    data actually changed since it was last written are marked dirty, and all dirty users of a run
+    are written in a single transaction.
+    """
+
+    def __init__(self, update_interval: float = 5, refresh_from_db: bool = False):
+        super().__init__(
+            store_data=PersistenceInput(bot_data=False, chat_data=False, user_data=True, callback_data=False),
+            update_interval=update_interval
+        )
+        # Re-read a user's row before each update; needed when several processes share the DB
+        self.refresh_from_db = refresh_from_db
+        self._snapshots = {}  # user_id -> JSON last written to / read from the DB
+        self._dirty = {}  # user_id -> JSON waiting to be written
+
+    @staticmethod
+    def _serialize(data: dict) -> str:
+        return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+    def _write_dirty(self) -> None:
+        if not self._dirty:
+            return
+        rows = list(self._dirty.items())
+        self._dirty = {}
+        try:
+            cursor.executemany("""
+            INSERT INTO UserData (user_id, data, last_updated)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id) DO UPDATE SET
+            data = excluded.data,
+            last_updated = CURRENT_TIMESTAMP
+            """, rows)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            logger.error("Failed to persist user data for %s users: %s", len(rows), e)
+            # Keep the rows dirty so the next run retries them
+            for user_id, payload in rows:
+                self._dirty.setdefault(user_id, payload)
+            return
+        self._snapshots.update(rows)
+        logger.debug("Persisted user data for %s users.", len(rows))
+
+    async def get_user_data(self) -> dict:
+        cursor.execute("SELECT user_id, data FROM UserData")
+        user_data = {}
+        for user_id, payload in cursor.fetchall():
+            try:
+                user_data[user_id] = json.loads(payload)
+            except json.JSONDecodeError:
+                logger.error("Invalid stored user data for user %s. Ignoring it.", user_id)
+                continue
+            self._snapshots[user_id] = payload
+        logger.debug("Loaded persisted user data for %s users.", len(user_data))
+        return user_data
+
+    async def update_user_data(self, user_id: int, data: dict) -> None:
+        try:
+            payload = self._serialize(data)
+        except (TypeError, ValueError) as e:
+            logger.error("User data of user %s is not serializable: %s", user_id, e)
+            return
+        if self._snapshots.get(user_id) == payload:
+            self._dirty.pop(user_id, None)
+            return
+        self._dirty[user_id] = payload
+        # The Application updates all touched users concurrently. Yield once so the other
+        # users of this run are marked dirty too, then write them all in one transaction.
+        await asyncio.sleep(0)
+        self._write_dirty()
+
+    async def refresh_user_data(self, user_id: int, user_data: dict) -> None:
+        if not self.refresh_from_db or user_id in self._dirty:
+            return
+        cursor.execute("SELECT data FROM UserData WHERE user_id = ?", (user_id,))
+        result = cursor.fetchone()
+        if not result or result[0] == self._snapshots.get(user_id):
+            return
+        try:
+            stored = json.loads(result[0])
+        except json.JSONDecodeError:
+            return
+        user_data.clear()
+        user_data.update(stored)
+        self._snapshots[user_id] = result[0]
+
+    async def drop_user_data(self, user_id: int) -> None:
+        self._dirty.pop(user_id, None)
+        self._snapshots.pop(user_id, None)
+        cursor.execute("DELETE FROM UserData WHERE user_id = ?", (user_id,))
+        conn.commit()
+
+    async def flush(self) -> None:
+        self._write_dirty()
+
+    # Only user_data is stored; the remaining kinds of data are not persisted.
+
+    async def get_chat_data(self) -> dict:
+        return {}
+
+    async def get_bot_data(self) -> dict:
+        return {}
+
+    async def get_callback_data(self):
+        return None
+
+    async def get_conversations(self, name: str) -> dict:
+        return {}
+
+    async def update_conversation(self, name: str, key, new_state) -> None:
+        pass
+
+    async def update_chat_data(self, chat_id: int, data: dict) -> None:
+        pass
+
+    async def update_bot_data(self, data: dict) -> None:
+        pass
+
+    async def update_callback_data(self, data) -> None:
+        pass
+
+    async def drop_chat_data(self, chat_id: int) -> None:
+        pass
+
+    async def refresh_chat_data(self, chat_id: int, chat_data: dict) -> None:
+        pass
+
+    async def refresh_bot_data(self, bot_data: dict) -> None:
+        pass
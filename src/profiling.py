@@ -0,0 +1,161 @@
+import collections
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+logger = logging.getLogger("Mafia Bot Profiling")
+
+# Seconds between two stack samples of the CPU profiler
+SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation traceback by tracemalloc; more frames cost more memory
+TRACEMALLOC_FRAMES = 5
+
+# Allocations of the profilers themselves are left out of the memory diffs
+TRACEMALLOC_EXCLUDE = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+
+def frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def is_idle(frame) -> bool:
+    """True while the loop thread waits for I/O in the selector, i.e. has nothing to run."""
+    return frame.f_code.co_name in ("select", "poll", "control") and frame.f_code.co_filename.endswith("selectors.py")
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of the event loop thread from a background thread. Costs one stack walk
+    per SAMPLE_INTERVAL, so unlike cProfile it can run on the live bot.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = collections.Counter()  # (outermost frame, ..., innermost frame) -> samples
+        self.samples = 0
+        self.idle = 0
+        self.started_at = None
+        self.duration = 0.0
+        self._thread = None
+        self._stopped = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """Starts sampling the calling thread, normally the one running the event loop."""
+        self.stacks.clear()
+        self.samples = self.idle = 0
+        self.started_at = time.monotonic()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._sample, args=(threading.get_ident(),), name="cpu-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info("CPU profiler started.")
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self.duration = time.monotonic() - self.started_at
+        logger.info("CPU profiler stopped after %.1f s with %s samples.", self.duration, self.samples)
+
+    def _sample(self, thread_id: int) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            if is_idle(frame):
+                self.idle += 1
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame.f_code))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Stacks in the collapsed format read by flamegraph.pl and speedscope."""
+        return "\n".join(f"{';'.join(stack)} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
+    def summary(self, limit: int = 15) -> str:
+        busy = self.samples - self.idle
+        lines = [
+            f"CPU profile over {self.duration:.1f} s: {self.samples} samples, "
+            f"{busy / self.samples * 100 if self.samples else 0:.1f}% busy"
+        ]
+        if not busy:
+            return lines[0]
+        own = collections.Counter()
+        total = collections.Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+        lines.append("")
+        lines.append("Self time (% of busy samples):")
+        lines.extend(f"{count / busy * 100:5.1f}% {name}" for name, count in own.most_common(limit))
+        lines.append("")
+        lines.append("Including callees:")
+        lines.extend(f"{count / busy * 100:5.1f}% {name}" for name, count in total.most_common(limit))
+        return "\n".join(lines)
+
+
+class MemoryProfiler:
+    """Diffs two tracemalloc snapshots taken some time apart, plus the sizes of watched containers."""
+
+    def __init__(self):
+        self.baseline = None
+        self.gauges = {}  # name -> callable returning the current size
+        self.gauges_before = {}
+        self.started_tracing = False
+
+    @property
+    def running(self) -> bool:
+        return self.baseline is not None
+
+    def watch(self, name: str, size) -> None:
+        self.gauges[name] = size
+
+    def start(self) -> None:
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        self.baseline = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_EXCLUDE)
+        self.gauges_before = {name: size() for name, size in self.gauges.items()}
+        logger.info("Memory profiler started.")
+
+    def stop(self, limit: int = 15) -> tuple:
+        """Returns a short summary and the full list of allocation differences by source line."""
+        snapshot = tracemalloc.take_snapshot().filter_traces(TRACEMALLOC_EXCLUDE)
+        current, peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+        differences = snapshot.compare_to(self.baseline, "lineno")
+        self.baseline = None
+
+        lines = [f"Traced memory: {current / 2**20:.1f} MiB now, {peak / 2**20:.1f} MiB peak"]
+        for name, size in self.gauges.items():
+            lines.append(f"{name}: {self.gauges_before.get(name, 0)} -> {size()} entries")
+        lines.append("")
+        lines.append("Largest growth by line:")
+        lines.extend(str(difference) for difference in differences[:limit])
+        logger.info("Memory profiler stopped.")
+        return "\n".join(lines), "\n".join(str(difference) for difference in differences) + "\n"
+
+
+cpu_profiler = SamplingProfiler()
+memory_profiler = MemoryProfiler()
@@ -0,0 +1,192 @@
+import gzip
+import json
+import logging
+import multiprocessing
+import os
+import re
+import time
+from datetime import datetime, timezone
+from telegram import Update
+from telegram.ext import ContextTypes, TypeHandler
+from src.db import cursor
+
+logger = logging.getLogger("Mafia Bot Recorder")
+
+# Set to a file path to record incoming updates; read again by spawned worker processes
+RECORD_UPDATES_ENV = "MAFIA_BOT_RECORD_UPDATES"
+
+# Handler group of record_handler; runs before every other handler, including deduplication
+RECORD_GROUP = -3
+
+# Flush the compressed stream after this many updates, so a killed bot loses little
+FLUSH_EVERY = 100
+
+# First pseudonymous user id; real ids are replaced by consecutive numbers from here
+PSEUDONYM_BASE = 100000
+
+PASSCODE_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.IGNORECASE)
+
+# Callback data that ends in a user id
+USER_ID_CALLBACK_PREFIXES = (
+    "vote_", "eliminate_confirm_", "eliminate_yes_", "eliminate_cancel_",
+    "revive_confirm_", "revive_yes_", "revive_cancel_", "toggle_can_vote_", "toggle_can_be_voted_",
+)
+
+# Callback data that ends in a game id
+GAME_ID_CALLBACK_PREFIXES = ("final_confirm_vote_", "cancel_vote_", "gconfirm_", "nightskip_")
+
+# Callback data of the form <prefix><user id>_<game id>
+USER_AND_GAME_ID_CALLBACK_PREFIXES = ("gvote_", "night_")
+
+
+class UpdateAnonymizer:
+    """
+    Strips personal data from serialized updates. User and chat ids become consecutive pseudonyms,
+    names and free text become placeholders. Passcodes and game ids are replaced by a reference to
+    the game's (pseudonymous) moderator, which the replayer resolves against its own database.
+    The mapping is only kept in memory, so a recording cannot be traced back to real users.
+    """
+
+    def __init__(self):
+        self.ids = {}  # real id -> pseudonym
+        self.texts = {}  # free text -> placeholder
+
+    def user_id(self, real_id: int) -> int:
+        pseudonym = self.ids.get(abs(real_id))
+        if pseudonym is None:
+            pseudonym = self.ids[abs(real_id)] = PSEUDONYM_BASE + len(self.ids)
+        return -pseudonym if real_id < 0 else pseudonym
+
+    def identity(self, user: dict) -> dict:
+        """Anonymizes a User or Chat."""
+        pseudonym = self.user_id(user["id"])
+        if "type" in user:
+            return {"id": pseudonym, "type": user["type"]}
+        return {"id": pseudonym, "is_bot": user.get("is_bot", False), "first_name": f"User{abs(pseudonym)}"}
+
+    def game_reference(self, column: str, value: str, kind: str) -> str:
+        cursor.execute(f"SELECT moderator_id FROM Games WHERE {column} = ?", (value,))
+        row = cursor.fetchone()
+        return f"{{{kind}:{self.user_id(row[0]) if row else 'unknown'}}}"
+
+    def text(self, text: str) -> str:
+        stripped = text.strip()
+        if stripped.startswith("/") or stripped.isdigit():
+            return text
+        if PASSCODE_PATTERN.fullmatch(stripped):
+            return self.game_reference("passcode", stripped, "passcode")
+        placeholder = self.texts.get(text)
+        if placeholder is None:
+            placeholder = self.texts[text] = f"text{len(self.texts) + 1}"
+        return placeholder
+
+    def callback_data(self, data: str) -> str:
+        for prefix in USER_ID_CALLBACK_PREFIXES:
+            if data.startswith(prefix) and data[len(prefix):].lstrip("-").isdigit():
+                return f"{prefix}{self.user_id(int(data[len(prefix):]))}"
+        for prefix in GAME_ID_CALLBACK_PREFIXES:
+            if data.startswith(prefix):
+                return prefix + self.game_reference("game_id", data[len(prefix):], "game")
+        for prefix in USER_AND_GAME_ID_CALLBACK_PREFIXES:
+            if data.startswith(prefix):
+                user_id, _, game_id = data[len(prefix):].partition("_")
+                if user_id.lstrip("-").isdigit():
+                    game = self.game_reference("game_id", game_id, "game")
+                    return f"{prefix}{self.user_id(int(user_id))}_{game}"
+        return data
+
+    def message(self, message: dict, keep_text: bool = True) -> dict:
+        anonymized = {
+            "message_id": message["message_id"],
+            "date": message["date"],
+            "chat": self.identity(message["chat"]),
+        }
+        if "from" in message:
+            anonymized["from"] = self.identity(message["from"])
+        if keep_text and "text" in message:
+            anonymized["text"] = self.text(message["text"])
+            commands = [entity for entity in message.get("entities", []) if entity["type"] == "bot_command"]
+            if commands and anonymized["text"] == message["text"]:
+                anonymized["entities"] = commands
+        return anonymized
+
+    def update(self, update: dict) -> dict:
+        """Returns the anonymized update, or None for kinds of updates the bot does not handle."""
+        if "message" in update:
+            return {"update_id": update["update_id"], "message": self.message(update["message"])}
+        if "callback_query" in update:
+            query = update["callback_query"]
+            anonymized = {
+                "id": query["id"],
+                "from": self.identity(query["from"]),
+                "chat_instance": query.get("chat_instance", ""),
+            }
+            if "data" in query:
+                anonymized["data"] = self.callback_data(query["data"])
+            if "message" in query:
+                # The bot's own message; only which chat and message it was matters
+                anonymized["message"] = self.message(query["message"], keep_text=False)
+            return {"update_id": update["update_id"], "callback_query": anonymized}
+        return None
+
+
+class UpdateRecorder:
+    """Writes anonymized incoming updates with their arrival time as gzip-compressed JSON lines."""
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.anonymizer = UpdateAnonymizer()
+        self._file = None
+        self._started = None
+        self._unflushed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _open(self) -> None:
+        path = self.path
+        process_name = multiprocessing.current_process().name
+        if process_name != "MainProcess":
+            # Every worker process writes its own file: updates.jsonl.gz -> updates.<worker>.jsonl.gz
+            head, tail = os.path.split(path)
+            name, dot, extension = tail.partition(".")
+            path = os.path.join(head, f"{name}.{process_name}{dot}{extension}")
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._started = time.monotonic()
+        self._file.write(json.dumps({"recording": 1, "started_at": datetime.now(timezone.utc).isoformat()}) + "\n")
+        logger.info("Recording incoming updates to %s", path)
+
+    def record(self, update: dict) -> None:
+        anonymized = self.anonymizer.update(update)
+        if anonymized is None:
+            return
+        if self._file is None:
+            self._open()
+        offset = round(time.monotonic() - self._started, 4)
+        self._file.write(json.dumps({"t": offset, "update": anonymized}, separators=(",", ":")) + "\n")
+        self._unflushed += 1
+        if self._unflushed >= FLUSH_EVERY:
+            self._file.flush()
+            self._unflushed = 0
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+recorder = UpdateRecorder(os.environ.get(RECORD_UPDATES_ENV))
+
+
+async def record_update(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    try:
+        recorder.record(update.to_dict())
+    except Exception as e:
+        # Recording must never break handling of the update
+        logger.error("Failed to record update %s: %s", update.update_id, e)
+
+# Create the handler instance
+record_handler = TypeHandler(Update, record_update)
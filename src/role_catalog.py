@@ -0,0 +1,132 @@
+import contextlib
+import hashlib
+import logging
+import os
+import pickle
+from src.utils import resource_path
+
+logger = logging.getLogger("Mafia Bot Roles")
+
+# Bump whenever the layout of the artifact or of a section changes; older artifacts are then rebuilt
+ARTIFACT_VERSION = 2
+
+# Written next to the JSON files it is compiled from
+ARTIFACT_NAME = 'roles.catalog.pickle'
+
+_artifacts = {}  # Artifact path -> contents, read once per process
+
+
+def artifact_path(source_path) -> str:
+    return os.path.join(os.path.dirname(source_path), ARTIFACT_NAME)
+
+
+def fingerprint(path):
+    """(size, mtime_ns, sha256) of a source file, or None if it does not exist."""
+    try:
+        with open(path, 'rb') as file:
+            stat = os.fstat(file.fileno())
+            return stat.st_size, stat.st_mtime_ns, hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def is_fresh(path, source) -> bool:
+    """True if the source file still matches the fingerprint it was compiled from."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return source is None
+    if source is None:
+        return False
+    if (stat.st_size, stat.st_mtime_ns) == source[:2]:
+        return True
+    # Copying the files (PyInstaller, docker build) changes the mtime but not the content
+    current = fingerprint(path)
+    return current is not None and current[2] == source[2]
+
+
+def read_artifact(path) -> dict:
+    artifact = _artifacts.get(path)
+    if artifact is not None:
+        return artifact
+    artifact = {'version': ARTIFACT_VERSION, 'sections': {}}
+    try:
+        with open(path, 'rb') as file:
+            stored = pickle.load(file)
+        if isinstance(stored, dict) and stored.get('version') == ARTIFACT_VERSION:
+            artifact = stored
+        else:
+            logger.info("Role catalog artifact %s has an old version, rebuilding it.", path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Could not read the role catalog artifact %s, using the JSON files: %s", path, e)
+    _artifacts[path] = artifact
+    return artifact
+
+
+def write_artifact(path, ignore_errors: bool = True) -> None:
+    temporary_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, 'wb') as file:
+            pickle.dump(_artifacts[path], file, protocol=pickle.HIGHEST_PROTOCOL)
+        # Atomic, so worker processes starting at the same time never read half a file
+        os.replace(temporary_path, path)
+    except OSError as e:
+        if not ignore_errors:
+            raise
+        # E.g. a read-only bundle; the JSON files are parsed again on the next start
+        logger.debug("Could not write the role catalog artifact %s: %s", path, e)
+        with contextlib.suppress(OSError):
+            os.remove(temporary_path)
+
+
+def compile_section(name: str, source_path, parse) -> dict:
+    """Parses the JSON source of a section with parse() and stores the result in the artifact."""
+    source = fingerprint(source_path)
+    values = parse()
+    payload = pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)
+    read_artifact(artifact_path(source_path))['sections'][name] = {
+        'source': source,
+        'checksum': hashlib.sha256(payload).hexdigest(),
+        'payload': payload,
+    }
+    return values
+
+
+def load_section(name: str, source_path, parse) -> dict:
+    """
+    Returns the compiled values of a section. They come from the artifact while it matches the
+    JSON source file; otherwise parse() reads the JSON and the artifact is regenerated.
+    """
+    path = artifact_path(source_path)
+    section = read_artifact(path)['sections'].get(name)
+    if section is not None and is_fresh(source_path, section['source']):
+        if hashlib.sha256(section['payload']).hexdigest() == section['checksum']:
+            return pickle.loads(section['payload'])
+        logger.warning("Checksum mismatch in the %s section of %s.", name, path)
+    values = compile_section(name, source_path, parse)
+    write_artifact(path)
+    return values
+
+
+def build() -> None:
+    """Compiles every section from its JSON source, e.g. before freezing the bot with PyInstaller."""
+    # Imported here, since src.roles imports this module
+    from src import roles
+    sources = [
+        ('catalog', resource_path(os.path.join('data', 'roles.json')), roles.parse_catalog),
+        ('templates', resource_path(os.path.join('data', 'role_templates.json')), roles.parse_templates),
+    ]
+    for _, source_path, _ in sources:
+        _artifacts[artifact_path(source_path)] = {'version': ARTIFACT_VERSION, 'sections': {}}
+    for name, source_path, parse in sources:
+        compile_section(name, source_path, parse)
+    for path in {artifact_path(source_path) for _, source_path, _ in sources}:
+        write_artifact(path, ignore_errors=False)
+        logger.info("Role catalog artifact written to %s.", path)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    build()
@@ -1,23 +1,48 @@
 import json
+from src import role_catalog
 from src.utils import resource_path
+import contextlib
 import logging
 import os
+import sys
 logger = logging.getLogger("Mafia Bot Roles")
 
-def load_available_roles():
+# Module attributes that are loaded on first access rather than at import, see __getattr__
+CATALOG_ATTRIBUTES = ('available_roles', 'role_descriptions', 'role_factions', 'role_night_actions',
+                      'role_appearances', 'night_immune_roles')
+TEMPLATE_ATTRIBUTES = ('role_templates', 'pending_templates', 'templates_mtime')
+
+def parse_catalog():
+    """Parses roles.json into the role names, descriptions, factions and night abilities."""
     with open(resource_path(os.path.join('data','roles.json')), 'r') as file:
         data = json.load(file)
-        available_roles = [role['name'] for role in data.get('roles', [])]
-    logger.debug(f"Available roles loaded: {available_roles}")
-    return available_roles
+    roles = data.get('roles', [])
+    catalog = {
+        'available_roles': [role['name'] for role in roles],
+        'role_descriptions': {role['name']: role['description'] for role in roles},
+        'role_factions': {role['name']: role['faction'] for role in roles},
+        # The night ability ({'type', 'priority'}) of the roles that have one
+        'role_night_actions': {role['name']: role['night_action'] for role in roles if 'night_action' in role},
+        # The faction an investigation reports, which some mafia roles fake
+        'role_appearances': {role['name']: role.get('appears_as', role['faction']) for role in roles},
+        'night_immune_roles': {role['name'] for role in roles if role.get('night_immune')},
+    }
+    logger.debug("Available roles loaded: %s", catalog['available_roles'])
+    logger.debug("Role factions loaded: %s", catalog['role_factions'])
+    return catalog
+
+def load_catalog():
+    """The parsed role catalog, from the compiled artifact while roles.json is unchanged."""
+    return role_catalog.load_section('catalog', resource_path(os.path.join('data','roles.json')), parse_catalog)
+
+def load_available_roles():
+    return load_catalog()['available_roles']
 
 def load_role_descriptions():
-    descriptions = {}
-    with open(resource_path(os.path.join('data','roles.json')), 'r') as file:
-        data = json.load(file)
-        for role in data.get('roles', []):
-            descriptions[role['name']] = role['description']
-    return descriptions
+    return load_catalog()['role_descriptions']
+
+def load_role_factions():
+    return load_catalog()['role_factions']
 
 def load_role_templates():
     try:
@@ -25,8 +50,8 @@ def load_role_templates():
             data = json.load(file)
             templates = data.get('templates', {})
             pending_templates = data.get('pending_templates', {})
-        logger.debug(f"Role templates loaded: {templates}")
-        logger.debug(f"Pending templates loaded: {pending_templates}")
+        logger.debug("Role templates loaded: %s", templates)
+        logger.debug("Pending templates loaded: %s", pending_templates)
         return templates, pending_templates
     except FileNotFoundError:
         logger.warning("role_templates.json not found. Creating a new one.")
@@ -35,23 +60,67 @@ def load_role_templates():
         logger.error("Invalid JSON format in role_templates.json. Starting with empty templates.")
         return {}, {}
 
+def parse_templates():
+    templates, pending_templates = load_role_templates()
+    return {'role_templates': templates, 'pending_templates': pending_templates}
+
+# Guards writes to role_templates.json. The dispatcher swaps in a
+# multiprocessing lock when several worker processes share the file.
+templates_lock = contextlib.nullcontext()
+
 def save_role_templates(templates, pending_templates):
-    with open(resource_path(os.path.join('data','role_templates.json')), 'w') as file:
-        json.dump({'templates': templates, 'pending_templates': pending_templates}, file, indent=2)
-    logger.debug(f"Role templates saved: {templates}")
-    logger.debug(f"Pending templates saved: {pending_templates}")
+    global templates_mtime
+    with templates_lock:
+        with open(resource_path(os.path.join('data','role_templates.json')), 'w') as file:
+            json.dump({'templates': templates, 'pending_templates': pending_templates}, file, indent=2)
+        templates_mtime = get_templates_mtime()
+    logger.debug("Role templates saved: %s", templates)
+    logger.debug("Pending templates saved: %s", pending_templates)
 
-def load_role_factions():
-    factions = {}
-    with open(resource_path(os.path.join('data','roles.json')), 'r') as file:
-        data = json.load(file)
-        for role in data.get('roles', []):
-            factions[role['name']] = role['faction']
-    logger.debug(f"Role factions loaded: {factions}")
-    return factions
-
-# Initialize global variables
-available_roles = load_available_roles()
-role_descriptions = load_role_descriptions()
-role_templates, pending_templates = load_role_templates()
-role_factions = load_role_factions()
+def get_templates_mtime():
+    try:
+        return os.stat(resource_path(os.path.join('data','role_templates.json'))).st_mtime_ns
+    except OSError:
+        return None
+
+def reload_role_templates_if_changed():
+    """Reloads the templates in place if another process rewrote role_templates.json."""
+    global templates_mtime
+    if 'role_templates' not in globals():
+        # Not loaded yet; the first access reads the current file anyway
+        return False
+    mtime = get_templates_mtime()
+    if mtime == templates_mtime:
+        return False
+    with templates_lock:
+        templates, pending = load_role_templates()
+    # Update in place so modules holding references see the new templates
+    role_templates.clear()
+    role_templates.update(templates)
+    pending_templates.clear()
+    pending_templates.update(pending)
+    templates_mtime = mtime
+    return True
+
+def load():
+    """Loads the catalog and the templates now instead of on first use."""
+    module = sys.modules[__name__]
+    for name in CATALOG_ATTRIBUTES + TEMPLATE_ATTRIBUTES:
+        getattr(module, name)
+
+# Forget values loaded before an importlib.reload of this module
+for _name in CATALOG_ATTRIBUTES + TEMPLATE_ATTRIBUTES:
+    globals().pop(_name, None)
+
+def __getattr__(name):
+    # Importing this module reads no files; each group of globals is loaded on first access
+    # and then stored, so later lookups never come back here
+    if name in CATALOG_ATTRIBUTES:
+        globals().update(load_catalog())
+    elif name in TEMPLATE_ATTRIBUTES:
+        templates_path = resource_path(os.path.join('data','role_templates.json'))
+        globals().update(role_catalog.load_section('templates', templates_path, parse_templates),
+                         templates_mtime=get_templates_mtime())
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return globals()[name]
@@ -0,0 +1,144 @@
+import logging
+import os
+import re
+import sqlite3
+import time
+from src import metrics
+
+logger = logging.getLogger("Mafia Bot SQLProfiler")
+
+# Set to a non-empty value to start with profiling enabled (also read by worker processes)
+PROFILE_SQL_ENV = "MAFIA_BOT_PROFILE_SQL"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class StatementStats:
+    __slots__ = ('count', 'total_time', 'rows')
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+        self.rows = 0
+
+
+class SQLProfiler:
+    """
+    Aggregates SQL statements by (route, statement text). The route is the handler route of the
+    update being processed (see src.metrics.current_route), so statements per update can be
+    derived from the handler counts of the metrics registry.
+    """
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.statements = {}  # (route, sql) -> StatementStats
+
+    def record(self, sql: str, seconds: float) -> tuple:
+        key = (metrics.current_route.get() or "background", _WHITESPACE.sub(" ", sql).strip())
+        stats = self.statements.get(key)
+        if stats is None:
+            stats = self.statements[key] = StatementStats()
+        stats.count += 1
+        stats.total_time += seconds
+        return key
+
+    def add_rows(self, key: tuple, rows: int, seconds: float) -> None:
+        stats = self.statements.get(key)
+        if stats is not None:
+            stats.rows += rows
+            stats.total_time += seconds
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+    def statements_per_route(self) -> dict:
+        totals = {}
+        for (route, _), stats in self.statements.items():
+            totals[route] = totals.get(route, 0) + stats.count
+        return totals
+
+    def top(self, limit: int = 10) -> list:
+        """Returns ((route, sql), stats) of the statements with the most cumulative time."""
+        return sorted(self.statements.items(), key=lambda item: item[1].total_time, reverse=True)[:limit]
+
+    def report(self, limit: int = 10) -> str:
+        if not self.statements:
+            state = "enabled" if self.enabled else "disabled"
+            return f"No SQL statements recorded (profiler is {state})."
+        lines = [f"Top {limit} statements by cumulative time:"]
+        for (route, sql), stats in self.top(limit):
+            lines.append(
+                f"{stats.total_time * 1000:.1f} ms | {stats.count}x | {stats.rows} rows | {route}\n    {sql[:200]}"
+            )
+        lines.append("")
+        lines.append("Statements per update:")
+        for route, total in sorted(self.statements_per_route().items(), key=lambda item: item[1], reverse=True)[:limit]:
+            histogram = metrics.registry.handlers.get(route)
+            if histogram and histogram.count:
+                lines.append(f"{route}: {total / histogram.count:.1f} ({histogram.count} updates)")
+            else:
+                lines.append(f"{route}: {total} in total")
+        return "\n".join(lines)
+
+    def prometheus_lines(self) -> list:
+        lines = [
+            "# HELP mafia_bot_sql_statements_total SQL statements executed, by handler route.",
+            "# TYPE mafia_bot_sql_statements_total counter",
+        ]
+        for route, total in sorted(self.statements_per_route().items()):
+            lines.append(f'mafia_bot_sql_statements_total{{route="{route}"}} {total}')
+        return lines
+
+
+profiler = SQLProfiler(enabled=bool(os.environ.get(PROFILE_SQL_ENV)))
+metrics.registry.add_collector(profiler.prometheus_lines)
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Cursor that reports its statements and fetched rows to the profiler while it is enabled."""
+
+    _last_key = None
+
+    def execute(self, sql, parameters=()):
+        if not profiler.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._last_key = profiler.record(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not profiler.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._last_key = profiler.record(sql, time.perf_counter() - start)
+
+    def fetchone(self):
+        if not profiler.enabled or self._last_key is None:
+            return super().fetchone()
+        start = time.perf_counter()
+        row = super().fetchone()
+        profiler.add_rows(self._last_key, 0 if row is None else 1, time.perf_counter() - start)
+        return row
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        if not profiler.enabled or self._last_key is None:
+            return super().fetchmany(size)
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        profiler.add_rows(self._last_key, len(rows), time.perf_counter() - start)
+        return rows
+
+    def fetchall(self):
+        if not profiler.enabled or self._last_key is None:
+            return super().fetchall()
+        start = time.perf_counter()
+        rows = super().fetchall()
+        profiler.add_rows(self._last_key, len(rows), time.perf_counter() - start)
+        return rows
@@ -1,3 +1,4 @@
+import importlib.util
 import sys
 import os
 
@@ -11,12 +12,25 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
-def generate_voting_summary(voted_players, not_voted_players):
+def lazy_import(name):
+    """Returns the module, executing it on first attribute access instead of now."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+def generate_voting_summary(voted_players, not_voted_players, tally=None):
     """
     Generates a formatted voting summary message with emojis.
 
     :param voted_players: List of player names who have voted.
     :param not_voted_players: List of player names who have not voted.
+    :param tally: Optional list of (player name, vote count) tuples, leading players first.
     :return: Formatted string with voting summary.
     """
     voted_section = "🗳️ **Players Who Have Voted:**\n"
@@ -32,4 +46,12 @@ def generate_voting_summary(voted_players, not_voted_players):
         not_voted_section += "• None"
 
     voting_summary = f"🎉 **Current Voting Session** 🎉\n\n{voted_section}{not_voted_section}"
+
+    if tally is not None:
+        tally_section = "\n\n📊 **Current Tally:**\n"
+        if tally:
+            tally_section += "\n".join([f"• {player}: {count} vote(s)" for player, count in tally])
+        else:
+            tally_section += "• No votes yet"
+        voting_summary += tally_section
     return voting_summary
\ No newline at end of file
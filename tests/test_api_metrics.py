@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+import pytest
+from telegram.error import BadRequest, RetryAfter
+from src import api_metrics, metrics
+
+BASE_URL = "https://api.telegram.org/botTOKEN"
+
+
+def fake_api(request):
+    method = request.url.path.rsplit("/", 1)[-1]
+    if method == "editMessageText":
+        body = {"ok": False, "error_code": 400,
+                "description": "Bad Request: message is not modified: specified new message content is the same"}
+        return httpx.Response(400, json=body)
+    if method == "sendMessage" and request.headers.get("x-flood"):
+        return httpx.Response(429, json={"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                         "parameters": {"retry_after": 3}})
+    return httpx.Response(200, json={"ok": True, "result": True})
+
+
+def test_calls_are_counted_per_method_and_route(monkeypatch):
+    tracker = api_metrics.ApiCallTracker()
+    monkeypatch.setattr(api_metrics, 'tracker', tracker)
+    request = api_metrics.InstrumentedRequest(httpx_kwargs={"transport": httpx.MockTransport(fake_api)})
+    flood_request = api_metrics.InstrumentedRequest(
+        httpx_kwargs={"transport": httpx.MockTransport(fake_api), "headers": {"x-flood": "1"}}
+    )
+
+    async def run():
+        token = metrics.current_route.set("button:vote")
+        try:
+            await request.post(f"{BASE_URL}/sendMessage")
+            await request.post(f"{BASE_URL}/sendMessage")
+            with pytest.raises(BadRequest):
+                await request.post(f"{BASE_URL}/editMessageText")
+            with pytest.raises(RetryAfter):
+                await flood_request.post(f"{BASE_URL}/sendMessage")
+        finally:
+            metrics.current_route.reset(token)
+        await request.post(f"{BASE_URL}/answerCallbackQuery")
+        await request.shutdown()
+        await flood_request.shutdown()
+
+    asyncio.run(run())
+
+    send = tracker.methods["sendMessage"]
+    assert send.latency.count == 3 and send.retry_after == 1 and send.errors == 0
+    assert send.response_bytes > 2 * len('{"ok":true,"result":true}')
+    assert tracker.methods["editMessageText"].not_modified == 1
+    assert tracker.by_route[("button:vote", "sendMessage")] == 3
+    assert tracker.by_route[("background", "answerCallbackQuery")] == 1
+    assert 'mafia_bot_api_calls_total{route="button:vote",method="editMessageText"} 1' in "\n".join(tracker.prometheus_lines())
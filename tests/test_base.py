@@ -39,7 +39,7 @@ def test_get_random_shuffle_fallback(monkeypatch):
 
 def test_get_templates_for_player_count(monkeypatch, memory_db):
     base = load_base(monkeypatch, memory_db.cursor)
-    monkeypatch.setattr(base, 'role_templates', {'5': ['tpl']})
+    monkeypatch.setattr(base.roles, 'role_templates', {'5': ['tpl']})
     assert base.get_templates_for_player_count(5) == ['tpl']
 
 
@@ -0,0 +1,20 @@
+from benchmarks.run import compare, time_case
+
+
+def test_compare_flags_only_slowdowns_beyond_threshold():
+    baseline = {"tally": {"5": {"median_us": 10.0}, "50": {"median_us": 100.0}}}
+    results = {"tally": {"5": {"median_us": 10.5}, "50": {"median_us": 150.0}, "200": {"median_us": 900.0}}}
+    regressions = compare(results, baseline, threshold=0.10)
+    assert len(regressions) == 1
+    assert "50 players" in regressions[0]
+
+
+def test_time_case_awaits_coroutine_functions():
+    calls = []
+
+    async def handler():
+        calls.append(1)
+
+    result = time_case(handler, repeats=2)
+    assert calls and result["loops"] >= 1
+    assert result["min_us"] <= result["median_us"]
@@ -0,0 +1,63 @@
+import asyncio
+import types
+import importlib
+import pytest
+from telegram.ext import ApplicationHandlerStop
+
+dedup_handler = importlib.import_module("src.handlers.dedup_handler")
+
+
+def test_duplicate_tap_within_window():
+    dedup = dedup_handler.CallbackDeduplicator(window=1.0, counter_window=0.3)
+    assert not dedup.is_duplicate('q1', 1, 10, 'final_confirm_vote_g1', now=0.0)
+    # double tap: new query id, same user/message/data, checked after the first one's round trips
+    assert dedup.is_duplicate('q2', 1, 10, 'final_confirm_vote_g1', now=0.6)
+    # other users and other buttons are unaffected
+    assert not dedup.is_duplicate('q3', 2, 10, 'final_confirm_vote_g1', now=0.6)
+    assert not dedup.is_duplicate('q4', 1, 10, 'reset_roles', now=0.6)
+    # after the window the same button works again
+    assert not dedup.is_duplicate('q5', 1, 10, 'final_confirm_vote_g1', now=1.5)
+    # and the same query delivered twice is dropped
+    assert dedup.is_duplicate('q5', 1, 10, 'final_confirm_vote_g1', now=1.6)
+
+
+def test_role_count_double_tap_counts_once():
+    dedup = dedup_handler.CallbackDeduplicator(window=1.0, counter_window=0.3)
+    assert not dedup.is_duplicate('q1', 1, 10, 'increase_Doctor', now=0.0)
+    assert dedup.is_duplicate('q2', 1, 10, 'increase_Doctor', now=0.1)
+    # a deliberate second press
+    assert not dedup.is_duplicate('q3', 1, 10, 'increase_Doctor', now=0.4)
+
+
+def test_toggles_are_only_deduplicated_by_query_id():
+    dedup = dedup_handler.CallbackDeduplicator(window=1.0, counter_window=0.3)
+    # un-toggling a vote right away is deliberate
+    assert not dedup.is_duplicate('q1', 1, 11, 'vote_5', now=0.0)
+    assert not dedup.is_duplicate('q2', 1, 11, 'vote_5', now=0.1)
+    # a redelivery is still dropped
+    assert dedup.is_duplicate('q2', 1, 11, 'vote_5', now=0.2)
+
+
+def test_tracked_taps_are_bounded():
+    dedup = dedup_handler.CallbackDeduplicator(window=100, max_entries=10)
+    for i in range(50):
+        dedup.is_duplicate(f'q{i}', i, 1, 'confirm_votes', now=0.0)
+    assert len(dedup._ids) <= 10 and len(dedup._taps) <= 10
+
+
+def test_handler_stops_duplicates(monkeypatch):
+    monkeypatch.setattr(dedup_handler, 'deduplicator', dedup_handler.CallbackDeduplicator())
+    def make_update(query_id):
+        query = types.SimpleNamespace(id=query_id, data='final_confirm_vote_g1',
+                                      message=types.SimpleNamespace(message_id=5), inline_message_id=None)
+        query.answers = []
+        async def answer(*args, **kwargs):
+            query.answers.append(args)
+        query.answer = answer
+        return types.SimpleNamespace(callback_query=query, effective_user=types.SimpleNamespace(id=1))
+    asyncio.run(dedup_handler.drop_duplicate_callback(make_update('a'), None))
+    duplicate = make_update('b')
+    with pytest.raises(ApplicationHandlerStop):
+        asyncio.run(dedup_handler.drop_duplicate_callback(duplicate, None))
+    # The duplicate is answered silently so the client's spinner stops
+    assert duplicate.callback_query.answers == [()]
@@ -0,0 +1,69 @@
+import asyncio
+import types
+import importlib
+
+
+def load_dispatcher(monkeypatch, memory_db):
+    module = importlib.import_module('src.dispatcher')
+    monkeypatch.setattr(module, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(module.roles, 'reload_role_templates_if_changed', lambda: False)
+    return module
+
+
+def make_update(user_id, data=None):
+    query = types.SimpleNamespace(data=data) if data is not None else None
+    return types.SimpleNamespace(
+        callback_query=query,
+        effective_user=types.SimpleNamespace(id=user_id) if user_id else None
+    )
+
+
+def test_worker_index_is_stable():
+    from src.dispatcher import worker_index
+    assert worker_index("game:abc", 4) == worker_index("game:abc", 4)
+    assert all(0 <= worker_index(f"user:{i}", 3) < 3 for i in range(50))
+    # keys spread over more than one worker
+    assert len({worker_index(f"game:{i}", 4) for i in range(50)}) > 1
+
+
+def test_resolve_routing_key(monkeypatch, memory_db):
+    module = load_dispatcher(monkeypatch, memory_db)
+    memory_db.cursor.execute("INSERT INTO ActiveGames (user_id, game_id) VALUES (1, 'g1')")
+    memory_db.conn.commit()
+
+    assert module.resolve_routing_key(make_update(1, "vote_2")) == "game:g1"
+    assert module.resolve_routing_key(make_update(2, "final_confirm_vote_g9")) == "game:g9"
+    assert module.resolve_routing_key(make_update(2, "join_game")) == "user:2"
+    assert module.resolve_routing_key(make_update(None)) == "global"
+
+
+def test_sync_worker_state(monkeypatch, memory_db):
+    module = load_dispatcher(monkeypatch, memory_db)
+    memory_db.cursor.execute("INSERT INTO ActiveGames (user_id, game_id) VALUES (1, 'g2')")
+    memory_db.conn.commit()
+    context = types.SimpleNamespace(user_data={'game_id': 'old'})
+    asyncio.run(module.sync_worker_state(make_update(1), context))
+    assert context.user_data['game_id'] == 'g2'
+
+
+def test_sync_worker_state_reads_the_db_only_when_needed(monkeypatch, memory_db):
+    module = load_dispatcher(monkeypatch, memory_db)
+    template_checks = []
+    monkeypatch.setattr(module.roles, 'reload_role_templates_if_changed', lambda: template_checks.append(1))
+    monkeypatch.setattr(module, 'templates_checked_at', float('-inf'))
+    queries = []
+    monkeypatch.setattr(module, 'get_active_game', lambda user_id: queries.append(user_id) or 'g2')
+    owns_game = lambda game_id: game_id != 'elsewhere'
+
+    # A game of this worker is trusted, and the templates are checked once per interval
+    context = types.SimpleNamespace(user_data={'game_id': 'g1'})
+    for _ in range(3):
+        asyncio.run(module.sync_worker_state(make_update(1), context, owns_game=owns_game))
+    assert context.user_data['game_id'] == 'g1' and queries == [] and template_checks == [1]
+
+    # No game yet, or a game routed to another worker: the user's game has changed
+    for game_id in (None, 'elsewhere'):
+        context = types.SimpleNamespace(user_data={'game_id': game_id})
+        asyncio.run(module.sync_worker_state(make_update(1), context, owns_game=owns_game))
+        assert context.user_data['game_id'] == 'g2'
+    assert queries == [1, 1]
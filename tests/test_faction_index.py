@@ -0,0 +1,78 @@
+import asyncio
+import types
+import importlib
+import sys
+
+
+def load_modules(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    # Other tests reload the roles from temporary files
+    importlib.reload(importlib.import_module('src.roles'))
+    faction_index = importlib.reload(importlib.import_module('src.handlers.game_management.faction_index'))
+    player_management = importlib.reload(importlib.import_module('src.handlers.game_management.player_management'))
+    monkeypatch.setattr(faction_index, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(faction_index, 'BROADCAST_RATE', 1000)
+    monkeypatch.setattr(player_management, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(player_management, 'conn', memory_db.conn)
+    return faction_index, player_management
+
+
+class DummyBot:
+    def __init__(self, unreachable=()):
+        self.sent = []
+        self.unreachable = unreachable
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.unreachable:
+            raise Exception("Forbidden: bot was blocked by the user")
+        self.sent.append((chat_id, text))
+
+
+def make_update():
+    return types.SimpleNamespace(effective_user=types.SimpleNamespace(id=1), effective_chat=types.SimpleNamespace(id=1))
+
+
+PLAYERS = [(2, 'God F', 'Boss'), (3, 'MafiaSa', 'Goon'), (4, 'Doctor', 'Doc'), (5, 'ShahrSaD', 'Cit'), (6, 'Zodiac', 'Zod')]
+
+
+def setup_game(memory_db):
+    gid = 'g1'
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (gid, 'p', 1))
+    for uid, role, name in PLAYERS:
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, name))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, ?, 0)", (gid, uid, role))
+    memory_db.conn.commit()
+    return gid
+
+
+def test_index_is_rebuilt_after_elimination(monkeypatch, memory_db):
+    faction_index, player_management = load_modules(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    index = faction_index.build_faction_index(gid, PLAYERS)
+    assert index == {'Mafia': {2: 'Boss', 3: 'Goon'}, 'Villager': {4: 'Doc', 5: 'Cit'}, 'Independent': {6: 'Zod'}}
+
+    context = types.SimpleNamespace(bot=DummyBot(), user_data={})
+    asyncio.run(player_management.confirm_elimination(make_update(), context, gid, 3))
+    assert gid not in faction_index.faction_indexes
+    assert faction_index.get_faction_members(gid, 'Mafia') == {2: 'Boss'}
+
+    asyncio.run(player_management.confirm_revive(make_update(), context, gid, 3))
+    assert faction_index.get_faction_members(gid, 'Mafia') == {2: 'Boss', 3: 'Goon'}
+
+
+def test_faction_message_reaches_only_the_faction(monkeypatch, memory_db):
+    faction_index, _ = load_modules(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    faction_index.build_faction_index(gid, PLAYERS)
+    bot = DummyBot(unreachable=(3,))
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': gid})
+
+    asyncio.run(faction_index.prompt_faction_message(make_update(), context, gid, 'Mafia'))
+    assert context.user_data['action'] == "awaiting_faction_message"
+    bot.sent.clear()
+
+    asyncio.run(faction_index.send_faction_message(make_update(), context, "Meet at dawn"))
+    assert [chat_id for chat_id, _ in bot.sent] == [2, 1]
+    assert bot.sent[0][1].endswith("Meet at dawn")
+    assert bot.sent[1][1] == "Message sent to 1 of 2 Mafia player(s).\nFailed: Goon"
+    assert context.user_data['action'] is None
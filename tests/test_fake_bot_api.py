@@ -0,0 +1,55 @@
+import asyncio
+import pytest
+from telegram import Bot, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest, RetryAfter
+from tools.loadtest.fake_bot_api import FakeBotAPI, FaultInjection
+
+
+async def started_server(faults=None):
+    server = FakeBotAPI(faults)
+    runner = await server.start(port=0)
+    host, port = runner.addresses[0][:2]
+    return server, runner, f"http://{host}:{port}/bot"
+
+
+def test_bot_round_trip_through_fake_api():
+    async def run():
+        server, runner, base_url = await started_server()
+        bot = Bot("123:abc", base_url=base_url)
+        async with bot:
+            server.push_message(42, "/start")
+            updates = await bot.get_updates(timeout=1)
+            assert updates[0].message.text == "/start"
+            assert updates[0].message.chat.id == 42
+
+            since = server.mark(42)
+            markup = InlineKeyboardMarkup([[InlineKeyboardButton("Join", callback_data="join_game")]])
+            sent = await bot.send_message(chat_id=42, text="Welcome", reply_markup=markup)
+            _, seen = await server.wait_for(42, since, timeout=1)
+            assert seen["message_id"] == sent.message_id
+            assert seen["reply_markup"]["inline_keyboard"][0][0]["callback_data"] == "join_game"
+
+            await bot.edit_message_text(chat_id=42, message_id=sent.message_id, text="Edited")
+            with pytest.raises(BadRequest, match="not modified"):
+                await bot.edit_message_text(chat_id=42, message_id=sent.message_id, text="Edited")
+
+            server.push_callback(42, seen, "join_game")
+            updates = await bot.get_updates(offset=updates[-1].update_id + 1, timeout=1)
+            assert updates[0].callback_query.data == "join_game"
+            assert updates[0].callback_query.message.message_id == sent.message_id
+        await runner.cleanup()
+
+    asyncio.run(run())
+
+
+def test_injected_flood_control():
+    async def run():
+        server, runner, base_url = await started_server(FaultInjection(rate_429=1.0, retry_after=7))
+        bot = Bot("123:abc", base_url=base_url)
+        with pytest.raises(RetryAfter) as error:
+            await bot.send_message(chat_id=1, text="hi")
+        assert error.value.retry_after == 7
+        await bot.shutdown()
+        await runner.cleanup()
+
+    asyncio.run(run())
@@ -33,7 +33,7 @@ def load_module(monkeypatch, memory_db, name):
 
 def test_create_game(monkeypatch, memory_db):
     module = load_module(monkeypatch, memory_db, 'create_game')
-    monkeypatch.setattr(module, 'available_roles', ['A', 'B'])
+    monkeypatch.setattr(module.roles, 'available_roles', ['A', 'B'])
     seq = iter(['pass', 'gid'])
     monkeypatch.setattr(module.uuid, 'uuid4', lambda: next(seq))
     update = DummyUpdate(10)
@@ -68,8 +68,8 @@ def test_join_game(monkeypatch, memory_db):
 
 def test_start_game(monkeypatch, memory_db):
     module = load_module(monkeypatch, memory_db, 'start_game')
-    monkeypatch.setattr(module, 'role_descriptions', {'A':'descA','B':'descB'})
-    monkeypatch.setattr(module, 'role_factions', {'A':'Mafia','B':'Town'})
+    monkeypatch.setattr(module.roles, 'role_descriptions', {'A':'descA','B':'descB'})
+    monkeypatch.setattr(module.roles, 'role_factions', {'A':'Mafia','B':'Town'})
     # prepare game and roles
     memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id, randomness_method) VALUES ('g1','p',1,'Random.org')")
     for uid,name,role in [(1,'mod','A'), (2,'p2','B')]:
@@ -100,7 +100,7 @@ def setup_inquiry_game(memory_db):
 
 def test_inquiry_summary(monkeypatch, memory_db):
     module = load_module(monkeypatch, memory_db, 'inquiry')
-    monkeypatch.setattr(module, 'role_factions', {'A':'Mafia','B':'Town'})
+    monkeypatch.setattr(module.roles, 'role_factions', {'A':'Mafia','B':'Town'})
     monkeypatch.setattr(module, 'escape_markdown', lambda s, version=2: s)
     setup_inquiry_game(memory_db)
     update = DummyUpdate(1)
@@ -112,10 +112,34 @@ def test_inquiry_summary(monkeypatch, memory_db):
 
 def test_inquiry_detailed_summary(monkeypatch, memory_db):
     module = load_module(monkeypatch, memory_db, 'inquiry')
-    monkeypatch.setattr(module, 'role_factions', {'A':'Mafia','B':'Town'})
+    monkeypatch.setattr(module.roles, 'role_factions', {'A':'Mafia','B':'Town'})
     monkeypatch.setattr(module, 'escape_markdown', lambda s, version=2: s)
     setup_inquiry_game(memory_db)
     update = DummyUpdate(1)
     context = DummyContext()
     asyncio.run(module.send_detailed_inquiry_summary(update, context, 'inq'))
     assert len(context.bot.sent) == 4
+
+
+def test_inquiry_counters_follow_eliminations(monkeypatch, memory_db):
+    module = load_module(monkeypatch, memory_db, 'inquiry')
+    monkeypatch.setattr(module.roles, 'role_factions', {'A':'Mafia','B':'Town'})
+    monkeypatch.setattr(module, 'escape_markdown', lambda s, version=2: s)
+    setup_inquiry_game(memory_db)
+    update = DummyUpdate(1)
+    context = DummyContext()
+    asyncio.run(module.send_detailed_inquiry_summary(update, context, 'inq'))
+    text = context.bot.sent[0][1]['text']
+    assert "**Active Players:**\n- Mafia:\n  - A (1)\n- Town:\n  - B (1)\n" in text
+    assert "**Eliminated Players:**\n- Town:\n  - B (1)\n" in text
+
+    # Later inquiries render from the counters, not from the Roles table
+    memory_db.cursor.execute("DELETE FROM Roles")
+    counters = module.inquiry_counters['inq']
+    assert counters.render(True) is text
+    module.update_inquiry_counters('inq', 2, eliminated=True)
+    assert counters.factions == {'Mafia': [1, 0], 'Town': [0, 2]}
+    context = DummyContext()
+    asyncio.run(module.send_inquiry_summary(update, context, 'inq'))
+    assert context.bot.sent[0][1]['text'].endswith(
+        "**Active Players:**\n- Mafia: 1 player(s)\n\n**Eliminated Players:**\n- Town: 2 player(s)\n")
@@ -0,0 +1,253 @@
+import asyncio
+import types
+import importlib
+import sys
+
+from src.game_state import GameStateVersions
+
+
+class DummyBot:
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+        self.markups = {}
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        self.markups[chat_id] = kwargs.get('reply_markup')
+        return types.SimpleNamespace(message_id=10 + len(self.sent))
+
+    async def edit_message_text(self, **kwargs):
+        self.edited.append(kwargs)
+
+    async def edit_message_reply_markup(self, **kwargs):
+        pass
+
+
+def make_update():
+    return types.SimpleNamespace(effective_chat=types.SimpleNamespace(id=1), effective_user=types.SimpleNamespace(id=1))
+
+
+def test_versions_and_shown_messages():
+    versions = GameStateVersions(max_messages=2)
+    assert versions.version('g1', 'roles') == 0
+    assert versions.bump('g1', 'roles') == 1 and versions.version('g2', 'roles') == 0
+
+    assert versions.rendered('g1', 'view', 1) is None
+    versions.store_rendered('g1', 'view', 1, "text")
+    assert versions.rendered('g1', 'view', 1) == "text" and versions.rendered('g1', 'view', 2) is None
+
+    versions.mark_shown(1, 5, 'g1', 'view', 1, "text")
+    assert versions.is_shown(1, 5, 'g1', 'view', 1)
+    assert not versions.is_shown(1, 5, 'g1', 'view', 2)
+    # The same view and version of another game on the same message is not shown
+    assert not versions.is_shown(1, 5, 'g2', 'view', 1)
+    # A newer version with the same content is still shown
+    assert versions.is_shown(1, 5, 'g1', 'view', 2, "text")
+    versions.mark_shown(1, 6, 'g1', 'view', 1)
+    versions.mark_shown(1, 7, 'g1', 'view', 1)
+    assert not versions.is_shown(1, 5, 'g1', 'view', 1)
+
+
+def test_unchanged_role_buttons_are_not_edited(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1, TOKEN='t')
+    module = importlib.reload(importlib.import_module('src.handlers.game_management.roles_setup'))
+    versions = GameStateVersions()
+    monkeypatch.setattr(module, 'versions', versions)
+    monkeypatch.setattr(module.roles, 'available_roles', ['A', 'B'])
+    memory_db.cursor.execute("INSERT INTO GameRoles (game_id, role, count) VALUES ('g1', 'A', 0)")
+    memory_db.conn.commit()
+    bot = DummyBot()
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': 'g1', 'current_page': 0})
+
+    message_id = asyncio.run(module.show_role_buttons(make_update(), context))
+    # e.g. a decrease_ on a zero count: nothing changed, nothing is sent
+    assert asyncio.run(module.show_role_buttons(make_update(), context, message_id)) == message_id
+    assert bot.edited == []
+
+    memory_db.cursor.execute("UPDATE GameRoles SET count = 1 WHERE game_id = 'g1' AND role = 'A'")
+    versions.bump('g1', 'roles')
+    asyncio.run(module.show_role_buttons(make_update(), context, message_id))
+    asyncio.run(module.show_role_buttons(make_update(), context, message_id))
+    assert len(bot.edited) == 1
+    assert bot.edited[0]['reply_markup'].inline_keyboard[0][1].text == "A (1)"
+
+
+def test_unchanged_voting_summary_is_not_edited(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    voting_session = importlib.import_module('src.handlers.game_management.voting_session')
+    versions = GameStateVersions()
+    monkeypatch.setattr(voting, 'versions', versions)
+    monkeypatch.setattr(voting_session, 'versions', versions)
+    monkeypatch.setattr(voting, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(voting, 'conn', memory_db.conn)
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES ('g1', 'p', 1)")
+    memory_db.conn.commit()
+
+    session = voting.VotingSession('g1', [(2, 'A'), (3, 'B')])
+    voting.game_voting_data['g1'] = session
+    session.open_voting()
+    bot = DummyBot()
+    context = types.SimpleNamespace(bot=bot)
+    asyncio.run(voting.send_voting_summary(context, 'g1'))
+    asyncio.run(voting.send_voting_summary(context, 'g1'))
+    assert len(bot.sent) == 1 and bot.edited == []
+
+    # A toggle that is undone changes the version but not the text
+    session.toggle(2, 3)
+    session.toggle(2, 3)
+    asyncio.run(voting.send_voting_summary(context, 'g1'))
+    assert bot.edited == []
+
+    session.toggle(2, 3)
+    asyncio.run(voting.send_voting_summary(context, 'g1'))
+    assert len(bot.edited) == 1
+    voting.game_voting_data.pop('g1')
+
+
+def load_voting_game(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    monkeypatch.setattr(voting, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(voting, 'conn', memory_db.conn)
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES ('g1', 'p', 1)")
+    for uid, name in [(2, 'A'), (3, 'B'), (4, 'C')]:
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, name))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES ('g1', ?, 'R', 0)", (uid,))
+    memory_db.conn.commit()
+    return voting
+
+
+def test_voters_share_one_vote_keyboard(monkeypatch, memory_db):
+    voting = load_voting_game(monkeypatch, memory_db)
+    bot = DummyBot()
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': 'g1'})
+
+    asyncio.run(voting.prompt_voting_permissions(make_update(), context, 'g1', anonymous=False))
+    session = voting.game_voting_data['g1']
+    session.toggle_permission(4, 'can_be_voted')
+    query = types.SimpleNamespace(data='confirm_permissions', message=types.SimpleNamespace(chat_id=1, message_id=1))
+    query.answer = lambda *args, **kwargs: asyncio.sleep(0)
+    update = types.SimpleNamespace(effective_chat=types.SimpleNamespace(id=1), effective_user=types.SimpleNamespace(id=1),
+                                   callback_query=query)
+    asyncio.run(voting.confirm_permissions(update, context))
+
+    keyboards = [bot.markups[voter_id] for voter_id in (2, 3, 4)]
+    assert keyboards[0] is keyboards[1] is keyboards[2] is voting.vote_keyboard(session)
+    assert session.keyboards[('shown', 2)] is keyboards[0]
+    assert [row[0].text for row in keyboards[0].inline_keyboard] == ['A ❌', 'B ❌', 'Confirm Votes']
+    voting.game_voting_data.pop('g1')
+
+
+class SlowQuery:
+    """A vote message whose keyboard edits only complete when released."""
+
+    def __init__(self):
+        self.markups = []
+        self.texts = []
+        self.released = asyncio.Event()
+
+    async def edit_message_reply_markup(self, reply_markup=None):
+        await self.released.wait()
+        self.markups.append(reply_markup)
+
+    async def edit_message_text(self, text, reply_markup=None):
+        self.texts.append(text)
+        self.markups.append(reply_markup)
+
+
+def make_vote_context():
+    application = types.SimpleNamespace(create_task=lambda coroutine, update=None: asyncio.ensure_future(coroutine))
+    return types.SimpleNamespace(bot=DummyBot(), application=application)
+
+
+def test_rapid_vote_toggles_patch_one_button_and_coalesce(monkeypatch, memory_db):
+    voting = load_voting_game(monkeypatch, memory_db)
+    session = voting.VotingSession('g1', [(2, 'A'), (3, 'B'), (4, 'C')])
+    voting.game_voting_data['g1'] = session
+    session.open_voting()
+    base = voting.vote_keyboard(session)
+    query = SlowQuery()
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=2), callback_query=query)
+    context = make_vote_context()
+
+    async def tap_burst():
+        await voting.handle_vote(update, context, 'g1', 3)
+        await asyncio.sleep(0)  # the edit is now in flight
+        for target_id in (4, 2, 2):
+            await voting.handle_vote(update, context, 'g1', target_id)
+        query.released.set()
+        await session.keyboard_edits[2]
+
+    asyncio.run(tap_burst())
+    # The first tap's edit was in flight; the three taps after it collapse into one edit
+    assert len(query.markups) == 2
+    first, last = query.markups
+    assert [row[0].text for row in first.inline_keyboard] == ['A ❌', 'B ✅', 'C ❌', 'Confirm Votes']
+    assert [row[0].text for row in last.inline_keyboard] == ['A ❌', 'B ✅', 'C ✅', 'Confirm Votes']
+    # Untouched buttons are the shared keyboard's own
+    assert last.inline_keyboard[0][0] is base.inline_keyboard[0][0]
+    assert last.inline_keyboard[1][0] is first.inline_keyboard[1][0]
+
+    # Undoing a toggle before its edit went out sends nothing
+    async def undo():
+        for target_id in (2, 2):
+            await voting.handle_vote(update, context, 'g1', target_id)
+        await session.keyboard_edits[2]
+
+    asyncio.run(undo())
+    assert len(query.markups) == 2
+    voting.game_voting_data.pop('g1')
+
+
+def test_confirm_waits_for_the_vote_keyboard_edit_in_flight(monkeypatch, memory_db):
+    voting = load_voting_game(monkeypatch, memory_db)
+    session = voting.VotingSession('g1', [(2, 'A'), (3, 'B'), (4, 'C')])
+    voting.game_voting_data['g1'] = session
+    session.open_voting()
+    query = SlowQuery()
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=2), callback_query=query)
+    context = make_vote_context()
+
+    async def toggle_then_confirm():
+        await voting.handle_vote(update, context, 'g1', 3)
+        await asyncio.sleep(0)  # the edit is now in flight
+        await voting.handle_vote(update, context, 'g1', 4)  # waiting behind it
+        confirm = asyncio.ensure_future(voting.confirm_votes(update, context, 'g1'))
+        await asyncio.sleep(0)
+        assert not confirm.done()
+        query.released.set()
+        await confirm
+
+    asyncio.run(toggle_then_confirm())
+    # The stale keyboard was dropped, and the in-flight edit landed before the confirmation
+    assert len(query.markups) == 2
+    assert [row[0].text for row in query.markups[0].inline_keyboard][1] == 'B ✅'
+    assert [row[0].text for row in query.markups[1].inline_keyboard] == ['Final Confirm', 'Cancel']
+    assert query.texts == ["You are voting for: B, C.\nAre you sure?"]
+    assert session.keyboard_edits == {} and session.pending_keyboards == {}
+    voting.game_voting_data.pop('g1')
+
+
+def test_failed_vote_keyboard_edit_is_logged_not_raised(monkeypatch, memory_db):
+    from telegram.error import BadRequest
+    voting = load_voting_game(monkeypatch, memory_db)
+    session = voting.VotingSession('g1', [(2, 'A'), (3, 'B'), (4, 'C')])
+    voting.game_voting_data['g1'] = session
+    session.open_voting()
+
+    async def edit_message_reply_markup(reply_markup=None):
+        raise BadRequest("Message to edit not found")
+    query = types.SimpleNamespace(edit_message_reply_markup=edit_message_reply_markup)
+    update = types.SimpleNamespace(effective_user=types.SimpleNamespace(id=2), callback_query=query)
+    context = make_vote_context()
+
+    async def tap():
+        await voting.handle_vote(update, context, 'g1', 3)
+        return await session.keyboard_edits[2]
+
+    assert asyncio.run(tap()) is None
+    # The vote is recorded even though its keyboard could not be updated
+    assert session.has_voted_for(2, 3) and ('shown', 2) not in session.keyboards
+    voting.game_voting_data.pop('g1')
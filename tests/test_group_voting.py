@@ -0,0 +1,121 @@
+import asyncio
+import types
+import importlib
+import sys
+
+
+def load_group_voting(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    group_voting = importlib.reload(importlib.import_module('src.handlers.game_management.group_voting'))
+    for module in (voting, group_voting):
+        monkeypatch.setattr(module, 'cursor', memory_db.cursor)
+        monkeypatch.setattr(module, 'conn', memory_db.conn)
+    return voting, group_voting
+
+
+class DummyBot:
+    def __init__(self):
+        self.sent = []
+        self.edits = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        return types.SimpleNamespace(message_id=len(self.sent))
+
+    async def edit_message_text(self, **kwargs):
+        self.edits.append(kwargs)
+
+    async def edit_message_reply_markup(self, **kwargs):
+        self.edits.append(kwargs)
+
+
+class DummyQuery:
+    def __init__(self, data, chat_id):
+        self.data = data
+        self.message = types.SimpleNamespace(chat_id=chat_id, message_id=1)
+        self.answers = []
+        self.markups = []
+
+    async def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+
+    async def edit_message_reply_markup(self, reply_markup=None):
+        self.markups.append(reply_markup)
+
+    async def edit_message_text(self, text, reply_markup=None):
+        self.markups.append(reply_markup)
+
+
+class DummyUpdate:
+    def __init__(self, user_id, chat_id, data=None):
+        self.effective_user = types.SimpleNamespace(id=user_id)
+        self.effective_chat = types.SimpleNamespace(id=chat_id)
+        self.callback_query = DummyQuery(data, chat_id) if data else None
+
+
+def make_context(bot, game_id=None):
+    return types.SimpleNamespace(bot=bot, user_data={'game_id': game_id} if game_id else {})
+
+
+GROUP_ID = -1001
+
+
+def setup_game(memory_db):
+    gid = 'g1'
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (gid, 'p', 1))
+    memory_db.cursor.execute("INSERT INTO ActiveGames (user_id, game_id) VALUES (1, ?)", (gid,))
+    for uid, name in [(2, 'A'), (3, 'B'), (4, 'C')]:
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, name))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, 'R', 0)", (gid, uid))
+    memory_db.conn.commit()
+    return gid
+
+
+def test_only_the_moderator_binds_a_group(monkeypatch, memory_db):
+    voting, group_voting = load_group_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    bot = DummyBot()
+
+    asyncio.run(group_voting.bind_group(DummyUpdate(2, GROUP_ID), make_context(bot)))
+    assert voting.get_group_chat(gid) is None
+
+    asyncio.run(group_voting.bind_group(DummyUpdate(1, GROUP_ID), make_context(bot)))
+    assert voting.get_group_chat(gid) == GROUP_ID
+
+    asyncio.run(group_voting.unbind_group(DummyUpdate(1, GROUP_ID), make_context(bot)))
+    assert voting.get_group_chat(gid) is None
+
+
+def test_open_vote_in_group_sends_constant_messages(monkeypatch, memory_db):
+    voting, group_voting = load_group_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    bot = DummyBot()
+    asyncio.run(group_voting.bind_group(DummyUpdate(1, GROUP_ID), make_context(bot)))
+    bot.sent.clear()
+
+    asyncio.run(voting.prompt_voting_permissions(DummyUpdate(1, 1), make_context(bot, gid), gid, anonymous=False))
+    asyncio.run(voting.confirm_permissions(DummyUpdate(1, 1, 'confirm_permissions'), make_context(bot, gid)))
+    # The permissions prompt to the moderator and one shared voting message
+    assert [chat_id for chat_id, _ in bot.sent] == [1, GROUP_ID]
+    session = voting.game_voting_data[gid]
+    assert session.group_message_id == 2
+
+    tap = DummyUpdate(2, GROUP_ID, f'gvote_3_{gid}')
+    asyncio.run(group_voting.handle_group_vote(tap, make_context(bot)))
+    assert tap.callback_query.answers == ['Your votes: B']
+    counts = [row[0].text for row in tap.callback_query.markups[-1].inline_keyboard[:-1]]
+    assert counts == ['A (0)', 'B (1)', 'C (0)']
+
+    # Players of another game, or who already confirmed, cannot vote
+    stranger = DummyUpdate(9, GROUP_ID, f'gvote_3_{gid}')
+    asyncio.run(group_voting.handle_group_vote(stranger, make_context(bot)))
+    assert session.votes_for(3) == 1
+
+    for voter_id in (2, 3, 4):
+        asyncio.run(group_voting.confirm_group_vote(DummyUpdate(voter_id, GROUP_ID, f'gconfirm_{gid}'), make_context(bot)))
+
+    assert gid not in voting.game_voting_data
+    # Results are posted to the group once, no player gets a private message
+    assert [chat_id for chat_id, _ in bot.sent] == [1, GROUP_ID, GROUP_ID]
+    assert 'B' in bot.sent[-1][1]
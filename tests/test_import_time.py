@@ -0,0 +1,51 @@
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Self time of the bot's own modules (main and src.*) while importing main, in milliseconds.
+# About 10 ms on a laptop; the budget leaves room for slow CI machines.
+OWN_MODULES_BUDGET_MS = 100
+
+# Everything, including python-telegram-bot, in milliseconds
+TOTAL_BUDGET_MS = 2000
+
+# Imported on first use only
+DEFERRED_MODULES = ("aiohttp",)
+
+PROBE = ("import main, src.config, src.roles; print(src.config.load_config.cache_info().currsize); "
+         "print(sorted(set(src.roles.CATALOG_ATTRIBUTES + src.roles.TEMPLATE_ATTRIBUTES) & set(vars(src.roles))))")
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def test_importing_main_stays_within_budget():
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", PROBE], cwd=REPO_ROOT,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr[-2000:]
+    config_loads, loaded_role_data = result.stdout.splitlines()
+    # token.txt is only read by the bootstrap, so importing works without it
+    assert config_loads == "0"
+    # Handlers read the role catalog and templates through src.roles on first use
+    assert loaded_role_data == "[]"
+
+    own_us = 0
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line.rstrip())
+        if not match:
+            continue
+        self_us, cumulative_us, _, name = match.groups()
+        imported.add(name)
+        if name == "main" or name == "src" or name.startswith("src."):
+            own_us += int(self_us)
+        if name == "main":
+            total_us = int(cumulative_us)
+
+    for name in DEFERRED_MODULES:
+        assert not any(module == name or module.startswith(name + ".") for module in imported), name
+    assert own_us / 1000 < OWN_MODULES_BUDGET_MS
+    assert total_us / 1000 < TOTAL_BUDGET_MS
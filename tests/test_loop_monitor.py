@@ -0,0 +1,31 @@
+import asyncio
+import time
+from src.loop_monitor import LoopLagMonitor
+from src.metrics import instrumented
+
+
+@instrumented(lambda update, context: "button:slow_commit")
+async def blocking_handler(update, context):
+    time.sleep(0.4)
+
+
+def test_blocking_handler_is_sampled():
+    monitor = LoopLagMonitor(threshold=0.1)
+
+    async def run():
+        await monitor.start()
+        await asyncio.sleep(0.25)
+        await blocking_handler(None, None)
+        await asyncio.sleep(0.25)
+        monitor.stop()
+
+    asyncio.run(run())
+    assert monitor.stall_count == 1
+    stall = monitor.stalls[-1]
+    assert stall.route == "button:slow_commit"
+    assert "blocking_handler" in "".join(stall.stack)
+    assert stall.duration >= 0.25
+    assert monitor.max_lag >= 0.25
+    report = monitor.report()
+    assert "button:slow_commit" in report and "Stalls over 100 ms: 1" in report
+    assert any(line.startswith("mafia_bot_event_loop_stalls_total 1") for line in monitor.prometheus_lines())
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src import metrics
+
+
+def test_route_for_callback_strips_variable_part():
+    assert metrics.route_for_callback('vote_123') == 'vote'
+    assert metrics.route_for_callback('final_confirm_vote_abc') == 'final_confirm_vote'
+    assert metrics.route_for_callback('increase_Doctor') == 'increase'
+    assert metrics.route_for_callback('toggle_can_be_voted_5') == 'toggle_can_be_voted'
+    assert metrics.route_for_callback('confirm_roles') == 'confirm_roles'
+
+
+def test_histogram_quantiles():
+    histogram = metrics.Histogram()
+    for _ in range(99):
+        histogram.observe(0.003)
+    histogram.observe(2.0, error=True)
+    assert histogram.count == 100 and histogram.errors == 1
+    assert histogram.quantile(0.5) <= 0.005
+    assert 1.0 < histogram.quantile(0.999) <= 2.5
+
+
+def test_instrumented_records_latency_and_errors(monkeypatch):
+    registry = metrics.MetricsRegistry()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    seen_routes = []
+
+    @metrics.instrumented(lambda update, context: f"button:{update}")
+    async def handler(update, context):
+        seen_routes.append(metrics.current_route.get())
+        if context == 'fail':
+            raise ValueError
+
+    asyncio.run(handler('vote', None))
+    with pytest.raises(ValueError):
+        asyncio.run(handler('vote', 'fail'))
+
+    assert seen_routes == ['button:vote', 'button:vote']
+    assert metrics.current_route.get() is None
+    assert registry.handlers['button:vote'].count == 2
+    assert registry.handlers['button:vote'].errors == 1
+
+    text = registry.render_prometheus()
+    assert 'mafia_bot_handler_latency_seconds_count{route="button:vote"} 2' in text
+    assert 'mafia_bot_handler_latency_seconds_bucket{route="button:vote",le="+Inf"} 2' in text
+    assert 'mafia_bot_handler_errors_total{route="button:vote"} 1' in text
+
+
+def test_metrics_endpoint(monkeypatch):
+    registry = metrics.MetricsRegistry()
+    registry.observe('passcode:join_game', 0.02)
+    monkeypatch.setattr(metrics, 'registry', registry)
+
+    async def run():
+        server = await metrics.start_metrics_server(0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response.decode()
+
+    response = asyncio.run(run())
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert 'route="passcode:join_game"' in response
@@ -0,0 +1,115 @@
+import asyncio
+import types
+import importlib
+import sys
+
+
+def load_night_phase(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    # Other tests reload the roles from temporary files
+    importlib.reload(importlib.import_module('src.roles'))
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    night_phase = importlib.reload(importlib.import_module('src.handlers.game_management.night_phase'))
+    for module in (voting, night_phase):
+        monkeypatch.setattr(module, 'cursor', memory_db.cursor)
+        monkeypatch.setattr(module, 'conn', memory_db.conn)
+    return night_phase
+
+
+class DummyBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text, kwargs.get('reply_markup')))
+        return types.SimpleNamespace(message_id=len(self.sent))
+
+
+class DummyQuery:
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+
+    async def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+
+    async def edit_message_text(self, text, reply_markup=None):
+        pass
+
+
+def make_update(user_id, data=None):
+    return types.SimpleNamespace(effective_user=types.SimpleNamespace(id=user_id),
+                                 effective_chat=types.SimpleNamespace(id=user_id),
+                                 callback_query=DummyQuery(data) if data else None)
+
+
+PLAYERS = [(2, 'Doc', 'Doctor'), (3, 'Boss', 'God F'), (4, 'Det', 'Kar Agah'), (5, 'Bar', 'Bartender'),
+           (6, 'Cit', 'ShahrSaD'), (7, 'Zod', 'Zodiac')]
+
+
+def setup_game(memory_db):
+    gid = 'g1'
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (gid, 'p', 1))
+    for uid, name, role in PLAYERS:
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, name))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, ?, 0)", (gid, uid, role))
+    memory_db.conn.commit()
+    return gid
+
+
+def test_resolve_applies_role_priorities(monkeypatch, memory_db):
+    night_phase = load_night_phase(monkeypatch, memory_db)
+    session = night_phase.NightSession('g1', PLAYERS)
+    assert set(session.actors) == {2, 3, 4, 5, 7}
+
+    session.submit(2, 6)  # Doctor saves the citizen the Godfather shoots
+    session.submit(3, 6)
+    session.submit(4, 3)  # Kar Agah investigates the Godfather
+    session.submit(5, None)
+    session.submit(7, 4)  # Zodiac kills Kar Agah
+    outcome = session.resolve()
+    assert outcome['eliminated'] == [4]
+    assert outcome['survived'] == [6]
+    assert outcome['investigations'] == {4: (3, 'Villager')}
+
+    # A blocked Doctor saves nobody, and the Zodiac is immune to night kills
+    session.actions.clear()
+    session.submit(2, 6)
+    session.submit(3, 6)
+    session.submit(5, 2)
+    session.submit(4, 7)
+    outcome = session.resolve()
+    assert outcome['eliminated'] == [6]
+    assert outcome['blocked'] == {2}
+    assert outcome['investigations'] == {4: (7, 'Independent')}
+
+
+def test_night_round_is_resolved_in_one_batch(monkeypatch, memory_db):
+    night_phase = load_night_phase(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    bot = DummyBot()
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': gid})
+
+    asyncio.run(night_phase.start_night(make_update(1), context, gid))
+    assert sorted(chat_id for chat_id, _, markup in bot.sent if markup and chat_id != 1) == [2, 3, 4, 5, 7]
+    assert bot.sent[-1][0] == 1 and "Waiting for" in bot.sent[-1][1]
+
+    bot.sent.clear()
+    for actor_id, data in [(3, f"night_6_{gid}"), (2, f"night_3_{gid}"), (4, f"night_3_{gid}"), (5, f"nightskip_{gid}")]:
+        asyncio.run(night_phase.handle_night_action(make_update(actor_id, data), context))
+    # Players without a night action cannot submit one
+    update = make_update(6, f"night_2_{gid}")
+    asyncio.run(night_phase.handle_night_action(update, context))
+    assert update.callback_query.answers == ["You have no action to take tonight."]
+    assert bot.sent == []
+
+    asyncio.run(night_phase.handle_night_action(make_update(7, f"nightskip_{gid}"), context))
+    assert gid not in night_phase.game_night_data
+    memory_db.cursor.execute("SELECT user_id FROM Roles WHERE game_id = ? AND eliminated = 1", (gid,))
+    assert memory_db.cursor.fetchall() == [(6,)]
+
+    assert (4, "🔍 Boss is Villager.", None) in bot.sent
+    report = [text for chat_id, text, _ in bot.sent if chat_id == 1 and "Night report" in text]
+    assert report and "Eliminated: Cit" in report[0]
+    announcements = [chat_id for chat_id, text, _ in bot.sent if text == "☀️ The night is over. Eliminated: Cit."]
+    assert sorted(announcements) == [2, 3, 4, 5, 6, 7]
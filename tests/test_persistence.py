@@ -0,0 +1,52 @@
+import asyncio
+import importlib
+
+
+def load_persistence(monkeypatch, memory_db):
+    module = importlib.import_module('src.persistence')
+    monkeypatch.setattr(module, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(module, 'conn', memory_db.conn)
+    return module
+
+
+def test_round_trip_and_dirty_tracking(monkeypatch, memory_db):
+    module = load_persistence(monkeypatch, memory_db)
+    persistence = module.SQLitePersistence()
+
+    async def run():
+        await asyncio.gather(
+            persistence.update_user_data(1, {'game_id': 'g1', 'action': 'join_game'}),
+            persistence.update_user_data(2, {'game_id': 'g1', 'current_page': 2}),
+        )
+    asyncio.run(run())
+
+    memory_db.cursor.execute("SELECT COUNT(*) FROM UserData")
+    assert memory_db.cursor.fetchone()[0] == 2
+
+    # Unchanged data is not written again
+    statements = []
+    memory_db.conn.set_trace_callback(statements.append)
+    asyncio.run(persistence.update_user_data(1, {'action': 'join_game', 'game_id': 'g1'}))
+    memory_db.conn.set_trace_callback(None)
+    assert not any('UserData' in s for s in statements)
+
+    restored = asyncio.run(module.SQLitePersistence().get_user_data())
+    assert restored == {
+        1: {'game_id': 'g1', 'action': 'join_game'},
+        2: {'game_id': 'g1', 'current_page': 2},
+    }
+
+
+def test_refresh_and_drop(monkeypatch, memory_db):
+    module = load_persistence(monkeypatch, memory_db)
+    writer = module.SQLitePersistence()
+    reader = module.SQLitePersistence(refresh_from_db=True)
+    asyncio.run(writer.update_user_data(5, {'game_id': 'g2'}))
+
+    user_data = {'game_id': 'stale'}
+    asyncio.run(reader.refresh_user_data(5, user_data))
+    assert user_data == {'game_id': 'g2'}
+
+    asyncio.run(writer.drop_user_data(5))
+    memory_db.cursor.execute("SELECT COUNT(*) FROM UserData")
+    assert memory_db.cursor.fetchone()[0] == 0
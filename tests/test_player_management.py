@@ -72,3 +72,30 @@ def test_confirm_revive(monkeypatch, memory_db):
     memory_db.cursor.execute("SELECT eliminated FROM Roles WHERE game_id=? AND user_id=?", (game_id, 2))
     assert memory_db.cursor.fetchone()[0] == 0
 
+
+
+def test_elimination_while_setting_permissions_keeps_the_session(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(MAINTAINER_ID=1, RANDOM_ORG_API_KEY='', TOKEN='t')
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    module = importlib.reload(importlib.import_module('src.handlers.game_management.player_management'))
+    for target in (module, voting):
+        monkeypatch.setattr(target, 'cursor', memory_db.cursor)
+        monkeypatch.setattr(target, 'conn', memory_db.conn)
+    game_id = setup_game(memory_db)
+    memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (3, 'other')")
+    memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role) VALUES (?, 3, 'R')", (game_id,))
+    memory_db.conn.commit()
+    # Permissions are being set: the session exists but voting has not opened
+    session = voting.VotingSession(game_id, [(2, 'player'), (3, 'other')])
+    voting.game_voting_data[game_id] = session
+    context = DummyContext()
+
+    asyncio.run(module.confirm_elimination(DummyUpdate(1), context, game_id, 2))
+    assert voting.game_voting_data.get(game_id) is session
+    assert not any("No votes" in kwargs.get('text', '') for args, kwargs in context.bot.sent)
+
+    # Once voting is open, eliminating the last voter who has not confirmed closes the round
+    session.open_voting()
+    session.confirm(3)
+    asyncio.run(module.confirm_elimination(DummyUpdate(1), context, game_id, 3))
+    assert game_id not in voting.game_voting_data
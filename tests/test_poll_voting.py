@@ -0,0 +1,115 @@
+import asyncio
+import types
+import importlib
+import sys
+
+
+def load_poll_voting(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    poll_voting = importlib.reload(importlib.import_module('src.handlers.game_management.poll_voting'))
+    for module in (voting, poll_voting):
+        monkeypatch.setattr(module, 'cursor', memory_db.cursor)
+        monkeypatch.setattr(module, 'conn', memory_db.conn)
+    return voting, poll_voting
+
+
+class DummyBot:
+    def __init__(self):
+        self.sent = []
+        self.polls = []
+        self.stopped = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, kwargs.get('reply_markup')))
+        return types.SimpleNamespace(message_id=len(self.sent))
+
+    async def send_poll(self, chat_id, question, options, **kwargs):
+        self.polls.append((chat_id, options, kwargs))
+        return types.SimpleNamespace(message_id=100 + chat_id, poll=types.SimpleNamespace(id=f"poll{chat_id}"))
+
+    async def stop_poll(self, chat_id, message_id):
+        self.stopped.append(chat_id)
+
+    async def edit_message_text(self, **kwargs):
+        pass
+
+    async def edit_message_reply_markup(self, **kwargs):
+        pass
+
+
+class DummyQuery:
+    data = 'confirm_permissions'
+    message = types.SimpleNamespace(chat_id=1, message_id=1)
+
+    async def answer(self):
+        pass
+
+
+def moderator_update():
+    return types.SimpleNamespace(effective_user=types.SimpleNamespace(id=1), effective_chat=types.SimpleNamespace(id=1),
+                                 callback_query=DummyQuery())
+
+
+def answer(voter_id, option_ids):
+    poll_answer = types.SimpleNamespace(poll_id=f"poll{voter_id}", user=types.SimpleNamespace(id=voter_id),
+                                        option_ids=option_ids)
+    return types.SimpleNamespace(poll_answer=poll_answer, effective_user=poll_answer.user, effective_chat=None)
+
+
+def setup_game(memory_db, player_count):
+    gid = 'g1'
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (gid, 'p', 1))
+    for uid in range(2, 2 + player_count):
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, f"P{uid}"))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, 'R', 0)", (gid, uid))
+    memory_db.conn.commit()
+    return gid
+
+
+def start_poll_vote(voting, bot, gid):
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': gid})
+    asyncio.run(voting.prompt_voting_permissions(moderator_update(), context, gid, anonymous=True, use_polls=True))
+    asyncio.run(voting.confirm_permissions(moderator_update(), context))
+    return context
+
+
+def test_poll_answers_feed_the_tally(monkeypatch, memory_db):
+    voting, poll_voting = load_poll_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db, 3)
+    bot = DummyBot()
+    context = start_poll_vote(voting, bot, gid)
+
+    assert [chat_id for chat_id, _, _ in bot.polls] == [2, 3, 4]
+    assert bot.polls[0][1] == ['P2', 'P3', 'P4', poll_voting.ABSTAIN_OPTION]
+    assert bot.polls[0][2] == {'is_anonymous': False, 'allows_multiple_answers': True}
+    # Only the permissions prompt and the moderator's summary, no voting keyboards
+    assert all(chat_id == 1 for chat_id, _ in bot.sent)
+
+    session = voting.game_voting_data[gid]
+    asyncio.run(poll_voting.handle_poll_answer(answer(2, [1, 2]), context))
+    assert session.selected_targets(2) == [3, 4]
+    assert 2 not in session.voters
+
+    # Retracting and answering again replaces the ballot
+    asyncio.run(poll_voting.handle_poll_answer(answer(2, []), context))
+    asyncio.run(poll_voting.handle_poll_answer(answer(2, [1]), context))
+    assert session.results() == [(3, 1)]
+
+    asyncio.run(poll_voting.handle_poll_answer(answer(3, [0]), context))
+    asyncio.run(poll_voting.handle_poll_answer(answer(4, [3]), context))
+    assert gid not in voting.game_voting_data
+    assert bot.stopped == [2, 3, 4]
+    memory_db.cursor.execute("SELECT COUNT(*) FROM VotingPolls")
+    assert memory_db.cursor.fetchone()[0] == 0
+
+
+def test_too_many_candidates_fall_back_to_buttons(monkeypatch, memory_db):
+    voting, poll_voting = load_poll_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db, poll_voting.MAX_POLL_OPTIONS)
+    bot = DummyBot()
+    start_poll_vote(voting, bot, gid)
+
+    assert bot.polls == []
+    assert not voting.game_voting_data[gid].use_polls
+    assert sum(1 for _, markup in bot.sent if markup is not None) == poll_voting.MAX_POLL_OPTIONS + 1
@@ -0,0 +1,40 @@
+import asyncio
+import time
+from src.profiling import MemoryProfiler, SamplingProfiler
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < deadline:
+        total += sum(range(100))
+    return total
+
+
+def test_sampling_profiler_finds_busy_function():
+    profiler = SamplingProfiler(interval=0.002)
+
+    async def run():
+        profiler.start()
+        spin(0.2)
+        await asyncio.sleep(0.1)
+        profiler.stop()
+
+    asyncio.run(run())
+    assert profiler.samples > 20
+    assert 0 < profiler.idle < profiler.samples
+    assert "spin (test_profiling.py" in profiler.summary()
+    assert any("spin (test_profiling.py" in line for line in profiler.collapsed().splitlines())
+
+
+def test_memory_profiler_reports_growth_and_gauges():
+    retained = {}
+    profiler = MemoryProfiler()
+    profiler.watch("retained", lambda: len(retained))
+    profiler.start()
+    for index in range(2000):
+        retained[index] = "x" * 100 + str(index)
+    summary, details = profiler.stop()
+    assert not profiler.running
+    assert "retained: 0 -> 2000 entries" in summary
+    assert "test_profiling.py" in details
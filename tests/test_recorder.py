@@ -0,0 +1,74 @@
+import src.recorder as recorder_module
+from tools.replay import load_recording, resolve_game_references
+
+PASSCODE = "0b8e2a8e-3c1d-4f7e-9a55-2f0c6d1e4b77"
+
+
+def message_update(update_id, user_id, text, entities=None):
+    message = {
+        "message_id": update_id,
+        "date": 1700000000,
+        "chat": {"id": user_id, "type": "private", "first_name": "Alice", "username": "alice"},
+        "from": {"id": user_id, "is_bot": False, "first_name": "Alice", "last_name": "Smith", "username": "alice"},
+        "text": text,
+    }
+    if entities:
+        message["entities"] = entities
+    return {"update_id": update_id, "message": message}
+
+
+def callback_update(update_id, user_id, data):
+    return {"update_id": update_id, "callback_query": {
+        "id": str(update_id),
+        "from": {"id": user_id, "is_bot": False, "first_name": "Bob", "username": "bob"},
+        "chat_instance": "1",
+        "data": data,
+        "message": message_update(99, user_id, "Voting for Alice Smith")["message"],
+    }}
+
+
+def test_anonymizer_strips_names_and_ids(monkeypatch, memory_db):
+    monkeypatch.setattr(recorder_module, "cursor", memory_db.cursor)
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES ('gid', ?, 500)", (PASSCODE,))
+    anonymizer = recorder_module.UpdateAnonymizer()
+
+    start = anonymizer.update(message_update(1, 500, "/start", [{"type": "bot_command", "offset": 0, "length": 6}]))
+    assert start["message"]["text"] == "/start"
+    assert start["message"]["entities"][0]["type"] == "bot_command"
+    moderator = start["message"]["from"]["id"]
+    assert moderator != 500 and start["message"]["chat"]["id"] == moderator
+
+    name = anonymizer.update(message_update(2, 777, "Alice Smith"))
+    assert "Alice" not in str(name) and "alice" not in str(name)
+    assert name["message"]["text"] == "text1"
+
+    joined = anonymizer.update(message_update(3, 777, PASSCODE))
+    assert joined["message"]["text"] == f"{{passcode:{moderator}}}"
+
+    vote = anonymizer.update(callback_update(4, 777, "vote_500"))
+    assert vote["callback_query"]["data"] == f"vote_{moderator}"
+    assert "text" not in vote["callback_query"]["message"]
+    final = anonymizer.update(callback_update(5, 777, "final_confirm_vote_gid"))
+    assert final["callback_query"]["data"] == f"final_confirm_vote_{{game:{moderator}}}"
+
+    assert anonymizer.update({"update_id": 6, "poll": {"id": "1"}}) is None
+
+
+def test_recording_round_trip(tmp_path, monkeypatch, memory_db):
+    monkeypatch.setattr(recorder_module, "cursor", memory_db.cursor)
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES ('gid', ?, 500)", (PASSCODE,))
+    path = str(tmp_path / "updates.jsonl.gz")
+    recorder = recorder_module.UpdateRecorder(path)
+    recorder.record(message_update(1, 500, "/start"))
+    recorder.record(message_update(2, 777, PASSCODE))
+    recorder.close()
+
+    entries = load_recording(path)
+    assert [update["update_id"] for _, update in entries] == [1, 2]
+    assert entries[0][0] <= entries[1][0]
+
+    # In the replay, the moderator's pseudonym created a game with another passcode
+    moderator = entries[0][1]["message"]["from"]["id"]
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES ('g2', 'new-code', ?)", (moderator,))
+    resolved = resolve_game_references(entries[1][1])
+    assert resolved["message"]["text"] == "new-code"
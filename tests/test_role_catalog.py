@@ -0,0 +1,57 @@
+import json
+import pickle
+from src import role_catalog
+
+
+def make_source(tmp_path, roles):
+    source_path = tmp_path / 'roles.json'
+    source_path.write_text(json.dumps({'roles': roles}))
+    return str(source_path)
+
+
+def counting_parser(source_path, calls):
+    def parse():
+        calls.append(source_path)
+        with open(source_path) as file:
+            return {'available_roles': [role['name'] for role in json.load(file)['roles']]}
+    return parse
+
+
+def test_artifact_is_reused_until_the_source_changes(monkeypatch, tmp_path):
+    monkeypatch.setattr(role_catalog, '_artifacts', {})
+    source_path = make_source(tmp_path, [{'name': 'A'}])
+    calls = []
+    parse = counting_parser(source_path, calls)
+
+    assert role_catalog.load_section('catalog', source_path, parse) == {'available_roles': ['A']}
+    assert (tmp_path / role_catalog.ARTIFACT_NAME).exists()
+
+    # A new process reads the artifact instead of the JSON
+    monkeypatch.setattr(role_catalog, '_artifacts', {})
+    assert role_catalog.load_section('catalog', source_path, parse) == {'available_roles': ['A']}
+    assert len(calls) == 1
+
+    make_source(tmp_path, [{'name': 'A'}, {'name': 'B'}])
+    monkeypatch.setattr(role_catalog, '_artifacts', {})
+    assert role_catalog.load_section('catalog', source_path, parse) == {'available_roles': ['A', 'B']}
+    assert len(calls) == 2
+
+
+def test_damaged_artifact_falls_back_to_json(monkeypatch, tmp_path):
+    monkeypatch.setattr(role_catalog, '_artifacts', {})
+    source_path = make_source(tmp_path, [{'name': 'A'}])
+    artifact_path = tmp_path / role_catalog.ARTIFACT_NAME
+    calls = []
+    parse = counting_parser(source_path, calls)
+
+    artifact_path.write_bytes(b'not a pickle')
+    assert role_catalog.load_section('catalog', source_path, parse) == {'available_roles': ['A']}
+    assert len(calls) == 1
+
+    # A payload that does not match its checksum is not trusted either
+    artifact = pickle.loads(artifact_path.read_bytes())
+    artifact['sections']['catalog']['payload'] = pickle.dumps({'available_roles': ['X']})
+    artifact_path.write_bytes(pickle.dumps(artifact))
+    monkeypatch.setattr(role_catalog, '_artifacts', {})
+    assert role_catalog.load_section('catalog', source_path, parse) == {'available_roles': ['A']}
+    assert len(calls) == 2
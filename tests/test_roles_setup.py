@@ -61,8 +61,8 @@ def setup_game(memory_db, roles, counts):
 def test_confirm_and_set_roles_success(monkeypatch, memory_db):
     module = load_roles_setup(monkeypatch)
     game_id = setup_game(memory_db, ['A', 'B'], [1, 1])
-    monkeypatch.setattr(module, 'RANDOM_ORG_API_KEY', '')
-    monkeypatch.setattr(module, 'role_descriptions', {'A': 'descA', 'B': 'descB'})
+    monkeypatch.setattr(module.config, 'RANDOM_ORG_API_KEY', '')
+    monkeypatch.setattr(module.roles, 'role_descriptions', {'A': 'descA', 'B': 'descB'})
     async def fake_shuffle(lst, api_key=None):
         return lst
     monkeypatch.setattr(module, 'get_random_shuffle', fake_shuffle)
@@ -79,8 +79,8 @@ def test_confirm_and_set_roles_success(monkeypatch, memory_db):
 def test_confirm_and_set_roles_mismatch(monkeypatch, memory_db):
     module = load_roles_setup(monkeypatch)
     game_id = setup_game(memory_db, ['A'], [1])
-    monkeypatch.setattr(module, 'RANDOM_ORG_API_KEY', '')
-    monkeypatch.setattr(module, 'role_descriptions', {'A': 'descA'})
+    monkeypatch.setattr(module.config, 'RANDOM_ORG_API_KEY', '')
+    monkeypatch.setattr(module.roles, 'role_descriptions', {'A': 'descA'})
     monkeypatch.setattr(module, 'get_random_shuffle', lambda lst, api_key=None: lst)
     monkeypatch.setattr(module.random, 'shuffle', lambda x: None)
     # Add an extra player without corresponding role count
@@ -99,7 +99,7 @@ def test_show_role_buttons_pagination(monkeypatch, memory_db):
     module = load_roles_setup(monkeypatch)
     # limit roles for predictability
     roles = [f'R{i}' for i in range(6)]
-    monkeypatch.setattr(module, 'available_roles', roles)
+    monkeypatch.setattr(module.roles, 'available_roles', roles)
     monkeypatch.setattr(module, 'ROLES_PER_PAGE', 5)
     game_id = setup_game(memory_db, roles[:2], [1, 1])
 
@@ -0,0 +1,37 @@
+import sqlite3
+from src import metrics
+from src import sql_profiler
+
+
+def test_profiler_attributes_statements_to_route(monkeypatch):
+    profiler = sql_profiler.SQLProfiler(enabled=True)
+    monkeypatch.setattr(sql_profiler, 'profiler', profiler)
+    conn = sqlite3.connect(':memory:')
+    cursor = conn.cursor(factory=sql_profiler.ProfilingCursor)
+    cursor.execute("CREATE TABLE GameRoles (game_id TEXT, role TEXT, count INTEGER)")
+
+    token = metrics.current_route.set('button:create_game')
+    try:
+        for role in ('Doctor', 'Detective', 'Godfather'):
+            cursor.execute("INSERT INTO GameRoles (game_id, role, count)\n   VALUES (?, ?, 0)", ('g1', role))
+        cursor.execute("SELECT role FROM GameRoles WHERE game_id = ?", ('g1',))
+        assert len(cursor.fetchall()) == 3
+    finally:
+        metrics.current_route.reset(token)
+
+    insert = profiler.statements[('button:create_game', "INSERT INTO GameRoles (game_id, role, count) VALUES (?, ?, 0)")]
+    assert insert.count == 3
+    select = profiler.statements[('button:create_game', "SELECT role FROM GameRoles WHERE game_id = ?")]
+    assert select.count == 1 and select.rows == 3
+    assert profiler.statements[('background', "CREATE TABLE GameRoles (game_id TEXT, role TEXT, count INTEGER)")].count == 1
+    assert profiler.statements_per_route()['button:create_game'] == 4
+    assert 'INSERT INTO GameRoles' in profiler.report(5)
+
+
+def test_disabled_profiler_records_nothing(monkeypatch):
+    profiler = sql_profiler.SQLProfiler(enabled=False)
+    monkeypatch.setattr(sql_profiler, 'profiler', profiler)
+    cursor = sqlite3.connect(':memory:').cursor(factory=sql_profiler.ProfilingCursor)
+    cursor.execute("SELECT 1")
+    assert cursor.fetchone() == (1,)
+    assert profiler.statements == {}
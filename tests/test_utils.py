@@ -16,3 +16,9 @@ def test_generate_voting_summary():
 def test_generate_voting_summary_empty():
     summary = generate_voting_summary([], [])
     assert 'None' in summary
+
+
+def test_generate_voting_summary_with_tally():
+    summary = generate_voting_summary(['Alice'], ['Bob'], [('Bob', 2)])
+    assert 'Current Tally' in summary
+    assert 'Bob: 2 vote(s)' in summary
@@ -0,0 +1,133 @@
+import asyncio
+import types
+import importlib
+import sys
+
+
+def load_voting_deadline(monkeypatch, memory_db):
+    sys.modules['src.config'] = types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1)
+    voting = importlib.reload(importlib.import_module('src.handlers.game_management.voting'))
+    voting_deadline = importlib.reload(importlib.import_module('src.handlers.game_management.voting_deadline'))
+    monkeypatch.setattr(voting, 'cursor', memory_db.cursor)
+    monkeypatch.setattr(voting, 'conn', memory_db.conn)
+    monkeypatch.setattr(voting_deadline, 'default_deadline_minutes', 10)
+    return voting, voting_deadline
+
+
+class DummyBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.sent.append((chat_id, text))
+        return types.SimpleNamespace(message_id=len(self.sent))
+
+    async def edit_message_text(self, **kwargs):
+        pass
+
+    async def edit_message_reply_markup(self, **kwargs):
+        pass
+
+
+class DummyJob:
+    def __init__(self, callback, when, data, name):
+        self.callback = callback
+        self.when = when
+        self.data = data
+        self.name = name
+        self.removed = False
+
+    def schedule_removal(self):
+        self.removed = True
+
+
+class DummyJobQueue:
+    def __init__(self):
+        self.jobs = []
+
+    def run_once(self, callback, when, data=None, name=None):
+        job = DummyJob(callback, when, data, name)
+        self.jobs.append(job)
+        return job
+
+    def get_jobs_by_name(self, name):
+        return [job for job in self.jobs if job.name == name and not job.removed]
+
+    def run(self, job, bot):
+        context = types.SimpleNamespace(bot=bot, job=job, job_queue=self)
+        asyncio.run(job.callback(context))
+
+
+class DummyQuery:
+    data = 'confirm_permissions'
+    message = types.SimpleNamespace(chat_id=1, message_id=1)
+
+    async def answer(self):
+        pass
+
+
+def moderator_update():
+    return types.SimpleNamespace(effective_user=types.SimpleNamespace(id=1), effective_chat=types.SimpleNamespace(id=1),
+                                 callback_query=DummyQuery())
+
+
+def start_timed_vote(memory_db, voting, bot, job_queue):
+    gid = 'g1'
+    memory_db.cursor.execute("INSERT INTO Games (game_id, passcode, moderator_id) VALUES (?, ?, ?)", (gid, 'p', 1))
+    for uid in (2, 3, 4):
+        memory_db.cursor.execute("INSERT INTO Users (user_id, username) VALUES (?, ?)", (uid, f"P{uid}"))
+        memory_db.cursor.execute("INSERT INTO Roles (game_id, user_id, role, eliminated) VALUES (?, ?, 'R', 0)", (gid, uid))
+    memory_db.conn.commit()
+    context = types.SimpleNamespace(bot=bot, user_data={'game_id': gid}, job_queue=job_queue)
+    asyncio.run(voting.prompt_voting_permissions(moderator_update(), context, gid, anonymous=True))
+    asyncio.run(voting.confirm_permissions(moderator_update(), context))
+    return gid, context
+
+
+def test_deadline_reminds_and_closes_the_round(monkeypatch, memory_db):
+    voting, voting_deadline = load_voting_deadline(monkeypatch, memory_db)
+    bot = DummyBot()
+    job_queue = DummyJobQueue()
+    gid, context = start_timed_vote(memory_db, voting, bot, job_queue)
+
+    session = voting.game_voting_data[gid]
+    assert session.deadline_minutes == 10
+    reminder_5, reminder_1, close = job_queue.jobs
+    assert [job.callback for job in job_queue.jobs] == [voting_deadline.remind_voters, voting_deadline.remind_voters,
+                                                        voting_deadline.close_expired_voting]
+    assert 590 < close.when <= 600 and round(close.when - reminder_5.when) == 300
+
+    # Voter 2 confirms a vote for 3; voter 3 selects 4 but never confirms
+    session.toggle(2, 3)
+    session.confirm(2)
+    session.toggle(3, 4)
+
+    bot.sent.clear()
+    job_queue.run(reminder_1, bot)
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [3, 4]
+
+    bot.sent.clear()
+    job_queue.run(close, bot)
+    assert gid not in voting.game_voting_data
+    # The unconfirmed vote for 4 is not counted
+    summary = bot.sent[0][1]
+    assert "P3" in summary and "P4" not in summary
+    assert "P3\\*\\* did not vote" in bot.sent[-1][1]
+
+
+def test_ended_round_cancels_its_jobs(monkeypatch, memory_db):
+    voting, voting_deadline = load_voting_deadline(monkeypatch, memory_db)
+    bot = DummyBot()
+    job_queue = DummyJobQueue()
+    gid, context = start_timed_vote(memory_db, voting, bot, job_queue)
+    close = job_queue.jobs[-1]
+
+    for voter_id in (2, 3, 4):
+        voting.game_voting_data[gid].confirm(voter_id)
+    asyncio.run(voting.process_voting_results(None, context, gid))
+    assert all(job.removed for job in job_queue.jobs)
+
+    # A job that still fires after its round ended does nothing
+    sent = len(bot.sent)
+    job_queue.run(close, bot)
+    assert len(bot.sent) == sent
@@ -47,13 +47,11 @@ def setup_game(memory_db):
 def test_process_voting_results(monkeypatch, memory_db):
     module = load_voting(monkeypatch, memory_db)
     gid = setup_game(memory_db)
-    module.game_voting_data[gid] = {
-        'votes': {1: [2], 2: [1], 3: []},
-        'player_ids': [1, 2, 3],
-        'player_names': {1: 'mod', 2: 'A', 3: 'B'},
-        'summary_message_id': None,
-        'anonymous': False,
-    }
+    session = module.VotingSession(gid, [(1, 'mod'), (2, 'A'), (3, 'B')], anonymous=False)
+    session.toggle(1, 2)
+    session.toggle(2, 1)
+    session.reset(3)
+    module.game_voting_data[gid] = session
     update = DummyUpdate(1)
     context = DummyContext()
     asyncio.run(module.process_voting_results(update, context, gid))
@@ -65,17 +63,10 @@ def test_process_voting_results(monkeypatch, memory_db):
 def test_final_confirm_vote_triggers_results(monkeypatch, memory_db):
     module = load_voting(monkeypatch, memory_db)
     gid = setup_game(memory_db)
-    module.game_voting_data[gid] = {
-        'votes': {1: [2]},
-        'player_ids': [1, 2, 3],
-        'player_names': {1: 'mod', 2: 'A', 3: 'B'},
-        'summary_message_id': None,
-        'anonymous': False,
-        'voters': {1},
-        'permissions': {1: {'can_vote': True, 'can_be_voted': True},
-                        2: {'can_vote': True, 'can_be_voted': True},
-                        3: {'can_vote': True, 'can_be_voted': True}},
-    }
+    session = module.VotingSession(gid, [(1, 'mod'), (2, 'A'), (3, 'B')], anonymous=False)
+    session.toggle(1, 2)
+    session.voters = {1}
+    module.game_voting_data[gid] = session
 
     called_summary = []
     async def fake_summary(ctx, gid_param):
@@ -109,3 +100,50 @@ def test_final_confirm_vote_triggers_results(monkeypatch, memory_db):
     assert processed == [gid]
     assert gid not in module.game_voting_data
 
+
+
+def test_voting_session_restored_from_events(monkeypatch, memory_db):
+    module = load_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    session = module.VotingSession(gid, [(1, 'mod'), (2, 'A'), (3, 'B')], anonymous=True)
+    session.toggle_permission(3, 'can_vote')
+    session.open_voting()
+    session.summary_message_id = 7
+    module.game_voting_data[gid] = session
+    module.save_voting_session(gid, new_session=True)
+    for voter_id, event, target_id in [(1, 'toggle', 2), (1, 'toggle', 3), (1, 'toggle', 2),
+                                       (2, 'toggle', 1), (2, 'confirm', None)]:
+        session.apply_event(voter_id, event, target_id)
+        module.record_vote_event(gid, voter_id, event, target_id)
+    expected = module.game_voting_data.pop(gid)
+
+    assert module.restore_voting_sessions() == 1
+    restored = module.game_voting_data[gid]
+    assert restored.ballots() == expected.ballots() == [(1, [3]), (2, [1])]
+    assert restored.results() == expected.results()
+    assert restored.voters == {1}
+    assert restored.player_names == expected.player_names
+    assert restored.permissions() == expected.permissions()
+    assert restored.summary_message_id == 7
+    assert restored.anonymous is True
+
+    module.delete_voting_session(gid)
+    module.game_voting_data.clear()
+    assert module.restore_voting_sessions() == 0
+
+
+def test_repeated_final_confirm_sends_nothing(monkeypatch, memory_db):
+    module = load_voting(monkeypatch, memory_db)
+    gid = setup_game(memory_db)
+    session = module.VotingSession(gid, [(1, 'mod'), (2, 'A'), (3, 'B')], anonymous=False)
+    module.game_voting_data[gid] = session
+    session.open_voting()
+    session.confirm(2)
+    update = DummyUpdate(2)
+    update.callback_query = types.SimpleNamespace(data=f'final_confirm_vote_{gid}')
+    context = DummyContext()
+
+    asyncio.run(module.final_confirm_vote(update, context))
+    asyncio.run(module.confirm_votes(update, context, gid))
+    assert context.bot.sent == []
+    module.game_voting_data.pop(gid)
@@ -0,0 +1,55 @@
+import importlib
+import sys
+import types
+
+# Importing the game_management package imports the handlers that read src.config
+sys.modules.setdefault('src.config', types.SimpleNamespace(RANDOM_ORG_API_KEY='', MAINTAINER_ID=1))
+voting_session = importlib.import_module("src.handlers.game_management.voting_session")
+VotingSession = voting_session.VotingSession
+
+
+def make_session():
+    return VotingSession('g1', [(1, 'mod'), (2, 'A'), (3, 'B'), (4, 'C')])
+
+
+def test_toggle_keeps_running_tally():
+    session = make_session()
+    assert session.toggle(1, 2) is True
+    assert session.toggle(3, 2) is True
+    assert session.toggle(3, 4) is True
+    assert session.results() == [(2, 2), (4, 1)]
+    assert session.toggle(3, 2) is False
+    assert session.results() == [(2, 1), (4, 1)]
+    assert session.has_voted_for(3, 4) and not session.has_voted_for(3, 2)
+    assert session.selected_targets(3) == [4]
+    assert session.leaderboard(1) == [('A', 1)]
+
+
+def test_reset_and_remove_voter_update_tally():
+    session = make_session()
+    session.open_voting()
+    session.toggle(1, 2)
+    session.toggle(1, 3)
+    session.toggle(2, 3)
+    session.reset(1)
+    assert session.results() == [(3, 1)]
+    assert session.ballots() == [(1, []), (2, [3])]
+    session.remove_voter(2)
+    assert session.results() == []
+    assert 2 not in session.voters
+
+
+def test_permissions_and_candidates():
+    session = make_session()
+    session.toggle_permission(4, 'can_be_voted')
+    session.toggle_permission(2, 'can_vote')
+    assert session.candidates() == [(1, 'mod'), (2, 'A'), (3, 'B')]
+    assert session.open_voting() == [1, 3, 4]
+    assert session.permissions()[2] == {'can_vote': False, 'can_be_voted': True}
+
+
+def test_unknown_target_is_ignored():
+    session = make_session()
+    assert session.toggle(1, 99) is False
+    assert session.results() == []
+    assert not hasattr(session, '__dict__')
@@ -0,0 +1,252 @@
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from aiohttp import web
+
+logger = logging.getLogger("Mafia Bot LoadTest.FakeBotAPI")
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Mafia Bot", "username": "fake_mafia_bot"}
+
+# Parameters that PTB sends JSON-encoded inside the form data
+JSON_PARAMETERS = ("reply_markup", "entities", "allowed_updates", "link_preview_options")
+
+# Longest getUpdates long poll the server honours, in seconds
+MAX_POLL_TIMEOUT = 30
+
+
+class FaultInjection:
+    """Latency and failures applied to every method except getUpdates."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, rate_429: float = 0.0,
+                 retry_after: int = 1, error_rate: float = 0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+
+
+class ChatLog:
+    """Everything the bot sent to or edited in one private chat."""
+
+    def __init__(self):
+        self.messages = {}  # message_id -> Message dict as the bot last left it
+        self.events = []  # (timestamp, kind, message dict) of sendMessage and edits, in order
+        self.changed = asyncio.Event()
+        self.message_ids = itertools.count(1)
+
+
+class FakeBotAPI:
+    """
+    In-memory stand-in for the Telegram Bot API. The bot under test polls it with getUpdates;
+    a load generator in the same process pushes updates with push_message/push_callback and
+    waits for the bot's answers with wait_for.
+    """
+
+    def __init__(self, faults: FaultInjection = None):
+        self.faults = faults or FaultInjection()
+        self.chats = {}
+        self.pending_updates = []
+        self.updates_available = asyncio.Event()
+        self.polled = asyncio.Event()  # Set on the first getUpdates, i.e. once the bot is up
+        self.closing = False
+        self.update_ids = itertools.count(1)
+        self.callback_ids = itertools.count(1)
+        self.method_calls = {}
+        self.app = web.Application()
+        self.app.router.add_route("*", "/bot{token}/{method}", self.handle)
+
+    def chat(self, chat_id: int) -> ChatLog:
+        chat = self.chats.get(chat_id)
+        if chat is None:
+            chat = self.chats[chat_id] = ChatLog()
+        return chat
+
+    # -------------------- Load generator side --------------------
+
+    def push_message(self, user_id: int, text: str) -> None:
+        """Queues a private text message (or /command) from a user."""
+        chat = self.chat(user_id)
+        message = {
+            "message_id": next(chat.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            "text": text,
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        self._push({"message": message})
+
+    def push_callback(self, user_id: int, message: dict, data: str) -> None:
+        """Queues a button tap of a user on a message the bot sent them."""
+        self._push({"callback_query": {
+            "id": str(next(self.callback_ids)),
+            "from": self._user(user_id),
+            "chat_instance": str(user_id),
+            "message": message,
+            "data": data,
+        }})
+
+    def mark(self, chat_id: int) -> int:
+        """Position in the chat's event log; pass it to wait_for to only see later events."""
+        return len(self.chat(chat_id).events)
+
+    async def wait_for(self, chat_id: int, since: int, predicate=None, timeout: float = 30.0):
+        """
+        Waits for a message the bot sends or edits in the chat after `since` that matches
+        predicate(message). Returns (timestamp, message).
+        """
+        chat = self.chat(chat_id)
+        deadline = time.monotonic() + timeout
+        position = since
+        while True:
+            while position < len(chat.events):
+                timestamp, _, message = chat.events[position]
+                position += 1
+                if predicate is None or predicate(message):
+                    return timestamp, message
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"No matching message in chat {chat_id}")
+            chat.changed.clear()
+            try:
+                await asyncio.wait_for(chat.changed.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    def release_pollers(self) -> None:
+        """Answers pending and future getUpdates immediately, so the bot can shut down quickly."""
+        self.closing = True
+        self.updates_available.set()
+
+    def _push(self, payload: dict) -> None:
+        payload["update_id"] = next(self.update_ids)
+        self.pending_updates.append(payload)
+        self.updates_available.set()
+
+    @staticmethod
+    def _user(user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"Player{user_id}"}
+
+    # -------------------- Bot side --------------------
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = await self._read_params(request)
+        self.method_calls[method] = self.method_calls.get(method, 0) + 1
+
+        if method == "getUpdates":
+            return self._ok(await self.get_updates(params))
+
+        faults = self.faults
+        if faults.latency or faults.jitter:
+            await asyncio.sleep(max(0.0, random.gauss(faults.latency, faults.jitter)))
+        if faults.rate_429 and random.random() < faults.rate_429:
+            return self._error(429, "Too Many Requests: retry after %d" % faults.retry_after,
+                               {"retry_after": faults.retry_after})
+        if faults.error_rate and random.random() < faults.error_rate:
+            return self._error(500, "Internal Server Error")
+
+        if method == "getMe":
+            return self._ok(BOT_USER)
+        if method.startswith("send"):
+            return self._ok(self.send_message(params))
+        if method in ("editMessageText", "editMessageReplyMarkup"):
+            return self.edit_message(method, params)
+        # answerCallbackQuery, deleteWebhook and everything else just succeed
+        return self._ok(True)
+
+    async def get_updates(self, params: dict) -> list:
+        self.polled.set()
+        offset = int(params.get("offset") or 0)
+        if offset:
+            self.pending_updates = [u for u in self.pending_updates if u["update_id"] >= offset]
+        if self.closing:
+            return []
+        if not self.pending_updates:
+            self.updates_available.clear()
+            timeout = min(float(params.get("timeout") or 0), MAX_POLL_TIMEOUT)
+            try:
+                await asyncio.wait_for(self.updates_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+            if self.closing:
+                return []
+        limit = int(params.get("limit") or 100)
+        return self.pending_updates[:limit]
+
+    def send_message(self, params: dict) -> dict:
+        chat_id = params["chat_id"]
+        chat = self.chat(chat_id)
+        message = {
+            "message_id": next(chat.message_ids),
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": BOT_USER,
+            "text": params.get("text") or params.get("caption") or "",
+        }
+        if params.get("reply_markup"):
+            message["reply_markup"] = params["reply_markup"]
+        chat.messages[message["message_id"]] = message
+        self._record(chat, "send", message)
+        return message
+
+    def edit_message(self, method: str, params: dict) -> web.Response:
+        chat = self.chat(params["chat_id"])
+        message = chat.messages.get(int(params["message_id"]))
+        if message is None:
+            return self._error(400, "Bad Request: message to edit not found")
+        edited = dict(message)
+        if method == "editMessageText":
+            edited["text"] = params["text"]
+        edited.pop("reply_markup", None)
+        if params.get("reply_markup"):
+            edited["reply_markup"] = params["reply_markup"]
+        if edited == message:
+            return self._error(400, "Bad Request: message is not modified: specified new message content "
+                                    "and reply markup are exactly the same as a current content and reply markup "
+                                    "of the message")
+        edited["edit_date"] = int(time.time())
+        chat.messages[edited["message_id"]] = edited
+        self._record(chat, "edit", edited)
+        return self._ok(edited)
+
+    @staticmethod
+    def _record(chat: ChatLog, kind: str, message: dict) -> None:
+        chat.events.append((time.perf_counter(), kind, message))
+        chat.changed.set()
+
+    @staticmethod
+    async def _read_params(request: web.Request) -> dict:
+        if request.content_type == "application/json":
+            return await request.json()
+        params = dict(await request.post()) if request.can_read_body else {}
+        params.update(request.query)
+        for name in JSON_PARAMETERS:
+            if isinstance(params.get(name), str):
+                params[name] = json.loads(params[name])
+        if "chat_id" in params:
+            params["chat_id"] = int(params["chat_id"])
+        return params
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({"ok": True, "result": result})
+
+    @staticmethod
+    def _error(status: int, description: str, parameters: dict = None) -> web.Response:
+        body = {"ok": False, "error_code": status, "description": description}
+        if parameters:
+            body["parameters"] = parameters
+        return web.json_response(body, status=status)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8081) -> web.AppRunner:
+        runner = web.AppRunner(self.app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        logger.info("Fake Bot API listening on http://%s:%s (base URL http://%s:%s/bot)", host, port, host, port)
+        return runner
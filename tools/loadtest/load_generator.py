@@ -0,0 +1,245 @@
+"""
+Simulates many concurrent games against the bot through the fake Bot API server.
+
+Usage (from the repository root):
+    python -m tools.loadtest.load_generator --games 200 --players 8 --spawn-bot
+
+Without --spawn-bot, start the bot yourself with
+    python main.py --base-url http://127.0.0.1:8081/bot
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+from tools.loadtest.fake_bot_api import FakeBotAPI, FaultInjection
+
+logger = logging.getLogger("Mafia Bot LoadTest")
+
+PASSCODE_PATTERN = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-4[0-9a-f]{3}-[89ab][0-9a-f]{3}-[0-9a-f]{12}")
+
+# Seconds within which the bot counts a repeated tap of the same role count button once
+# (COUNTER_TAP_WINDOW in dedup_handler)
+COUNTER_TAP_WINDOW = 0.3
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def callback_data_of(message: dict) -> list:
+    markup = message.get("reply_markup") or {}
+    return [button.get("callback_data") for row in markup.get("inline_keyboard", []) for button in row]
+
+
+def has_button(prefix: str):
+    return lambda message: any(data and data.startswith(prefix) for data in callback_data_of(message))
+
+
+def text_contains(fragment: str):
+    return lambda message: fragment in message.get("text", "").replace("\\", "")
+
+
+class LoadStats:
+    def __init__(self):
+        self.latencies = {}  # step -> list of seconds
+        self.failures = {}  # step -> count
+        self.updates = 0
+
+    def record(self, step: str, seconds: float) -> None:
+        self.latencies.setdefault(step, []).append(seconds)
+
+    def fail(self, step: str) -> None:
+        self.failures[step] = self.failures.get(step, 0) + 1
+
+    def report(self, elapsed: float) -> str:
+        every = [value for values in self.latencies.values() for value in values]
+        lines = [
+            f"Updates sent: {self.updates} in {elapsed:.1f}s ({self.updates / elapsed:.1f} updates/sec)",
+            f"Overall latency: p50 {percentile(every, 0.5) * 1000:.1f} ms, p99 {percentile(every, 0.99) * 1000:.1f} ms",
+            "",
+            f"{'step':<20}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'failed':>8}",
+        ]
+        for step in sorted(set(self.latencies) | set(self.failures)):
+            values = self.latencies.get(step, [])
+            lines.append(
+                f"{step:<20}{len(values):>8}{percentile(values, 0.5) * 1000:>10.1f}"
+                f"{percentile(values, 0.99) * 1000:>10.1f}{self.failures.get(step, 0):>8}"
+            )
+        return "\n".join(lines)
+
+
+class GameSimulation:
+    """One moderator and `players` players going through a whole game."""
+
+    def __init__(self, server: FakeBotAPI, stats: LoadStats, moderator_id: int, player_ids: list, timeout: float):
+        self.server = server
+        self.stats = stats
+        self.moderator_id = moderator_id
+        self.player_ids = player_ids
+        self.timeout = timeout
+        self.menus = {}  # user_id -> last main menu message
+
+    async def step(self, name: str, user_id: int, send, predicate=None) -> dict:
+        """Sends one update and waits until the bot answers the user with a matching message."""
+        since = self.server.mark(user_id)
+        started = time.perf_counter()
+        send()
+        self.stats.updates += 1
+        try:
+            answered, message = await self.server.wait_for(user_id, since, predicate, self.timeout)
+        except asyncio.TimeoutError:
+            self.stats.fail(name)
+            raise
+        self.stats.record(name, answered - started)
+        return message
+
+    def text(self, user_id: int, text: str):
+        return lambda: self.server.push_message(user_id, text)
+
+    def tap(self, user_id: int, message: dict, data: str):
+        return lambda: self.server.push_callback(user_id, message, data)
+
+    async def open_menu(self, user_id: int) -> dict:
+        menu = await self.step("start", user_id, self.text(user_id, "/start"), text_contains("Welcome to the Mafia"))
+        self.menus[user_id] = menu
+        return menu
+
+    async def join(self, player_id: int, passcode: str) -> None:
+        menu = await self.open_menu(player_id)
+        prompt = await self.step("join_game", player_id, self.tap(player_id, menu, "join_game"))
+        if "Welcome back" in prompt.get("text", ""):
+            await self.step("keep_name", player_id, self.tap(player_id, prompt, "keep_name"), text_contains("passcode"))
+        else:
+            await self.step("set_name", player_id, self.text(player_id, f"Player{player_id}"), text_contains("passcode"))
+        await self.step("passcode", player_id, self.text(player_id, passcode), text_contains("Joined"))
+
+    async def set_roles(self) -> None:
+        moderator = self.moderator_id
+        roles_message = await self.step(
+            "set_roles", moderator, self.tap(moderator, self.menus[moderator], "set_roles"), has_button("increase_")
+        )
+        increase_buttons = [data for data in callback_data_of(roles_message) if data.startswith("increase_")]
+        for index in range(len(self.player_ids)):
+            if index and index % len(increase_buttons) == 0:
+                # The same button again; wait so the bot does not drop it as a double tap
+                await asyncio.sleep(COUNTER_TAP_WINDOW)
+            data = increase_buttons[index % len(increase_buttons)]
+            roles_message = await self.step("increase_role", moderator, self.tap(moderator, roles_message, data))
+        await self.step("confirm_roles", moderator, self.tap(moderator, roles_message, "confirm_roles"),
+                        text_contains("Roles have been confirmed"))
+
+    async def run(self) -> None:
+        moderator = self.moderator_id
+        menu = await self.open_menu(moderator)
+        created = await self.step("create_game", moderator, self.tap(moderator, menu, "create_game"),
+                                  lambda message: PASSCODE_PATTERN.fullmatch(message.get("text", "").replace("\\", "")))
+        passcode = created["text"].replace("\\", "")
+
+        await asyncio.gather(*(self.join(player_id, passcode) for player_id in self.player_ids))
+        await self.set_roles()
+
+        manage = await self.step("manage_games", moderator, self.tap(moderator, menu, "manage_games"),
+                                 has_button("announce_voting"))
+        await self.step("start_game", moderator, self.tap(moderator, manage, "start_game_manage_games"),
+                        text_contains("started successfully"))
+        permissions = await self.step("announce_voting", moderator, self.tap(moderator, manage, "announce_voting"),
+                                      has_button("confirm_permissions"))
+        voting_opened = {player_id: self.server.mark(player_id) for player_id in self.player_ids}
+        await self.step("confirm_permissions", moderator, self.tap(moderator, permissions, "confirm_permissions"))
+        await asyncio.gather(*(self.vote(player_id, voting_opened[player_id]) for player_id in self.player_ids))
+        await self.step("inquiry_summary", moderator, self.tap(moderator, manage, "inquiry_summary"))
+
+    async def vote(self, player_id: int, since: int) -> None:
+        _, ballot = await self.server.wait_for(player_id, since, has_button("vote_"), self.timeout)
+        candidates = [data for data in callback_data_of(ballot) if data.startswith("vote_")]
+        ballot = await self.step("vote", player_id, self.tap(player_id, ballot, random.choice(candidates)))
+        ballot = await self.step("confirm_votes", player_id, self.tap(player_id, ballot, "confirm_votes"),
+                                 has_button("final_confirm_vote_"))
+        final = next(data for data in callback_data_of(ballot) if data.startswith("final_confirm_vote_"))
+        await self.step("final_confirm_vote", player_id, self.tap(player_id, ballot, final),
+                        text_contains("finally confirmed"))
+
+
+async def run_load(args) -> LoadStats:
+    faults = FaultInjection(args.latency / 1000, args.jitter / 1000, args.rate_429, args.retry_after, args.error_rate)
+    server = FakeBotAPI(faults)
+    runner = await server.start(args.host, args.port)
+    base_url = f"http://{args.host}:{args.port}/bot"
+
+    bot_process = None
+    if args.spawn_bot:
+        bot_process = subprocess.Popen(
+            [sys.executable, "main.py", "--base-url", base_url, "--log-level", args.bot_log_level, *args.bot_args],
+            cwd=REPO_ROOT
+        )
+    else:
+        print(f"Waiting for the bot. Start it with: python main.py --base-url {base_url}")
+
+    stats = LoadStats()
+    try:
+        await asyncio.wait_for(server.polled.wait(), args.startup_timeout)
+        # Fresh user ids on every run, so earlier runs in the same database do not interfere
+        user_ids = itertools.count(int(time.time()) * 1000)
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def play() -> None:
+            game = GameSimulation(server, stats, next(user_ids), [next(user_ids) for _ in range(args.players)],
+                                  args.timeout)
+            async with limit:
+                try:
+                    await game.run()
+                except asyncio.TimeoutError as e:
+                    logger.warning("Game of moderator %s stalled: %s", game.moderator_id, e)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(play() for _ in range(args.games)))
+        print(stats.report(time.perf_counter() - started))
+        print(f"\nBot API calls: {dict(sorted(server.method_calls.items()))}")
+    finally:
+        if bot_process:
+            server.release_pollers()
+            bot_process.terminate()
+            # Keep serving while the bot shuts down; it still makes a few calls
+            await asyncio.get_running_loop().run_in_executor(None, bot_process.wait)
+        await runner.cleanup()
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the bot against a fake Telegram Bot API")
+    parser.add_argument("--games", type=int, default=50, help="Number of games to simulate.")
+    parser.add_argument("--players", type=int, default=8, help="Players per game, besides the moderator.")
+    parser.add_argument("--concurrency", type=int, default=200, help="Games played at the same time.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean Bot API latency in ms.")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Standard deviation of the latency in ms.")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of calls answered with 429.")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry_after of injected 429 answers.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of calls answered with 500.")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for each answer of the bot.")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for the bot to poll.")
+    parser.add_argument("--spawn-bot", action="store_true", help="Start main.py against the fake server.")
+    parser.add_argument("--bot-log-level", default="WARNING", help="--log-level of the spawned bot.")
+    parser.add_argument("bot_args", nargs="*", help="Extra arguments for the spawned bot, after --.")
+    return parser.parse_args(argv)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(run_load(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
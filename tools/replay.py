@@ -0,0 +1,185 @@
+"""
+Replays updates recorded with `main.py --record-updates` against an in-memory database and
+a fake Bot API, and reports handler latency per route.
+
+Usage (from the repository root):
+    python -m tools.replay recording.jsonl.gz             # at the recorded pace
+    python -m tools.replay recording.jsonl.gz --max-speed # back to back
+"""
+import argparse
+import asyncio
+import gzip
+import itertools
+import json
+import logging
+import re
+import sqlite3
+import sys
+import time
+import types
+import uuid
+
+# Placeholders the recorder writes instead of passcodes and game ids, see src/recorder.py
+GAME_REFERENCE = re.compile(r"\{(passcode|game):(-?\d+|unknown)\}")
+
+BOT_USER = {"id": 1, "is_bot": True, "first_name": "Mafia Bot", "username": "replay_mafia_bot"}
+
+
+def load_recording(path: str) -> list:
+    """Returns the recorded (offset in seconds, update dict) pairs in order."""
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        entries = [json.loads(line) for line in file if line.strip()]
+    return [(entry["t"], entry["update"]) for entry in entries if "update" in entry]
+
+
+def use_memory_database() -> None:
+    """Points src.db and every loaded module that imported its connection at a fresh in-memory database."""
+    from src import db
+    from src.sql_profiler import ProfilingCursor
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    cursor = conn.cursor(factory=ProfilingCursor)
+    file_cursor = db.cursor
+    for name, module in list(sys.modules.items()):
+        if name.startswith("src") and getattr(module, "cursor", None) is file_cursor:
+            module.cursor = cursor
+            if hasattr(module, "conn"):
+                module.conn = conn
+    db.initialize_database()
+
+
+def resolve_game_references(update: dict) -> dict:
+    """Substitutes the passcode or game id of the moderator's latest game in this replay."""
+    from src import db
+
+    def resolve(match) -> str:
+        kind, moderator = match.groups()
+        row = None
+        if moderator != "unknown":
+            column = "passcode" if kind == "passcode" else "game_id"
+            db.cursor.execute(f"SELECT {column} FROM Games WHERE moderator_id = ? ORDER BY rowid DESC LIMIT 1",
+                              (int(moderator),))
+            row = db.cursor.fetchone()
+        # A game that did not exist when recording; keep it invalid
+        return row[0] if row else str(uuid.uuid4())
+
+    encoded = json.dumps(update)
+    if "{passcode:" not in encoded and "{game:" not in encoded:
+        return update
+    return json.loads(GAME_REFERENCE.sub(resolve, encoded))
+
+
+def route_of(update: dict) -> str:
+    from src.metrics import route_for_callback
+    if "callback_query" in update:
+        return f"button:{route_for_callback(update['callback_query'].get('data'))}"
+    text = update.get("message", {}).get("text", "")
+    return f"command:{text.split()[0]}" if text.startswith("/") else "text"
+
+
+def make_replay_request(latency: float, method_calls: dict):
+    """Builds a BaseRequest that answers every Bot API call locally after `latency` seconds."""
+    from telegram.request import BaseRequest
+
+    class ReplayRequest(BaseRequest):
+        message_ids = itertools.count(1)
+
+        async def initialize(self) -> None:
+            pass
+
+        async def shutdown(self) -> None:
+            pass
+
+        async def do_request(self, url, method, request_data=None, read_timeout=BaseRequest.DEFAULT_NONE,
+                             write_timeout=BaseRequest.DEFAULT_NONE, connect_timeout=BaseRequest.DEFAULT_NONE,
+                             pool_timeout=BaseRequest.DEFAULT_NONE):
+            api_method = url.rsplit("/", 1)[-1]
+            method_calls[api_method] = method_calls.get(api_method, 0) + 1
+            if latency:
+                await asyncio.sleep(latency)
+            parameters = request_data.parameters if request_data else {}
+            if api_method == "getMe":
+                result = BOT_USER
+            elif api_method.startswith("send"):
+                result = {
+                    "message_id": next(self.message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": int(parameters.get("chat_id", 0)), "type": "private"},
+                    "from": BOT_USER,
+                    "text": parameters.get("text", ""),
+                }
+            else:
+                result = True
+            return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    return ReplayRequest()
+
+
+async def replay(entries: list, max_speed: bool, latency: float) -> None:
+    from telegram import Update
+    from telegram.ext import Application
+    from main import register_handlers
+    from src.metrics import MetricsRegistry, registry
+
+    method_calls = {}
+    application = (
+        Application.builder()
+        .token("1:replay")
+        .request(make_replay_request(latency, method_calls))
+        .get_updates_request(make_replay_request(0, {}))
+        .updater(None)
+        .build()
+    )
+    register_handlers(application)
+    replayed = MetricsRegistry()
+    lag = 0.0
+
+    async with application:
+        started = time.perf_counter()
+        for offset, payload in entries:
+            if not max_speed:
+                delay = offset - (time.perf_counter() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    lag = max(lag, -delay)
+            # Resolved only now, once every earlier update has created its games
+            update = Update.de_json(resolve_game_references(payload), application.bot)
+            update_started = time.perf_counter()
+            await application.process_update(update)
+            replayed.observe(route_of(payload), time.perf_counter() - update_started)
+        elapsed = time.perf_counter() - started
+
+    print(f"Replayed {len(entries)} updates in {elapsed:.2f}s ({len(entries) / max(elapsed, 1e-9):.1f} updates/sec)")
+    if not max_speed:
+        print(f"Largest lag behind the recorded pace: {lag * 1000:.1f} ms")
+    print("\nPer update:")
+    print(replayed.render_summary(limit=50))
+    print("\nInside the instrumented handlers:")
+    print(registry.render_summary(limit=50))
+    print(f"\nBot API calls: {dict(sorted(method_calls.items()))}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recording of incoming updates")
+    parser.add_argument("recording", help="File written by main.py --record-updates.")
+    parser.add_argument("--max-speed", action="store_true", help="Ignore the recorded timing.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated Bot API latency in ms.")
+    parser.add_argument("--log-level", default="WARNING", help="Level of the bot's log records.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # No token or Random.org key is needed, and roles are shuffled locally
+    sys.modules.setdefault("src.config", types.SimpleNamespace(TOKEN="1:replay", RANDOM_ORG_API_KEY="", MAINTAINER_ID=0))
+    # Import every handler module first, so they all get the in-memory database
+    import main as bot_main
+    bot_main.recorder.path = None
+    use_memory_database()
+    entries = load_recording(args.recording)
+    asyncio.run(replay(entries, args.max_speed, args.latency / 1000))
+
+
+if __name__ == "__main__":
+    main()